@@ -4,12 +4,42 @@ __all__ = [
     "get_coordinates_from_xyz",
     "write_xyzfile_from_xyz",
     "write_xyzfile_from_coordinates",
+    "write_xyzfile_from_array",
     "cd",
     "interpolate",
+    "interpolate_array",
+    "idpp_interpolate",
+    "get_coordinates_array",
+    "Molecule",
     "get_input_block",
     "ORCAINP",
+    "write_inputs",
+    "ParsedInput",
+    "parse_input",
+    "read_input",
+    "read_inputs",
+    "RunResult",
+    "Scheduler",
+    "Workflow",
     "check_normal_termination",
     "check_opt",
     "get_xyz_from_out",
     "ORCAOUT",
+    "read_hess",
+    "Cube",
+    "read_cube",
+    "broaden",
+    "build_spectrum",
+    "thermochemistry",
+    "thermochemistry_from_outputs",
+    "parse_many",
+    "iter_parse_many",
+    "OutputFollower",
+    "OutputCache",
+    "RunCache",
+    "ResultStore",
+    "open_file",
+    "compress_file",
+    "compact_run",
+    "extract_file",
 ]
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# Benchmarks of the orcatools hot paths: output parsing, coordinates, interpolation and input generation.
+#
+# Usage:
+#   python benchmarks/bench.py --sizes 1,10,100 --output results.json
+#   python benchmarks/bench.py --output new.json --compare old.json
+#
+# Synthetic outputs are built by replicating the geometry/energy blocks of examples/a.out and examples/b.out,
+# so they look like long optimizations. Getters whose section is not in the examples are skipped rather than timed on
+# their "section missing" path. Results are written as JSON, one record per benchmark.
+# The synthetic files are written to a temporary directory, removed at the end, unless --workdir is given.
+# An installed orcatools is benchmarked if there is one, otherwise the package of this checkout.
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import resource
+import subprocess as sub
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLES = os.path.join(ROOT, "examples")
+
+# The repository itself is the orcatools package, so run the benchmarks on this checkout unless it is installed
+if "orcatools" not in sys.modules and importlib.util.find_spec("orcatools") is None:
+    spec = importlib.util.spec_from_file_location(
+        "orcatools", os.path.join(ROOT, "__init__.py"), submodule_search_locations=[ROOT]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["orcatools"] = module
+    spec.loader.exec_module(module)
+
+from orcatools.inp import ORCAINP, write_inputs
+from orcatools.out import ORCAOUT, check_normal_termination
+from orcatools.tools import get_coordinates_from_xyz, interpolate, interpolate_array
+
+GETTERS = [
+    "get_thermal_corrections",
+    "get_correlation_cbs",
+    "get_nfod",
+    "get_cc_diagnostic",
+    "get_mcscf_correlation",
+    "get_absorption_data",
+    "get_active_space",
+    "get_occupation_numbers",
+    "get_trajectory",
+    "get_molecule",
+    "get_orbital_energies",
+    "get_charges",
+    "get_mayer_bond_orders",
+    "get_dipole_moment",
+]
+
+
+# ----- Synthetic data
+def synthesize_output(template, size_mb, filename):
+    """
+    Write an output of about size_mb MB, repeating the part of template between its first geometry and its last energy.
+    """
+    with open(template, "rb") as fh:
+        text = fh.read()
+    start = text.index(b"CARTESIAN COORDINATES (ANGSTROEM)")
+    start = text.rindex(b"\n", 0, start - 40) + 1
+    stop = text.index(b"\n", text.rindex(b"FINAL SINGLE POINT ENERGY")) + 1
+    head, body, tail = text[:start], text[start:stop], text[stop:]
+    copies = max(1, int(size_mb * 1024**2 - len(head) - len(tail)) // len(body))
+    with open(filename, "wb") as out:
+        out.write(head)
+        for _ in range(copies):
+            out.write(body)
+        out.write(tail)
+    return filename
+
+
+def synthesize_xyz(natoms, seed=0, shift=0.0):
+    rng = np.random.default_rng(seed)
+    elements = rng.choice(["C", "H", "N", "O"], natoms)
+    coordinates = rng.uniform(-20, 20, (natoms, 3)) + shift
+    return "".join(
+        f"{element} {x:.6f} {y:.6f} {z:.6f}\n" for element, (x, y, z) in zip(elements, coordinates)
+    )
+
+
+# ----- Measurement
+def measure(function, repeat=3):
+    """
+    Return the best wall time of repeat calls and the peak Python memory (MB) of one traced call.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1] / 1024**2
+    tracemalloc.stop()
+    return min(times), peak
+
+
+def record(results, name, size, seconds, peak, amount, unit):
+    results.append(
+        {
+            "name": name,
+            "size": size,
+            "seconds": seconds,
+            "throughput": amount / seconds if seconds > 0 else None,
+            "unit": unit,
+            "peak_memory_mb": peak,
+        }
+    )
+    print(f"{name:40s} {size:>12} {seconds:10.4f} s {amount / seconds if seconds > 0 else 0:14.1f} {unit:9s} {peak:9.1f} MB")
+
+
+def _available_getters(filename):
+    """
+    Return the getters which find their section in filename. The others would only time the "section missing" path.
+    """
+    # Built like the timed objects, since some getters read the attributes gathered at __init__ (i.e. optimization)
+    out = ORCAOUT(filename)
+    available = []
+    for getter in GETTERS:
+        try:
+            getattr(out, getter)()
+        except BaseException:
+            print(f"{'ORCAOUT.' + getter:40s} skipped, no such section in {os.path.basename(filename)}")
+            continue
+        available.append(getter)
+    return available
+
+
+def bench_outputs(results, sizes, workdir, repeat):
+    for template in ("a.out", "b.out"):
+        for size in sizes:
+            filename = os.path.join(workdir, f"{template[0]}_{size}MB.out")
+            if not os.path.isfile(filename):
+                synthesize_output(os.path.join(EXAMPLES, template), size, filename)
+            megabytes = os.path.getsize(filename) / 1024**2
+            label = f"{template}:{size}MB"
+
+            seconds, peak = measure(lambda: check_normal_termination(filename), repeat)
+            record(results, "check_normal_termination", label, seconds, peak, megabytes, "MB/s")
+            seconds, peak = measure(lambda: ORCAOUT(filename), repeat)
+            record(results, "ORCAOUT", label, seconds, peak, megabytes, "MB/s")
+
+            for getter in _available_getters(filename):
+                def call():
+                    # A new object per call, so the getter cache is not measured
+                    out = ORCAOUT(filename)
+                    out._get_index()
+                    start = time.perf_counter()
+                    getattr(out, getter)()
+                    return time.perf_counter() - start
+
+                times = [call() for _ in range(repeat)]
+                tracemalloc.start()
+                call()
+                peak = tracemalloc.get_traced_memory()[1] / 1024**2
+                tracemalloc.stop()
+                record(results, f"ORCAOUT.{getter}", label, min(times), peak, megabytes, "MB/s")
+
+
+def bench_coordinates(results, repeat):
+    for natoms in (1000, 10000, 100000):
+        xyzstr = synthesize_xyz(natoms)
+        seconds, peak = measure(lambda: get_coordinates_from_xyz(xyzstr), repeat)
+        record(results, "get_coordinates_from_xyz", natoms, seconds, peak, natoms, "atoms/s")
+
+
+def bench_interpolation(results, repeat):
+    for natoms, npoints in ((100, 20), (1000, 20), (10000, 10)):
+        xyz_a = synthesize_xyz(natoms, seed=1)
+        xyz_b = synthesize_xyz(natoms, seed=1, shift=0.5)
+        seconds, peak = measure(lambda: interpolate(xyz_a, xyz_b, npoints), repeat)
+        record(results, "interpolate", f"{natoms}x{npoints}", seconds, peak, natoms * npoints, "atoms/s")
+        seconds, peak = measure(lambda: interpolate_array(xyz_a, xyz_b, npoints), repeat)
+        record(results, "interpolate_array", f"{natoms}x{npoints}", seconds, peak, natoms * npoints, "atoms/s")
+
+
+def bench_inputs(results, workdir, repeat):
+    xyzstr = synthesize_xyz(50)
+    for ninputs in (100, 1000):
+        directory = os.path.join(workdir, f"inputs_{ninputs}")
+        os.makedirs(directory, exist_ok=True)
+
+        def write_one_by_one():
+            inp = ORCAINP(os.path.join(directory, "x.inp"), xyzstr, "! B3LYP def2-SVP")
+            for i in range(ninputs):
+                inp.update_xyz(xyzstr)
+                inp.update_name(os.path.join(directory, f"single_{i}.inp"))
+                inp.write_input()
+
+        seconds, peak = measure(write_one_by_one, repeat)
+        record(results, "ORCAINP.write_input", ninputs, seconds, peak, ninputs, "inputs/s")
+
+        geometries = {f"g{i}": xyzstr for i in range(ninputs // 4)}
+        seconds, peak = measure(
+            lambda: write_inputs(geometries, ["B3LYP", "PBE0"], ["SVP", "TZVP"], directory=directory),
+            repeat,
+        )
+        record(results, "write_inputs", ninputs, seconds, peak, ninputs, "inputs/s")
+
+
+# ----- Reporting
+def metadata():
+    try:
+        commit = sub.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        # Peak resident memory of the whole benchmark run (kB on Linux)
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def compare(results, baseline_file, threshold):
+    """
+    Print the speedup of each benchmark against a baseline results file, flagging regressions above threshold.
+
+    :return: The number of regressions.
+    """
+    with open(baseline_file) as fh:
+        baseline = {(r["name"], str(r["size"])): r for r in json.load(fh)["results"]}
+    regressions = 0
+    print(f"\n{'benchmark':40s} {'size':>12} {'old (s)':>10} {'new (s)':>10} {'speedup':>8}")
+    for result in results:
+        old = baseline.get((result["name"], str(result["size"])))
+        if not old:
+            continue
+        speedup = old["seconds"] / result["seconds"] if result["seconds"] else float("inf")
+        flag = ""
+        if speedup < 1 / (1 + threshold):
+            flag = "  REGRESSION"
+            regressions += 1
+        print(
+            f"{result['name']:40s} {result['size']:>12} {old['seconds']:10.4f} {result['seconds']:10.4f} {speedup:7.2f}x{flag}"
+        )
+    return regressions
+
+
+def run_benchmarks(groups, sizes, workdir, repeat):
+    """
+    Run the benchmark groups, writing their synthetic files into workdir, and return the list of results.
+    """
+    results = []
+    print(f"{'benchmark':40s} {'size':>12} {'time':>12} {'throughput':>24} {'peak memory':>12}")
+    if "outputs" in groups:
+        bench_outputs(results, sizes, workdir, repeat)
+    if "coordinates" in groups:
+        bench_coordinates(results, repeat)
+    if "interpolation" in groups:
+        bench_interpolation(results, repeat)
+    if "inputs" in groups:
+        bench_inputs(results, workdir, repeat)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of the orcatools hot paths.")
+    parser.add_argument("--sizes", default="1,10,100", help="Comma separated synthetic output sizes in MB (i.e. 1,10,100,1000).")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed calls per benchmark. The best one is reported.")
+    parser.add_argument("--only", default="outputs,coordinates,interpolation,inputs", help="Comma separated benchmark groups to run.")
+    parser.add_argument("--workdir", default=None, help="Directory for the synthetic files, kept between runs. Default: a temporary directory, removed afterwards.")
+    parser.add_argument("--output", required=True, help="JSON file where the results are written.")
+    parser.add_argument("--compare", default=None, help="JSON results of a previous run to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Slowdown fraction reported as a regression.")
+    args = parser.parse_args(argv)
+
+    sizes = [float(size) if "." in size else int(size) for size in args.sizes.split(",")]
+    groups = args.only.split(",")
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+        results = run_benchmarks(groups, sizes, args.workdir, args.repeat)
+    else:
+        with tempfile.TemporaryDirectory(prefix="orcatools-bench-") as workdir:
+            results = run_benchmarks(groups, sizes, workdir, args.repeat)
+
+    with open(args.output, "w") as out:
+        json.dump({"metadata": metadata(), "results": results}, out, indent=1)
+    print(f"\nResults written to {os.path.abspath(args.output)}")
+
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from orcatools.out import check_normal_termination
+
+# Default location of the persistent parse cache
+DEFAULT_CACHE_FILE = os.path.join(
+    os.path.expanduser("~"), ".cache", "orcatools", "outputs.sqlite"
+)
+DEFAULT_RUN_CACHE_FILE = os.path.join(
+    os.path.expanduser("~"), ".cache", "orcatools", "runs.sqlite"
+)
+# Bytes read from the start and the end of a file to build its content hash
+_DIGEST_BLOCK = 1 << 20
+
+
+def _file_digest(filename, size):
+    """
+    Hash the size, the first and the last MB of a file. Cheap even for huge outputs, since ORCA headers and footers change between runs.
+    """
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(filename, "rb") as fh:
+        digest.update(fh.read(_DIGEST_BLOCK))
+        if size > 2 * _DIGEST_BLOCK:
+            fh.seek(size - _DIGEST_BLOCK)
+        digest.update(fh.read(_DIGEST_BLOCK))
+    return digest.hexdigest()
+
+
+class OutputCache:
+    """
+    Persistent on-disk cache (SQLite) for parsed ORCA output results. Use it by passing it to ORCAOUT(..., cache=OutputCache()).
+
+    Entries are keyed on the absolute path of the output, and are valid while the file size, modification time and content hash
+    stay the same. If only the modification time changed, the content hash is checked and the entry is kept when it still matches.
+
+    :param cache_file=DEFAULT_CACHE_FILE:
+        A string with the name of the SQLite file holding the cache.
+    :param max_size=None:
+        Maximum size of the stored results in bytes. The least recently used outputs are evicted above it.
+    :param max_age=None:
+        Maximum time in seconds since an output was last used. Older outputs are evicted.
+
+    The limits are enforced when the cache is opened and while results are stored: max_size as soon as the results stored
+    through this object may exceed it, and max_age at most once a minute (or once every max_age, if shorter).
+    """
+
+    def __init__(self, cache_file=DEFAULT_CACHE_FILE, max_size=None, max_age=None):
+        self.cache_file = cache_file
+        self.max_size = max_size
+        self.max_age = max_age
+        # Size of the stored results and time of the last eviction, to evict from set only when needed
+        self._stored_size = 0
+        self._evicted = 0.0
+        if os.path.dirname(cache_file):
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        self._connection = sqlite3.connect(cache_file, timeout=60)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime REAL, digest TEXT, accessed REAL)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (path TEXT, key TEXT, value BLOB, PRIMARY KEY (path, key))"
+            )
+        self.evict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Close the connection to the cache file.
+        """
+        self._connection.close()
+
+    def _validate(self, path):
+        """
+        Check the cached entry of path against the file on disk, dropping its results if the file changed.
+
+        :return: True if the cached results of path can be used.
+        """
+        stat = os.stat(path)
+        row = self._connection.execute(
+            "SELECT size, mtime, digest FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime:
+            valid = True
+        else:
+            digest = _file_digest(path, stat.st_size)
+            valid = bool(row) and row[0] == stat.st_size and row[2] == digest
+            with self._connection:
+                if not valid:
+                    self._connection.execute("DELETE FROM results WHERE path = ?", (path,))
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                    (path, stat.st_size, stat.st_mtime, digest, time.time()),
+                )
+        return valid
+
+    def get(self, orcaout_name, key):
+        """
+        Look up a result of an output file.
+
+        :param orcaout_name:
+            A string with the name of the output file.
+        :param key:
+            A string identifying the result.
+        :return hit, value:
+            A boolean telling if the result was found and the result itself (None if not found).
+        """
+        path = os.path.abspath(orcaout_name)
+        if not self._validate(path):
+            return False, None
+        row = self._connection.execute(
+            "SELECT value FROM results WHERE path = ? AND key = ?", (path, key)
+        ).fetchone()
+        if not row:
+            return False, None
+        with self._connection:
+            self._connection.execute(
+                "UPDATE files SET accessed = ? WHERE path = ?", (time.time(), path)
+            )
+        return True, pickle.loads(row[0])
+
+    def set(self, orcaout_name, key, value):
+        """
+        Store a result of an output file.
+
+        :param orcaout_name:
+            A string with the name of the output file.
+        :param key:
+            A string identifying the result.
+        :param value:
+            The result, which must be picklable.
+        """
+        path = os.path.abspath(orcaout_name)
+        self._validate(path)
+        value = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)", (path, key, value))
+            self._connection.execute("UPDATE files SET accessed = ? WHERE path = ?", (time.time(), path))
+        self._stored_size += len(value)
+        if (self.max_size is not None and self._stored_size > self.max_size) or (
+            self.max_age is not None and time.time() - self._evicted >= min(self.max_age, 60)
+        ):
+            self.evict()
+
+    def invalidate(self, orcaout_name=None):
+        """
+        Drop the cached results of an output file, or of every file if orcaout_name is None.
+        """
+        with self._connection:
+            if orcaout_name is None:
+                self._connection.execute("DELETE FROM results")
+                self._connection.execute("DELETE FROM files")
+            else:
+                path = os.path.abspath(orcaout_name)
+                self._connection.execute("DELETE FROM results WHERE path = ?", (path,))
+                self._connection.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def evict(self):
+        """
+        Evict outputs older than max_age, then the least recently used outputs until the results fit in max_size.
+        """
+        with self._connection:
+            if self.max_age is not None:
+                self._connection.execute(
+                    "DELETE FROM files WHERE accessed < ?", (time.time() - self.max_age,)
+                )
+            if self.max_size is not None:
+                sizes = self._connection.execute(
+                    "SELECT files.path, COALESCE(SUM(LENGTH(results.value)), 0) FROM files "
+                    "LEFT JOIN results ON files.path = results.path "
+                    "GROUP BY files.path ORDER BY files.accessed"
+                ).fetchall()
+                total = sum(size for _, size in sizes)
+                for path, size in sizes:
+                    if total <= self.max_size:
+                        break
+                    self._connection.execute("DELETE FROM files WHERE path = ?", (path,))
+                    total -= size
+                self._stored_size = total
+            self._connection.execute(
+                "DELETE FROM results WHERE path NOT IN (SELECT path FROM files)"
+            )
+        self._evicted = time.time()
+
+
+class RunCache:
+    """
+    Persistent on-disk record (SQLite) of finished ORCA calculations, keyed on the canonical hash of their input
+    (see ORCAINP.canonical_hash). Pass it as memo to orcatools.orcarun.run, ORCAINP.run or a Scheduler, and a calculation
+    identical to one already run reuses its output and run files instead of running ORCA again.
+
+    Only the locations of the results are recorded, so entries whose output was removed or did not terminate normally are
+    dropped when looked up. The cache can be shared by the threads of a Scheduler.
+
+    :param cache_file=DEFAULT_RUN_CACHE_FILE:
+        A string with the name of the SQLite file holding the cache.
+    :param tolerance=1e-4:
+        Tolerance of the coordinates in Angstroem when comparing calculations.
+    """
+
+    def __init__(self, cache_file=DEFAULT_RUN_CACHE_FILE, tolerance=1e-4):
+        self.cache_file = cache_file
+        self.tolerance = tolerance
+        if os.path.dirname(cache_file):
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(cache_file, timeout=60, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS runs (key TEXT PRIMARY KEY, output TEXT, runfiles TEXT, created REAL)"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def close(self):
+        """
+        Close the connection to the cache file.
+        """
+        self._connection.close()
+
+    def get(self, key):
+        """
+        Look up a finished calculation.
+
+        :param key:
+            A string with the canonical hash of the input.
+        :return:
+            A tuple (output, runfiles) with the full paths of the results, or None if there is no valid entry.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT output, runfiles FROM runs WHERE key = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+        output, runfiles = row
+        if os.path.isfile(output) and check_normal_termination(output)[0]:
+            return output, runfiles
+        self.invalidate(key)
+        return None
+
+    def set(self, key, output, runfiles=None):
+        """
+        Record a finished calculation.
+
+        :param key:
+            A string with the canonical hash of the input.
+        :param output:
+            A string with the name of the output file.
+        :param runfiles=None:
+            The directory (or archive) with the files produced by ORCA.
+        """
+        runfiles = os.path.abspath(runfiles) if runfiles else None
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?)",
+                (key, os.path.abspath(output), runfiles, time.time()),
+            )
+
+    def invalidate(self, key=None):
+        """
+        Drop the entry of a calculation, or every entry if key is None.
+        """
+        with self._lock, self._connection:
+            if key is None:
+                self._connection.execute("DELETE FROM runs")
+            else:
+                self._connection.execute("DELETE FROM runs WHERE key = ?", (key,))
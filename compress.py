@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+import gzip
+import io
+import lzma
+import os
+import shutil
+import zipfile
+
+# Compression formats recognized from the first bytes of a file
+_MAGIC = {
+    b"\x1f\x8b": "gzip",
+    b"\xfd7zXZ\x00": "xz",
+    b"\x28\xb5\x2f\xfd": "zstd",
+}
+EXTENSIONS = {"gzip": ".gz", "xz": ".xz", "zstd": ".zst"}
+# Bytes decompressed at once when skipping forward in a zstd stream
+_SKIP_CHUNK = 1 << 20
+
+
+def detect_compression(filename):
+    """
+    Detect the compression of a file from its magic bytes.
+
+    :param filename:
+        A string with the file name.
+    :return:
+        "gzip", "xz", "zstd" or None for uncompressed files.
+    """
+    with open(filename, "rb") as fh:
+        head = fh.read(6)
+    for magic, method in _MAGIC.items():
+        if head.startswith(magic):
+            return method
+    return None
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "zstandard package is not installed. Please install it with 'pip install zstandard'."
+        )
+    return zstandard
+
+
+class _ZstdReader(io.RawIOBase):
+    """
+    Seekable reader of a zstd compressed file. Seeking forward decompresses up to the new position and seeking backward
+    starts over from the beginning of the file, as gzip and lzma files do.
+    """
+
+    def __init__(self, filename):
+        self._zstandard = _import_zstandard()
+        self._filename = filename
+        self._open()
+
+    def _open(self):
+        self._file = open(self._filename, "rb")
+        self._stream = self._zstandard.ZstdDecompressor().stream_reader(
+            self._file, read_across_frames=True
+        )
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = self._stream.readinto(buffer)
+        self._position += size
+        return size
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            while self.read(_SKIP_CHUNK):
+                pass
+            offset += self._position
+        if offset < self._position:
+            self._stream.close()
+            self._file.close()
+            self._open()
+        while self._position < offset:
+            if not self.read(min(_SKIP_CHUNK, offset - self._position)):
+                break
+        return self._position
+
+    def close(self):
+        if not self.closed:
+            self._stream.close()
+            self._file.close()
+        super().close()
+
+
+def open_file(filename, mode="rb"):
+    """
+    Open a file for reading, decompressing it on the fly if it is gzip, xz or zstd compressed (detected by its magic bytes).
+    Compressed files are streamed, never decompressed to memory or disk as a whole.
+
+    :param filename:
+        A string with the file name.
+    :param mode="rb":
+        "rb" for a binary file object or "r" for a text one.
+    :return:
+        A file object supporting read, readline, iteration and seek.
+    """
+    if mode not in ("rb", "r"):
+        raise ValueError('Files can only be opened with mode "rb" or "r".')
+    method = detect_compression(filename)
+    if method is None:
+        return open(filename, mode)
+    if method == "gzip":
+        handle = gzip.open(filename, "rb")
+    elif method == "xz":
+        handle = lzma.open(filename, "rb")
+    else:
+        handle = io.BufferedReader(_ZstdReader(filename))
+    if mode == "r":
+        return io.TextIOWrapper(handle)
+    return handle
+
+
+def compress_file(filename, method="gzip", remove=True, level=None):
+    """
+    Compress a file to <filename>.gz, .xz or .zst, streaming it in chunks.
+
+    :param filename:
+        A string with the file name.
+    :param method="gzip":
+        Compression method. Options are "gzip", "xz" and "zstd" (requires zstandard).
+    :param remove=True:
+        Remove the uncompressed file afterwards.
+    :param level=None:
+        Compression level. Default: the library default.
+    :return:
+        The name of the compressed file.
+    """
+    if method not in EXTENSIONS:
+        raise ValueError('The compression method must be "gzip", "xz" or "zstd".')
+    if detect_compression(filename):
+        return filename
+    compressed = filename + EXTENSIONS[method]
+    temporary = compressed + ".part"
+    with open(filename, "rb") as source:
+        if method == "gzip":
+            target = gzip.open(temporary, "wb", compresslevel=9 if level is None else level)
+        elif method == "xz":
+            target = lzma.open(temporary, "wb", preset=level)
+        else:
+            zstandard = _import_zstandard()
+            target = zstandard.ZstdCompressor(level=3 if level is None else level).stream_writer(
+                open(temporary, "wb"), closefd=True
+            )
+        with target:
+            shutil.copyfileobj(source, target, 1 << 20)
+    os.replace(temporary, compressed)
+    if remove:
+        os.remove(filename)
+    return compressed
+
+
+# ----- Indexed archives of run files
+def pack_directory(directory, archive=None, remove=True):
+    """
+    Pack a directory, such as <input>-runfiles, into one zip archive. Each file is compressed on its own and the archive
+    holds an index of its members, so single files can be extracted without unpacking the rest.
+
+    :param directory:
+        A string with the directory name.
+    :param archive=None:
+        Name of the archive. Default: <directory>.zip.
+    :param remove=True:
+        Remove the directory afterwards.
+    :return:
+        The name of the archive.
+    """
+    archive = archive or directory.rstrip(os.sep) + ".zip"
+    temporary = archive + ".part"
+    with zipfile.ZipFile(temporary, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                zf.write(path, os.path.relpath(path, directory))
+    os.replace(temporary, archive)
+    if remove:
+        shutil.rmtree(directory)
+    return archive
+
+
+def list_archive(archive):
+    """
+    Return a dictionary with the members of a run files archive and their uncompressed sizes in bytes.
+    """
+    with zipfile.ZipFile(archive) as zf:
+        return {info.filename: info.file_size for info in zf.infolist()}
+
+
+def extract_file(archive, member, destination="."):
+    """
+    Extract a single file, such as the .gbw, from a run files archive.
+
+    :param archive:
+        A string with the archive name.
+    :param member:
+        Name of the file inside the archive.
+    :param destination=".":
+        Directory where the file is written.
+    :return:
+        The full path of the extracted file.
+    """
+    with zipfile.ZipFile(archive) as zf:
+        if member not in zf.NameToInfo:
+            raise BaseException(f"{member} is not in the archive {archive}!")
+        return os.path.abspath(zf.extract(member, destination))
+
+
+def compact_run(output, runfiles=None, method="gzip", remove=True):
+    """
+    Compact a finished calculation: compress its output file and pack its run files directory into an indexed archive.
+
+    :param output:
+        A string with the output file name.
+    :param runfiles=None:
+        The run files directory. Default: <output basename>-runfiles, if it exists.
+    :param method="gzip":
+        Compression method of the output. Options are "gzip", "xz" and "zstd".
+    :param remove=True:
+        Remove the uncompressed output and the run files directory.
+    :return output, archive:
+        The names of the compressed output and of the archive (None if there were no run files).
+    """
+    if runfiles is None:
+        runfiles = os.path.splitext(output)[0] + "-runfiles"
+    archive = None
+    if os.path.isdir(runfiles):
+        archive = pack_directory(runfiles, remove=remove)
+    if os.path.isfile(output):
+        output = compress_file(output, method, remove=remove)
+    return output, archive
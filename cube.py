@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+import os
+
+import numpy as np
+
+BOHR_TO_ANGSTROEM = 0.529177210903
+
+
+class Cube:
+    """
+    Class which holds the header and the volumetric grid of a Gaussian .cube file, such as the ones written by orca_plot.
+
+    All lengths are in Bohr.
+
+    :attribute comments:
+        A list with the two comment lines of the file.
+    :attribute origin:
+        An array of shape (3,) with the origin of the grid.
+    :attribute axes:
+        An array of shape (3, 3) with the step vector of each grid axis.
+    :attribute numbers:
+        An array with the atomic number of each atom.
+    :attribute charges:
+        An array with the nuclear charge of each atom.
+    :attribute positions:
+        An array of shape (natoms, 3) with the atom positions.
+    :attribute data:
+        An array of shape (nx, ny, nz) with the grid values, or (nx, ny, nz, nsets) for files with several data sets.
+    :attribute set_ids:
+        A list with the data set identifiers (i.e. orbital numbers), or None.
+    """
+
+    def __init__(self, comments, origin, axes, numbers, charges, positions, data, set_ids=None):
+        self.comments = comments
+        self.origin = np.asarray(origin, dtype=float)
+        self.axes = np.asarray(axes, dtype=float)
+        self.numbers = np.asarray(numbers, dtype=int)
+        self.charges = np.asarray(charges, dtype=float)
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        self.data = data
+        self.set_ids = set_ids
+
+    @property
+    def shape(self):
+        """
+        Number of points of each grid axis.
+        """
+        return self.data.shape[:3]
+
+    @property
+    def voxel_volume(self):
+        """
+        Volume of a single grid cell in Bohr^3.
+        """
+        return abs(np.linalg.det(self.axes))
+
+    def _same_grid(self, other):
+        return (
+            self.data.shape == other.data.shape
+            and np.allclose(self.origin, other.origin)
+            and np.allclose(self.axes, other.axes)
+        )
+
+    def _with_data(self, data, origin=None, axes=None):
+        return Cube(
+            list(self.comments),
+            self.origin if origin is None else origin,
+            self.axes if axes is None else axes,
+            self.numbers,
+            self.charges,
+            self.positions,
+            data,
+            self.set_ids,
+        )
+
+    def __sub__(self, other):
+        """
+        Difference of two cubes on the same grid, i.e. a difference density.
+        """
+        if not self._same_grid(other):
+            raise ValueError("The cubes must share the same grid.")
+        return self._with_data(np.subtract(self.data, other.data))
+
+    def __add__(self, other):
+        if not self._same_grid(other):
+            raise ValueError("The cubes must share the same grid.")
+        return self._with_data(np.add(self.data, other.data))
+
+    def __mul__(self, factor):
+        return self._with_data(np.multiply(self.data, factor))
+
+    __rmul__ = __mul__
+
+    def integrate(self, power=1):
+        """
+        Integrate the grid values raised to power over the volume (i.e. power=2 for the norm of an orbital).
+
+        :param power=1:
+            Power applied to the grid values before integrating.
+        :return:
+            The integral, or an array with one integral per data set.
+        """
+        values = self.data if power == 1 else np.abs(self.data) ** power
+        return np.sum(values, axis=(0, 1, 2)) * self.voxel_volume
+
+    def isovalue(self, fraction=0.85, power=2):
+        """
+        Estimate the isovalue whose isosurface encloses a fraction of the integrated |value|^power, i.e. 85% of the orbital density.
+
+        :param fraction=0.85:
+            Fraction of the integral enclosed by the isosurface.
+        :param power=2:
+            Power applied to the grid values. Use 2 for orbitals and 1 for densities.
+        :return:
+            The (positive) isovalue.
+        """
+        if self.data.ndim != 3:
+            raise ValueError("The isovalue is estimated for a single data set.")
+        magnitudes = np.sort(np.abs(np.ravel(self.data)))[::-1]
+        cumulative = np.cumsum(magnitudes**power)
+        position = np.searchsorted(cumulative, fraction * cumulative[-1])
+        return float(magnitudes[min(position, len(magnitudes) - 1)])
+
+    def downsample(self, factor=2):
+        """
+        Return a coarser cube, averaging blocks of factor points along each axis. Useful before visualization.
+
+        :param factor=2:
+            Number of points along each axis merged into one.
+        """
+        nx, ny, nz = (n // factor for n in self.shape)
+        data = np.asarray(self.data)[: nx * factor, : ny * factor, : nz * factor]
+        data = data.reshape(nx, factor, ny, factor, nz, factor, *data.shape[3:])
+        data = data.mean(axis=(1, 3, 5))
+        # The new points sit at the center of each block of old points
+        origin = self.origin + (factor - 1) / 2 * self.axes.sum(axis=0)
+        return self._with_data(data, origin=origin, axes=self.axes * factor)
+
+    def to_string(self):
+        """
+        Return the cube in .cube text format.
+        """
+        natoms = len(self.numbers)
+        lines = list(self.comments)
+        lines.append(
+            f"{-natoms if self.set_ids else natoms:5d}"
+            + "".join(f"{x:12.6f}" for x in self.origin)
+        )
+        for n, axis in zip(self.shape, self.axes):
+            lines.append(f"{n:5d}" + "".join(f"{x:12.6f}" for x in axis))
+        for number, charge, position in zip(self.numbers, self.charges, self.positions):
+            lines.append(
+                f"{number:5d}{charge:12.6f}" + "".join(f"{x:12.6f}" for x in position)
+            )
+        if self.set_ids:
+            lines.append(" ".join(str(i) for i in [len(self.set_ids)] + list(self.set_ids)))
+        header = "\n".join(lines) + "\n"
+
+        # Points are written along z in lines of at most 6 values
+        values = np.asarray(self.data).reshape(self.shape[0] * self.shape[1], -1)
+        full, rest = divmod(values.shape[1], 6)
+        full_format = "\n".join([" ".join(["%13.5E"] * 6)] * full)
+        rest_format = " ".join(["%13.5E"] * rest)
+        row_format = "\n".join(f for f in (full_format, rest_format) if f)
+        body = "\n".join(row_format % tuple(row) for row in values)
+        return header + body + "\n"
+
+    def write(self, cube_file):
+        """
+        Write the cube to a .cube file.
+        """
+        with open(cube_file, "w") as out:
+            out.write(self.to_string())
+
+
+def read_cube(cube_file, cache=True, mmap=True):
+    """
+    Read a .cube file into a Cube object. The grid is parsed once and cached in a .npy file next to the cube,
+    which is loaded (memory-mapped) instead of the text on the next reads.
+
+    :param cube_file:
+        A string with the .cube file name.
+    :param cache=True:
+        Save and reuse the grid in a <cube_file>.npy file. The cache is ignored if older than the .cube file.
+    :param mmap=True:
+        Memory-map the cached grid instead of loading it into memory.
+    :return:
+        A Cube object.
+    """
+    if not os.path.isfile(cube_file):
+        raise BaseException("The .cube file does not exist!")
+
+    with open(cube_file, "r") as fh:
+        comments = [fh.readline().rstrip("\n"), fh.readline().rstrip("\n")]
+        content = fh.readline().split()
+        natoms = int(content[0])
+        origin = [float(x) for x in content[1:4]]
+        shape = []
+        axes = []
+        for _ in range(3):
+            content = fh.readline().split()
+            shape.append(int(content[0]))
+            axes.append([float(x) for x in content[1:4]])
+        numbers = []
+        charges = []
+        positions = []
+        for _ in range(abs(natoms)):
+            content = fh.readline().split()
+            numbers.append(int(content[0]))
+            charges.append(float(content[1]))
+            positions.append([float(x) for x in content[2:5]])
+        # A negative number of atoms means the data set identifiers follow the atoms
+        set_ids = None
+        if natoms < 0:
+            content = fh.readline().split()
+            set_ids = [int(x) for x in content[1 : int(content[0]) + 1]]
+
+        # A negative number of points means the axis is given in Angstroem
+        axes = np.array(axes)
+        for i, n in enumerate(shape):
+            if n < 0:
+                shape[i] = -n
+                axes[i] /= BOHR_TO_ANGSTROEM
+        if set_ids and len(set_ids) > 1:
+            shape.append(len(set_ids))
+
+        npy_file = cube_file + ".npy"
+        if (
+            cache
+            and os.path.isfile(npy_file)
+            and os.path.getmtime(npy_file) >= os.path.getmtime(cube_file)
+        ):
+            data = np.load(npy_file, mmap_mode="r" if mmap else None)
+        else:
+            data = np.fromstring(fh.read(), sep=" ")
+            if data.size != np.prod(shape):
+                raise BaseException(
+                    f"The .cube file has {data.size} values, but its header defines {np.prod(shape)} points!"
+                )
+            data = data.reshape(shape)
+            if cache:
+                np.save(npy_file, data)
+                if mmap:
+                    data = np.load(npy_file, mmap_mode="r")
+
+    return Cube(comments, origin, axes, numbers, charges, positions, data, set_ids)
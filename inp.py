@@ -1,7 +1,21 @@
 #!/usr/bin/env python3
+import glob
+import hashlib
+import io
+import itertools
+import json
 import os
+import re
 import subprocess as sub
-from orcatools.tools import get_coordinates_from_xyz
+import tarfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from orcatools import orcarun as orcarun_module
+from orcatools.compress import open_file
+from orcatools.cube import BOHR_TO_ANGSTROEM
+from orcatools.molecule import Molecule
 
 
 # ----- General Functions
@@ -12,11 +26,55 @@ def _get_input_block(block):
     return block
 
 
-def _coordinates_to_xyzstr(coordinates):
-    xyzstr = ""
-    for line in coordinates:
-        xyzstr += f"{line[0]:<6s} {line[1]:10.5f} {line[2]:10.5f} {line[3]:10.5f}\n"
-    return xyzstr
+def _render_blocks(osi_block, obl_block=None, guess_file=None, nprocs=None, maxcore=None):
+    """
+    Render the input text which goes before the coordinates, except for the * xyz line.
+    """
+    input_blocks = ""
+    if nprocs:
+        input_blocks += f"%pal nprocs {nprocs} end\n"
+    if maxcore:
+        input_blocks += f"%maxcore {maxcore}\n"
+
+    input_blocks += f"{osi_block}\n"
+    if obl_block:
+        input_blocks += f"{obl_block}\n"
+    if guess_file:
+        input_blocks += f'!MORead\n%moinp "{guess_file}"\n'
+    input_blocks += "\n"
+    return input_blocks
+
+
+# ----- Canonical form of a calculation, used to recognize repeated ones
+# Settings which change how ORCA runs but not the result of the calculation
+_RUN_KEYWORDS = re.compile(r"^(pal\d+|moread|autostart|noautostart)$", re.IGNORECASE)
+_RUN_BLOCKS = re.compile(
+    r"^[ \t]*%(?:pal\b.*?\bend\b|maxcore\b|moinp\b)[^\n]*\n?",
+    re.IGNORECASE | re.MULTILINE | re.DOTALL,
+)
+_QUOTED = re.compile(r'("[^"]*")')
+
+
+def _normalize_keywords(osi_block):
+    """
+    Return the sorted, lower case and unique simple input keywords, leaving out the ones which only affect how ORCA runs.
+    """
+    keywords = (osi_block or "").replace("!", " ").lower().split()
+    return sorted({keyword for keyword in keywords if not _RUN_KEYWORDS.match(keyword)})
+
+
+def _normalize_blocks(obl_block):
+    """
+    Return the % blocks in lower case with collapsed whitespace and no comments or run settings. Quoted strings,
+    i.e. file names, are kept as they are.
+    """
+    text = _RUN_BLOCKS.sub("", (obl_block or "") + "\n")
+    text = re.sub(r"#[^\n]*", "", text)
+    parts = _QUOTED.split(text)
+    tokens = []
+    for i, part in enumerate(parts):
+        tokens += [part] if i % 2 else part.lower().split()
+    return " ".join(tokens)
 
 
 # ----- Define the INPUT class
@@ -27,7 +85,7 @@ class ORCAINP:
     Class which holds information for a ORCA input object.
 
     :param xyz_block:
-        A string block, a .xyz formatted file with xyz coordinates, or a ORCAOUT xyz_coords list.
+        A string block, a .xyz formatted file with xyz coordinates, a ORCAOUT xyz_coords list or a Molecule.
     :param osi_block:
         A string block or file with ORCA simple input keywords. i.e. ! B3LYP def2-TZVP.
     :param obl_block:
@@ -40,6 +98,17 @@ class ORCAINP:
         Input molecule multiplicity.
     :param guess_file=None:
         A string with the name of a file used for starting orbitals. Such as .gbw, .uno, etc.
+    :param nprocs=None:
+        Number of cores the calculation requires.
+    :param maxcore=None:
+        Memory per core in MB the calculation requires.
+
+    :attribute molecule:
+        The Molecule with the input coordinates.
+    :attribute coordinates:
+        The coordinates as a list of [symbol, x, y, z] rows editing the molecule in place (see Molecule.list_view).
+    :attribute xyzstr:
+        The coordinates as a XYZ string block.
     """
 
     def __init__(
@@ -51,10 +120,10 @@ class ORCAINP:
         charge=0,
         mult=1,
         guess_file=None,
+        nprocs=None,
+        maxcore=None,
         # For the future
         # verbose=False
-        # nprocs=None,
-        # maxcore=None
     ):
         # Basename for input file
         self.basename = orcainp_name.replace(".inp", "")
@@ -67,35 +136,47 @@ class ORCAINP:
         self.charge = charge
         self.mult = mult
         self.guess_file = guess_file
-        # Get coordinates from .xyz file
-        if isinstance(xyz_block, list):
-            self.coordinates = xyz_block
-            self.xyzstr = _coordinates_to_xyzstr(xyz_block)
-        else:
-            self.coordinates, self.xyzstr = get_coordinates_from_xyz(xyz_block)
+        # Coordinates are kept as arrays and only formatted when written
+        self.molecule = Molecule.from_xyz(xyz_block).copy()
 
-        # For the future
-        # self.nprocs = nprocs
-        # self.maxcore = maxcore
+        # Resources required by the calculation
+        self.nprocs = nprocs
+        self.maxcore = maxcore
 
-    def write_input(self):
+    @classmethod
+    def from_file(cls, orcainp_name):
         """
-        Write a ORCA input file from ORCAINP object.
+        Build an ORCAINP object from an existing ORCA input file.
+
+        :param orcainp_name:
+            A string with the name of the ORCA input file.
         """
-        input_blocks = ""
+        return read_input(orcainp_name).to_orcainp()
 
-        # For future orca_run in Python
-        # if self.nprocs:
-        #     input_blocks += f"%pal {self.nprocs}\n"
-        # if self.maxcore:
-        #     input_blocks += f"%maxcore {self.maxcore}\n"
+    @property
+    def coordinates(self):
+        # Editing the rows in place edits the molecule arrays, as when coordinates was a plain list
+        return self.molecule.list_view()
 
-        input_blocks += f"{self.osi_block}\n"
-        if self.obl_block:
-            input_blocks += f"{self.obl_block}\n"
-        if self.guess_file:
-            input_blocks += f'!MORead\n%moinp "{self.guess_file}"\n'
-        input_blocks += "\n"
+    @coordinates.setter
+    def coordinates(self, coordinates):
+        self.molecule = Molecule.from_xyz(coordinates).copy()
+
+    @property
+    def xyzstr(self):
+        return self.molecule.to_xyzstr()
+
+    @xyzstr.setter
+    def xyzstr(self, xyzstr):
+        self.molecule = Molecule.from_xyz(xyzstr).copy()
+
+    def write_input(self):
+        """
+        Write a ORCA input file from ORCAINP object.
+        """
+        input_blocks = _render_blocks(
+            self.osi_block, self.obl_block, self.guess_file, self.nprocs, self.maxcore
+        )
         header = f"{input_blocks}* xyz {self.charge} {self.mult}\n"
         filename = self.orcainp_name
 
@@ -109,9 +190,9 @@ class ORCAINP:
         Add atoms to ORCAINP object.
 
         :param atoms:
-            A list of atoms to add to ORCAINP object in the format [symbol, x, y, z].
+            A list of atoms to add to ORCAINP object in the format [symbol, x, y, z], or a Molecule.
         """
-        self.coordinates += atoms
+        self.molecule.append(atoms)
 
     def run(
         self,
@@ -121,49 +202,106 @@ class ORCAINP:
         extrafiles=[],
         orcarun=None,
         orca_command=None,
+        memo=None,
     ):
         """
-        Run ORCA calculation from an ORCAINP object, writing the input, either by the orca_run.sh script or by supplying a command to run ORCA directly.
+        Run ORCA calculation from an ORCAINP object, writing the input, either by the orcatools Python runner, by a orca_run.sh script or by supplying a command to run ORCA directly.
 
         :param nprocs:
-            Number of cores to run.
+            Number of cores to run. Default: the ORCAINP nprocs.
         :param maxcore:
-            Memory per core in MB.
+            Memory per core in MB. Default: the ORCAINP maxcore.
         :param output:
            Output file name.
         :param [extrafile]:
             A list containing extra files to run ORCA, such as .gbw and .xyz.
         :param orcarun:
-            Full path to orca_run.sh script. Default: orcatools orca_run.sh script.
+            Full path to a orca_run.sh script. Default: the orcatools.orcarun Python runner.
         :param orca_command:
-            Full command in order to run ORCA, in case orca_run.sh is not to be used.
+            Full command in order to run ORCA, in case the runner is not to be used.
+        :param memo:
+            An orcatools.cache.RunCache. A calculation identical to one already run is not run again, and its output and run files are reused.
+            Only used by the Python runner.
+        :return:
+            A orcatools.orcarun.RunResult object when the Python runner is used.
         """
+        nprocs = nprocs or self.nprocs
+        maxcore = maxcore or self.maxcore
         self.write_input()
+        if not orca_command and not orcarun:
+            return orcarun_module.run(
+                self.orcainp_name,
+                output=output,
+                nprocs=nprocs,
+                maxcore=maxcore,
+                extrafiles=extrafiles,
+                memo=memo,
+            )
+
         if orca_command:
             command = orca_command
         else:
-            if orcarun:
-                command = orcarun
-            else:
-                if orcarun:
-                    command = orcarun
-                else:
-                    command = f"{os.path.dirname(__file__)}/orca_run.sh"
-                command += f" -i {self.orcainp_name}"
-                if output:
-                    command += f" -o {output}"
-                if nprocs:
-                    command += f" -p {nprocs}"
-                elif maxcore:
-                    command += f" -m {maxcore}"
-                elif extrafiles:
-                    files = f"{''.join(extrafiles)}"
-                    command += f' -a  "{files}"'
+            command = orcarun
+            command += f" -i {self.orcainp_name}"
+            if output:
+                command += f" -o {output}"
+            if nprocs:
+                command += f" -p {nprocs}"
+            if maxcore:
+                command += f" -m {maxcore}"
+            if extrafiles:
+                files = " ".join(extrafiles)
+                command += f' -a  "{files}"'
 
         sub.run(command.split())
 
         return
 
+    def resume(self, output=None, **run_kwargs):
+        """
+        Resume the calculation of this input after a crash or timeout, with the orcatools Python runner.
+
+        The last geometry of the output and the .gbw file of <input>-runfiles are used to restart it (MORead),
+        and nothing is run if the output already terminated normally. See orcatools.orcarun.resume.
+
+        :param output:
+            Output file name. Default: input basename with .out extension.
+        :param run_kwargs:
+            Keyword arguments for orcatools.orcarun.run, such as nprocs, maxcore, extrafiles and timeout.
+        :return:
+            A orcatools.orcarun.RunResult object.
+        """
+        run_kwargs.setdefault("nprocs", self.nprocs)
+        run_kwargs.setdefault("maxcore", self.maxcore)
+        return orcarun_module.resume(self, output=output, **run_kwargs)
+
+    def canonical_hash(self, tolerance=1e-4):
+        """
+        Return a hash which identifies the calculation, the same for inputs that only differ in formatting.
+
+        The simple input keywords are compared regardless of order and case, the % blocks regardless of case, whitespace and comments,
+        and the written coordinates are rounded to tolerance. The input name, the resources (nprocs, maxcore, PALn) and the starting orbitals
+        (guess_file, MORead) are left out.
+
+        :param tolerance=1e-4:
+            Tolerance of the coordinates in Angstroem.
+        :return:
+            A string with the hexadecimal hash.
+        """
+        # Coordinates as written to the input file, so an ORCAINP and the file it writes give the same hash
+        coordinates = Molecule.from_xyz(self.xyzstr).coordinates
+        positions = np.round(coordinates / tolerance).astype(np.int64)
+        canonical = {
+            "keywords": _normalize_keywords(self.osi_block),
+            "blocks": _normalize_blocks(self.obl_block),
+            "charge": int(self.charge),
+            "mult": int(self.mult),
+            "elements": [element.capitalize() for element in self.molecule.elements.tolist()],
+            "positions": positions.ravel().tolist(),
+        }
+        text = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
     def change_to_dummy_atoms(self, start_index, end_index):
         """
         Change regular atoms to dummy atoms in ORCAINP object.
@@ -173,13 +311,15 @@ class ORCAINP:
         :param end_index:
             Index to end dummy atoms.
         """
-
-        for i in range(start_index, end_index):
-            symbol = self.coordinates[i][0]
-            self.coordinates[i][0] = symbol + ":"
-
-        # Standardize xyz string
-        self.xyzstr = _coordinates_to_xyzstr(self.coordinates)
+        elements = self.molecule.elements
+        # Build a new array, since the dummy symbols may not fit in the current string width
+        self.molecule.elements = np.concatenate(
+            [
+                elements[:start_index],
+                np.char.add(elements[start_index:end_index], ":"),
+                elements[end_index:],
+            ]
+        )
 
     def update_name(self, newname):
         """
@@ -201,9 +341,9 @@ class ORCAINP:
 
     def update_xyz(self, xyzstr):
         """
-        Updates xyz coordinates.
+        Updates xyz coordinates from a XYZ string, .xyz file, coordinates list or Molecule.
         """
-        self.coordinates, self.xyzstr = get_coordinates_from_xyz(xyzstr)
+        self.molecule = Molecule.from_xyz(xyzstr).copy()
 
     def update_charge(self, charge):
         """
@@ -222,3 +362,464 @@ class ORCAINP:
         Updates guess file.
         """
         self.guess_file = guess_file
+
+
+# ----- Bulk input generation
+def _label(name):
+    # Keep labels usable as file names, i.e. "B3LYP D3BJ" -> "B3LYP-D3BJ"
+    return re.sub(r"[^\w.+-]+", "-", str(name).strip()).strip("-")
+
+
+def _named(items, default_prefix):
+    """
+    Return a list of (label, item) pairs from a dictionary or a list.
+    """
+    if isinstance(items, dict):
+        return [(_label(name), item) for name, item in items.items()]
+    named = []
+    for i, item in enumerate(items):
+        if isinstance(item, str) and os.path.isfile(item):
+            name = os.path.splitext(os.path.basename(item))[0]
+        elif isinstance(item, str) and "\n" not in item:
+            name = item
+        else:
+            name = f"{default_prefix}{i}"
+        named.append((_label(name), item))
+    return named
+
+
+def write_inputs(
+    geometries,
+    methods,
+    basis_sets=None,
+    osi_template="! {method} {basis}",
+    obl_block=None,
+    charge=0,
+    mult=1,
+    guess_file=None,
+    nprocs=None,
+    maxcore=None,
+    directory=".",
+    archive=None,
+    name_template="{geometry}_{method}_{basis}",
+):
+    """
+    Write the ORCA inputs of every combination of geometries x methods x basis sets in a single pass, i.e. for conformer and method sweeps.
+
+    The blocks of each method and basis set and the coordinates of each geometry are rendered only once and reused for all the inputs,
+    which are written as files in directory or streamed into a single tar archive.
+
+    :param geometries:
+        A list or a dictionary {name: geometry} of .xyz files, XYZ strings, ORCAOUT coordinate lists or Molecules.
+        List items are named after the .xyz file, or geom<N> otherwise.
+    :param methods:
+        A list or a dictionary {name: method} with the method keywords, i.e. ["B3LYP D3BJ", "PBE0"].
+    :param basis_sets=None:
+        A list or a dictionary {name: basis} with the basis set keywords. Default: no basis set sweep.
+    :param osi_template="! {method} {basis}":
+        ORCA simple input line (or file) where {method} and {basis} are replaced by each method and basis set.
+    :param obl_block=None:
+        A string block or file with ORCA % input blocks shared by all the inputs.
+    :param charge=0:
+        Molecule charge.
+    :param mult=1:
+        Molecule multiplicity.
+    :param guess_file=None:
+        A string with the name of a file used for starting orbitals.
+    :param nprocs=None:
+        Number of cores of each calculation.
+    :param maxcore=None:
+        Memory per core in MB of each calculation.
+    :param directory=".":
+        Directory where the input files are written. It is created if needed.
+    :param archive=None:
+        Name of a tar archive (.tar, .tar.gz or .tar.xz) to write the inputs into, instead of separate files.
+    :param name_template="{geometry}_{method}_{basis}":
+        Template for the input names, filled with the geometry, method and basis set names.
+    :return:
+        A list with the written input file names, or the archive member names.
+    """
+    osi_template = _get_input_block(osi_template)
+    if basis_sets is None:
+        basis_sets = {"": ""}
+        name_template = name_template.replace("_{basis}", "")
+
+    # Render every piece once
+    blocks = {}
+    for (method_name, method), (basis_name, basis) in itertools.product(
+        _named(methods, "method"), _named(basis_sets, "basis")
+    ):
+        osi_block = osi_template.format(method=method, basis=basis).rstrip()
+        blocks[(method_name, basis_name)] = (
+            _render_blocks(osi_block, _get_input_block(obl_block), guess_file, nprocs, maxcore)
+            + f"* xyz {charge} {mult}\n"
+        )
+    xyzstrs = [
+        (name, Molecule.from_xyz(geometry).to_xyzstr() + "*")
+        for name, geometry in _named(geometries, "geom")
+    ]
+
+    if archive:
+        compression = {".gz": "gz", ".tgz": "gz", ".xz": "xz", ".bz2": "bz2"}
+        mode = "w:" + compression.get(os.path.splitext(archive)[1], "")
+        output = tarfile.open(archive, mode)
+    else:
+        os.makedirs(directory, exist_ok=True)
+
+    written = []
+    try:
+        for geometry_name, xyzstr in xyzstrs:
+            for (method_name, basis_name), header in blocks.items():
+                name = name_template.format(
+                    geometry=geometry_name, method=method_name, basis=basis_name
+                )
+                text = header + xyzstr
+                if archive:
+                    data = text.encode()
+                    info = tarfile.TarInfo(f"{name}.inp")
+                    info.size = len(data)
+                    output.addfile(info, io.BytesIO(data))
+                    written.append(info.name)
+                else:
+                    filename = os.path.join(directory, f"{name}.inp")
+                    with open(filename, "w") as out:
+                        out.write(text)
+                    written.append(filename)
+    finally:
+        if archive:
+            output.close()
+
+    return written
+
+
+# ----- Input parsing
+# Quoted strings, comments, line breaks and words
+_TOKEN_PATTERN = re.compile(r'"[^"\n]*"|#[^\n]*|\n|[^\s"#]+')
+# % directives written in a single line, without end
+_LINE_DIRECTIVES = {"maxcore", "moinp", "base", "pointcharges"}
+# Keywords which open a sub-block, closed by its own end, inside a % block
+_SUBBLOCKS = {
+    "constraints",
+    "scan",
+    "coords",
+    "newgto",
+    "newauxgto",
+    "newauxjgto",
+    "newauxjkgto",
+    "newauxcgto",
+    "addgto",
+    "newecp",
+    "modify_internal",
+    "hess_internal",
+    "fragments",
+}
+# Coordinate types read from an external file
+_FILE_COORDINATES = {"xyzfile", "gzmtfile", "pdbfile"}
+# Blocks stored as ParsedInput attributes instead of in obl_block
+_ATTRIBUTE_BLOCKS = {"pal", "maxcore", "moinp", "coords"}
+
+
+def _unquote(token):
+    return token.strip('"')
+
+
+class ParsedInput:
+    """
+    Class which holds the structure of an ORCA input file, as read by read_input.
+
+    :attribute orcainp_name:
+        The name of the input file.
+    :attribute keywords:
+        A list with the simple input (!) keywords.
+    :attribute osi_block:
+        The simple input (!) lines.
+    :attribute blocks:
+        A list of (name, text) tuples with every % block, in input order.
+    :attribute charge:
+        Molecule charge.
+    :attribute mult:
+        Molecule multiplicity.
+    :attribute coordinate_type:
+        The coordinate type, i.e. "xyz", "int", "gzmt" or "xyzfile".
+    :attribute coordinates_text:
+        The raw coordinate lines for coordinates given in the input, or None.
+    :attribute xyz_file:
+        The coordinates file for the *xyzfile, *gzmtfile and *pdbfile types, or None.
+    :attribute molecule:
+        The Molecule for Cartesian coordinates (also from %coords and existing .xyz files), or None.
+    :attribute nprocs:
+        Number of cores from %pal, or None.
+    :attribute maxcore:
+        Memory per core in MB from %maxcore, or None.
+    :attribute guess_file:
+        The orbital file from %moinp, or None.
+    """
+
+    def __init__(self, orcainp_name=None):
+        self.orcainp_name = orcainp_name
+        self.keywords = []
+        self.osi_block = ""
+        self.blocks = []
+        self.charge = None
+        self.mult = None
+        self.coordinate_type = None
+        self.coordinates_text = None
+        self.xyz_file = None
+        self.molecule = None
+        self.nprocs = None
+        self.maxcore = None
+        self.guess_file = None
+
+    def __repr__(self):
+        return (
+            f"ParsedInput({self.orcainp_name!r}, keywords={self.keywords}, "
+            f"blocks={[name for name, _ in self.blocks]}, coordinates={self.coordinate_type})"
+        )
+
+    @property
+    def obl_block(self):
+        """
+        The % blocks which are not stored as attributes (pal, maxcore, moinp and coords).
+        """
+        return "\n".join(text for name, text in self.blocks if name not in _ATTRIBUTE_BLOCKS)
+
+    def get_block(self, name):
+        """
+        Return the text of the first % block named name, or None.
+        """
+        for block_name, text in self.blocks:
+            if block_name == name.lower():
+                return text
+        return None
+
+    def to_orcainp(self, orcainp_name=None):
+        """
+        Build an ORCAINP object from the parsed input.
+
+        :param orcainp_name=None:
+            Name of the new input file. Default: the parsed file name.
+        """
+        if self.molecule is None:
+            raise BaseException(
+                f"Only Cartesian coordinates can be used by ORCAINP, not {self.coordinate_type}!"
+            )
+        osi_block = self.osi_block
+        if self.guess_file:
+            # ORCAINP adds MORead itself for the guess file
+            osi_block = re.sub(r"\bMORead\b", "", osi_block, flags=re.IGNORECASE)
+            osi_block = "\n".join(line for line in osi_block.splitlines() if line.strip() != "!")
+        return ORCAINP(
+            orcainp_name or self.orcainp_name,
+            self.molecule,
+            osi_block,
+            self.obl_block or None,
+            charge=self.charge,
+            mult=self.mult,
+            guess_file=self.guess_file,
+            nprocs=self.nprocs,
+            maxcore=self.maxcore,
+        )
+
+
+def _parse_coords_block(parsed, tokens, text):
+    """
+    Read the coordinates of a %coords block from its tokens.
+    """
+    settings = {}
+    for position in range(1, len(tokens) - 1):
+        key = tokens[position][0].lower()
+        if key == "coords":
+            closing = next(
+                start for token, start, _ in tokens[position:] if token.lower() == "end"
+            )
+            parsed.coordinates_text = text[tokens[position][2] : closing].strip("\n") + "\n"
+            break
+        if key in ("ctyp", "charge", "mult", "units"):
+            settings[key] = tokens[position + 1][0].lower()
+    parsed.coordinate_type = settings.get("ctyp", "xyz")
+    parsed.charge = int(settings.get("charge", 0))
+    parsed.mult = int(settings.get("mult", 1))
+    if parsed.coordinate_type == "xyz" and parsed.coordinates_text:
+        parsed.molecule = Molecule.from_xyz(parsed.coordinates_text)
+        if settings.get("units", "angs").startswith("bohr"):
+            parsed.molecule.coordinates *= BOHR_TO_ANGSTROEM
+
+
+def parse_input(text, orcainp_name=None):
+    """
+    Parse the text of an ORCA input.
+
+    Handles multi-line ! keywords, % blocks with nested sub-blocks (i.e. Constraints ... end), single-line directives
+    such as %maxcore and %moinp, * xyz/int/gzmt coordinates, * xyzfile/gzmtfile/pdbfile and %coords blocks.
+    Comments (#) are ignored. Only the first job of multi-job ($new_job) inputs is read.
+
+    :param text:
+        A string with the ORCA input.
+    :param orcainp_name=None:
+        The input file name, used in the error messages and to find .xyz coordinate files.
+    :return:
+        A ParsedInput object.
+    """
+    parsed = ParsedInput(orcainp_name)
+    tokens = [
+        (match.group(), match.start(), match.end())
+        for match in _TOKEN_PATTERN.finditer(text)
+        if not match.group().startswith("#")
+    ]
+    osi_lines = []
+
+    def error(message, position):
+        line = text.count("\n", 0, position) + 1
+        where = f"{orcainp_name}, line {line}" if orcainp_name else f"line {line}"
+        return BaseException(f"{message} ({where})")
+
+    def line_end(i):
+        while i < len(tokens) and tokens[i][0] != "\n":
+            i += 1
+        return i
+
+    i = 0
+    while i < len(tokens):
+        token, start, end = tokens[i]
+        if token == "\n":
+            i += 1
+        elif token.startswith("!"):
+            stop = line_end(i)
+            words = [token[1:]] + [word for word, _, _ in tokens[i + 1 : stop]]
+            parsed.keywords += [word for word in words if word]
+            osi_lines.append(text[start : tokens[stop - 1][2]])
+            i = stop
+        elif token.startswith("%"):
+            name = token[1:].lower()
+            if not name:
+                i += 1
+                name = tokens[i][0].lower()
+            if name in _LINE_DIRECTIVES:
+                stop = line_end(i)
+                values = [word for word, _, _ in tokens[i + 1 : stop]]
+                if not values:
+                    raise error(f"%{name} requires a value", start)
+                if name == "maxcore":
+                    parsed.maxcore = int(values[0])
+                elif name == "moinp":
+                    parsed.guess_file = _unquote(values[0])
+                parsed.blocks.append((name, text[start : tokens[stop - 1][2]]))
+                i = stop
+                continue
+            depth = 1
+            stop = i + 1
+            while stop < len(tokens):
+                word = tokens[stop][0].lower()
+                if word == "end":
+                    depth -= 1
+                    if depth == 0:
+                        break
+                elif word in _SUBBLOCKS:
+                    depth += 1
+                stop += 1
+            else:
+                raise error(f"The %{name} block is not closed with end", start)
+            block_tokens = [t for t in tokens[i : stop + 1] if t[0] != "\n"]
+            parsed.blocks.append((name, text[start : tokens[stop][2]]))
+            if name == "pal":
+                words = [word.lower() for word, _, _ in block_tokens]
+                if "nprocs" in words:
+                    parsed.nprocs = int(words[words.index("nprocs") + 1])
+            elif name == "coords":
+                try:
+                    _parse_coords_block(parsed, block_tokens, text)
+                except ValueError:
+                    raise error("The %coords block has non-numeric settings or coordinates", start)
+            i = stop + 1
+        elif token.startswith("*"):
+            stop = line_end(i)
+            words = [token[1:]] + [word for word, _, _ in tokens[i + 1 : stop]]
+            words = [word for word in words if word]
+            if len(words) < 3:
+                raise error("The coordinates line must be * <type> <charge> <mult>", start)
+            parsed.coordinate_type = words[0].lower()
+            try:
+                parsed.charge, parsed.mult = int(words[1]), int(words[2])
+            except ValueError:
+                raise error("Charge and multiplicity must be integers", start)
+            if parsed.coordinate_type in _FILE_COORDINATES:
+                if len(words) < 4:
+                    raise error(f"*{parsed.coordinate_type} requires a file name", start)
+                parsed.xyz_file = _unquote(words[3])
+                xyz_path = os.path.join(os.path.dirname(orcainp_name or ""), parsed.xyz_file)
+                if parsed.coordinate_type == "xyzfile" and os.path.isfile(xyz_path):
+                    parsed.molecule = Molecule.from_xyz(xyz_path)
+                i = stop
+                continue
+            # The coordinates end at a line with a single *
+            closing = stop
+            while closing < len(tokens) and not (
+                tokens[closing][0] == "*" and tokens[closing - 1][0] == "\n"
+            ):
+                closing += 1
+            if closing == len(tokens):
+                raise error("The coordinates are not closed with *", start)
+            body_start = tokens[stop][2] if stop < len(tokens) else len(text)
+            parsed.coordinates_text = re.sub(r"#[^\n]*", "", text[body_start : tokens[closing][1]])
+            if parsed.coordinate_type == "xyz":
+                try:
+                    parsed.molecule = Molecule.from_xyz(parsed.coordinates_text)
+                except ValueError:
+                    # i.e. {R} placeholders of %paras
+                    raise error("The xyz coordinates must be lines of <symbol> <x> <y> <z> numbers", start)
+            i = closing + 1
+        elif token.lower() == "$new_job":
+            break
+        else:
+            raise error(f"Unexpected {token} outside of any input section", start)
+
+    parsed.osi_block = "\n".join(osi_lines)
+    return parsed
+
+
+def read_input(orcainp_name):
+    """
+    Read an ORCA input file into a ParsedInput object. Use ParsedInput.to_orcainp to get an ORCAINP object.
+
+    :param orcainp_name:
+        A string with the name of the ORCA input file.
+    """
+    with open_file(orcainp_name, "r") as fh:
+        return parse_input(fh.read(), orcainp_name)
+
+
+def read_inputs(inputs, workers=None, pattern="*.inp"):
+    """
+    Read many ORCA input files over a process pool, i.e. for auditing or regenerating a directory of calculations.
+
+    :param inputs:
+        A directory, searched recursively for pattern, or a list with the input file names.
+    :param workers=None:
+        Number of worker processes. Default: number of CPUs. With workers=1 the files are read in the current process.
+    :param pattern="*.inp":
+        File name pattern of the inputs when a directory is given.
+    :return:
+        A dictionary with the ParsedInput of each file, or the exception raised while reading it.
+    """
+    if isinstance(inputs, str):
+        inputs = sorted(glob.glob(os.path.join(inputs, "**", pattern), recursive=True))
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(inputs) > 1:
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(
+                executor.map(
+                    _read_input_safe, inputs, chunksize=max(1, len(inputs) // (4 * workers))
+                )
+            )
+    else:
+        results = [_read_input_safe(orcainp_name) for orcainp_name in inputs]
+    return dict(zip(inputs, results))
+
+
+def _read_input_safe(orcainp_name):
+    try:
+        return read_input(orcainp_name)
+    except (KeyboardInterrupt, SystemExit):
+        raise
+    except BaseException as error:
+        return error
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+import os
+from collections.abc import MutableSequence, Sequence
+
+import numpy as np
+
+from orcatools.compress import open_file
+
+
+class Molecule:
+    """
+    Class which holds the elements and Cartesian coordinates (Angstroem) of a molecule as arrays.
+
+    It is accepted wherever orcatools takes XYZ coordinates, and it is only formatted to XYZ text when written.
+
+    :param elements:
+        A list or array with the element symbols.
+    :param coordinates:
+        An array of shape (natoms, 3) with the coordinates.
+
+    :attribute elements:
+        An array with the element symbols.
+    :attribute coordinates:
+        A float array of shape (natoms, 3) with the coordinates.
+    """
+
+    __slots__ = ("elements", "coordinates")
+
+    def __init__(self, elements, coordinates):
+        self.elements = np.array(elements, dtype=str).reshape(-1)
+        self.coordinates = np.array(coordinates, dtype=float).reshape(-1, 3)
+        if len(self.elements) != len(self.coordinates):
+            raise ValueError(
+                f"{len(self.elements)} elements were given for {len(self.coordinates)} positions."
+            )
+
+    @classmethod
+    def from_xyz(cls, xyz):
+        """
+        Build a Molecule from a .xyz file, XYZ string, list of [symbol, x, y, z] lists, ORCAOUT coordinates list or another Molecule.
+
+        :param xyz:
+            The molecule in any of the formats above.
+        :return:
+            A Molecule object (the same object if xyz is already a Molecule).
+        """
+        if isinstance(xyz, Molecule):
+            return xyz
+        if isinstance(xyz, _CoordinatesView):
+            return xyz._molecule
+        if isinstance(xyz, (list, tuple)):
+            # ORCAOUT coordinates are unparsed "symbol x y z" strings
+            rows = [line.split() if isinstance(line, str) else line for line in xyz]
+        elif isinstance(xyz, str):
+            if xyz and os.path.isfile(xyz):
+                with open_file(xyz, "r") as fh:
+                    lines = fh.read().splitlines()[2:]
+            else:
+                lines = xyz.splitlines()
+            rows = [line.split() for line in lines if line.strip()]
+        else:
+            raise BaseException(
+                "Your XYZ coordinates must be a .xyz formatted file or string!"
+            )
+        elements = [row[0] for row in rows]
+        coordinates = [row[1:4] for row in rows]
+        return cls(elements, np.array(coordinates, dtype=float).reshape(-1, 3))
+
+    def __len__(self):
+        return len(self.elements)
+
+    def __repr__(self):
+        return f"Molecule({self.formula()}, natoms={len(self)})"
+
+    @property
+    def natoms(self):
+        """
+        Number of atoms of the molecule.
+        """
+        return len(self.elements)
+
+    def formula(self):
+        """
+        Return the molecular formula, i.e. C2H6O.
+        """
+        symbols, counts = np.unique(self.elements, return_counts=True)
+        return "".join(
+            f"{symbol}{count if count > 1 else ''}" for symbol, count in zip(symbols, counts)
+        )
+
+    def copy(self):
+        """
+        Return an independent copy of the molecule.
+        """
+        return Molecule(self.elements.copy(), self.coordinates.copy())
+
+    def append(self, atoms):
+        """
+        Add atoms to the molecule.
+
+        :param atoms:
+            A list of atoms in the format [symbol, x, y, z], or another Molecule.
+        """
+        atoms = Molecule.from_xyz(atoms)
+        self.elements = np.concatenate([self.elements, atoms.elements])
+        self.coordinates = np.concatenate([self.coordinates, atoms.coordinates])
+
+    def to_list(self):
+        """
+        Return the coordinates in a list of [symbol, x, y, z] lists.
+        """
+        return [
+            [str(symbol), *position]
+            for symbol, position in zip(self.elements, self.coordinates.tolist())
+        ]
+
+    def list_view(self):
+        """
+        Return the coordinates as a list of [symbol, x, y, z] rows which reads and writes the arrays of the molecule,
+        i.e. view[0][1] = 5.0 or view.append(["H", 0.0, 0.0, 1.0]). Editing a row changes the arrays in place;
+        for bulk edits use the coordinates array, i.e. molecule.coordinates[:, 0] += 1.0.
+        """
+        return _CoordinatesView(self)
+
+    def to_xyzstr(self, symbol_width=6, decimals=5, width=10):
+        """
+        Return the coordinates as a XYZ string block, formatting all the atoms at once.
+
+        :param symbol_width=6:
+            Width of the symbol column.
+        :param decimals=5:
+            Number of decimals of the coordinates.
+        :param width=10:
+            Width of each coordinate column.
+        """
+        row_format = f"%-{symbol_width}s" + f" %{width}.{decimals}f" * 3 + "\n"
+        frame = np.empty((len(self), 4), dtype=object)
+        frame[:, 0] = self.elements
+        frame[:, 1:] = self.coordinates
+        return (row_format * len(self)) % tuple(frame.ravel())
+
+    def write(self, xyz_file, title=None):
+        """
+        Write the molecule to a .xyz formatted file.
+
+        :param xyz_file:
+            A string with the .xyz file name.
+        :param title=None:
+            A title for the .xyz file where default is file basename.
+        """
+        if not ".xyz" in xyz_file:
+            xyz_file = xyz_file + ".xyz"
+        if not title:
+            title = xyz_file.replace(".xyz", "")
+        with open(xyz_file, "w") as out:
+            out.write(f"{len(self)}\n{title}\n")
+            out.write(self.to_xyzstr(symbol_width=4, decimals=6, width=11))
+
+
+# ----- Editable list views of a Molecule
+class _CoordinateRow(Sequence):
+    """
+    The [symbol, x, y, z] row of one atom, reading and writing the arrays of its Molecule directly.
+    """
+
+    __slots__ = ("_molecule", "_atom")
+
+    def __init__(self, molecule, atom):
+        self._molecule = molecule
+        self._atom = atom
+
+    def __len__(self):
+        return 4
+
+    def __getitem__(self, column):
+        if isinstance(column, slice):
+            return [self[i] for i in range(4)[column]]
+        if not -4 <= column < 4:
+            raise IndexError("coordinate row index out of range")
+        column %= 4
+        if column == 0:
+            return str(self._molecule.elements[self._atom])
+        return float(self._molecule.coordinates[self._atom, column - 1])
+
+    def __setitem__(self, column, value):
+        if isinstance(column, slice):
+            columns, values = range(4)[column], list(value)
+            if len(columns) != len(values):
+                raise ValueError("The rows of a molecule always have 4 columns.")
+            for i, item in zip(columns, values):
+                self[i] = item
+            return
+        if not -4 <= column < 4:
+            raise IndexError("coordinate row index out of range")
+        column %= 4
+        if column == 0:
+            _set_element(self._molecule, self._atom, value)
+        else:
+            self._molecule.coordinates[self._atom, column - 1] = float(value)
+
+    def __eq__(self, other):
+        return list(self) == other
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class _CoordinatesView(MutableSequence):
+    """
+    List of [symbol, x, y, z] rows of a Molecule. Reading or editing a row works on the arrays of the molecule in place,
+    while adding or removing atoms rebuilds them. Rows refer to atoms by position, as NumPy views do.
+    """
+
+    __slots__ = ("_molecule",)
+
+    def __init__(self, molecule):
+        self._molecule = molecule
+
+    def __len__(self):
+        return len(self._molecule)
+
+    def _atom(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError("coordinates index out of range")
+        return index % len(self)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [_CoordinateRow(self._molecule, i) for i in range(len(self))[index]]
+        return _CoordinateRow(self._molecule, self._atom(index))
+
+    def __setitem__(self, index, row):
+        if isinstance(index, slice):
+            rows = self._molecule.to_list()
+            rows[index] = [list(new_row) for new_row in row]
+            self._replace(rows)
+            return
+        atom = self._atom(index)
+        row = Molecule.from_xyz([list(row)])
+        _set_element(self._molecule, atom, row.elements[0])
+        self._molecule.coordinates[atom] = row.coordinates[0]
+
+    def __delitem__(self, index):
+        atoms = range(len(self))[index] if isinstance(index, slice) else self._atom(index)
+        self._molecule.elements = np.delete(self._molecule.elements, atoms)
+        self._molecule.coordinates = np.delete(self._molecule.coordinates, atoms, axis=0)
+
+    def insert(self, index, row):
+        # Same clamping of the position as list.insert
+        index = min(max(index + len(self) if index < 0 else index, 0), len(self))
+        row = Molecule.from_xyz([list(row)])
+        self._molecule.elements = np.insert(self._molecule.elements, index, row.elements)
+        self._molecule.coordinates = np.insert(self._molecule.coordinates, index, row.coordinates, axis=0)
+
+    def pop(self, index=-1):
+        # The row is copied, since its atom is removed
+        row = list(self[index])
+        del self[index]
+        return row
+
+    def extend(self, rows):
+        self._molecule.append([list(row) for row in rows])
+
+    def clear(self):
+        self._replace([])
+
+    def reverse(self):
+        self._molecule.elements = self._molecule.elements[::-1].copy()
+        self._molecule.coordinates = self._molecule.coordinates[::-1].copy()
+
+    def sort(self, key=None, reverse=False):
+        self._replace(sorted(self._molecule.to_list(), key=key, reverse=reverse))
+
+    def _replace(self, rows):
+        # Rebuilt through a Molecule, so malformed rows raise before anything changes
+        molecule = Molecule([row[0] for row in rows], [row[1:4] for row in rows])
+        self._molecule.elements = molecule.elements
+        self._molecule.coordinates = molecule.coordinates
+
+    def __eq__(self, other):
+        return self._molecule.to_list() == other
+
+    def __repr__(self):
+        return repr(self._molecule.to_list())
+
+
+def _set_element(molecule, atom, symbol):
+    """
+    Set the element of one atom, widening the string array of the elements when the new symbol is longer.
+    """
+    symbol = str(symbol)
+    if len(symbol) > molecule.elements.dtype.itemsize // np.dtype("U1").itemsize:
+        molecule.elements = molecule.elements.astype(f"U{len(symbol)}")
+    molecule.elements[atom] = symbol
@@ -1,18 +1,380 @@
-# This submodule is for the future, as an idea to translate orca_run.sh to Python
-
 #!/usr/bin/env python3
+# Python replacement of the orca_run.sh script, running ORCA in a scratch directory
 import os
+import re
+import shutil
+import signal
+import socket
+import subprocess as sub
+import tempfile
+import time
+from datetime import datetime
+
+from orcatools.compress import EXTENSIONS, compact_run, detect_compression, extract_file
+from orcatools.out import ORCAOUT, check_normal_termination
+
+# Parallel and memory settings which are replaced in the input when nprocs and maxcore are given
+_PAL_PATTERN = re.compile(
+    r"^[ \t]*%pal\b.*?\bend\b[^\n]*\n?", re.IGNORECASE | re.MULTILINE | re.DOTALL
+)
+_MAXCORE_PATTERN = re.compile(r"^[ \t]*%maxcore\b[^\n]*\n?", re.IGNORECASE | re.MULTILINE)
+
+
+class RunResult:
+    """
+    Class which holds the result of an ORCA run.
+
+    :attribute orcainp_name:
+        The name of the ORCA input file.
+    :attribute output:
+        The full path of the output file.
+    :attribute returncode:
+        The exit status of the ORCA executable (None if the calculation was not run, i.e. skipped).
+    :attribute walltime:
+        The wall time of the run in seconds.
+    :attribute runfiles:
+        The full path of the directory where the files produced by ORCA were moved, or of their archive if the run was compacted.
+    """
+
+    def __init__(self, orcainp_name, output, returncode, walltime, runfiles):
+        self.orcainp_name = orcainp_name
+        self.output = output
+        self.returncode = returncode
+        self.walltime = walltime
+        self.runfiles = runfiles
+
+    def __repr__(self):
+        return (
+            f"RunResult(orcainp_name={self.orcainp_name!r}, output={self.output!r}, "
+            f"returncode={self.returncode}, walltime={self.walltime!r})"
+        )
+
+    @property
+    def normal_termination(self):
+        """
+        Boolean that tells if the output file has a normal termination.
+        """
+        if not os.path.isfile(self.output):
+            return False
+        return check_normal_termination(self.output)[0]
+
+
+def _find_orca(orca=None):
+    """
+    Return the full path of the ORCA executable, from the argument, $ORCAPATH or $PATH.
+    """
+    if not orca:
+        if os.environ.get("ORCAPATH"):
+            orca = os.path.join(os.environ["ORCAPATH"], "orca")
+        else:
+            orca = shutil.which("orca")
+    if not orca or not os.path.isfile(orca):
+        raise BaseException(
+            "ORCA executable not found! Export ORCAPATH in your environment or supply the orca argument."
+        )
+    # ORCA needs to be called with its full path for parallel runs
+    return os.path.abspath(orca)
+
+
+def set_resources(input_text, nprocs=None, maxcore=None):
+    """
+    Replace the %pal and %maxcore settings of an ORCA input text.
+
+    :param input_text:
+        A string with the ORCA input.
+    :param nprocs=None:
+        Number of cores to run. The existing %pal block is replaced.
+    :param maxcore=None:
+        Memory per core in MB. The existing %maxcore line is replaced.
+    :return:
+        The new input text.
+    """
+    header = ""
+    if nprocs:
+        input_text = _PAL_PATTERN.sub("", input_text)
+        header += f"%pal nprocs {nprocs} end\n"
+    if maxcore:
+        input_text = _MAXCORE_PATTERN.sub("", input_text)
+        header += f"%maxcore {maxcore}\n"
+    return header + input_text
+
+
+def run(
+    orcainp,
+    output=None,
+    nprocs=None,
+    maxcore=None,
+    extrafiles=None,
+    orca=None,
+    scratch=None,
+    timeout=None,
+    compact=None,
+    memo=None,
+):
+    """
+    Run ORCA from an input file in a scratch directory, moving the produced files to <input>-runfiles afterwards.
+    The files are also kept when the run crashes, times out or is interrupted, so it can be resumed with resume.
+
+    :param orcainp:
+        A string with the name of the ORCA input file.
+    :param output=None:
+        Output file name. Default: input basename with .out extension.
+    :param nprocs=None:
+        Number of cores to run.
+    :param maxcore=None:
+        Memory per core in MB.
+    :param extrafiles=None:
+        A list containing extra files to run ORCA, such as .gbw and .xyz.
+    :param orca=None:
+        Full path to the ORCA executable. Default: $ORCAPATH/orca or orca in $PATH.
+    :param scratch=None:
+        Directory where the scratch directories are created. Default: $ORCASCR or the system temporary directory.
+    :param timeout=None:
+        Maximum wall time in seconds. ORCA is killed when it is reached, and the RunResult has a negative returncode.
+    :param compact=None:
+        Compression method ("gzip", "xz" or "zstd") used to compact normally terminated runs: the output is compressed and
+        <input>-runfiles is packed into the indexed archive <input>-runfiles.zip. See orcatools.compress.compact_run.
+    :param memo=None:
+        An orcatools.cache.RunCache. If an identical calculation (see ORCAINP.canonical_hash) already terminated normally,
+        ORCA is not run: its output is copied to output, its run files are linked into <input>-runfiles, and the RunResult
+        has returncode None. Normally terminated runs are recorded in it.
+    :return:
+        A RunResult object.
+    """
+    if compact is not None and compact not in EXTENSIONS:
+        raise ValueError('The compact method must be "gzip", "xz" or "zstd".')
+    if not os.path.isfile(orcainp):
+        raise BaseException("ORCA input file does not exists!")
+    orca = _find_orca(orca)
+    scratch = scratch or os.environ.get("ORCASCR") or tempfile.gettempdir()
+
+    calcdir = os.path.dirname(os.path.abspath(orcainp))
+    inpname = os.path.basename(orcainp)
+    basename = os.path.splitext(inpname)[0]
+    if output:
+        output = os.path.abspath(output)
+    else:
+        output = os.path.join(calcdir, f"{basename}.out")
+    extrafiles = extrafiles or []
+    runfiles = os.path.join(calcdir, f"{basename}-runfiles")
+
+    key = _memo_key(orcainp, memo.tolerance) if memo is not None else None
+    cached = memo.get(key) if key else None
+    if cached:
+        return _reuse_run(orcainp, output, runfiles, *cached)
+
+    os.makedirs(scratch, exist_ok=True)
+    rundir = tempfile.mkdtemp(prefix=f"{basename}-", dir=scratch)
+
+    with open(os.path.join(calcdir, f"{basename}.nodes"), "w") as nodes:
+        nodes.write(
+            f"Orca will run on node {socket.gethostname()} in {datetime.now():%d-%m-%Y at %H:%M:%S} with the following options\n"
+            f"input = {inpname}\noutput = {output}\nnumber of processors = {nprocs or ''}\n"
+            f"maxcore memory = {maxcore or ''}\nextrafile = {' '.join(extrafiles)}\nscratch directory = {rundir}\n"
+        )
+
+    staged = False
+    try:
+        # Stage the input and extra files
+        with open(orcainp, "r") as inp:
+            input_text = inp.read()
+        with open(os.path.join(rundir, inpname), "w") as inp:
+            inp.write(set_resources(input_text, nprocs, maxcore))
+        for extrafile in extrafiles:
+            shutil.copy(extrafile, rundir)
+        staged = True
+
+        start = time.monotonic()
+        with open(output, "w") as out:
+            # ORCA runs in its own process group, so its mpirun and orca_*_mpi children are killed with it
+            process = sub.Popen([orca, inpname], cwd=rundir, stdout=out, start_new_session=True)
+            try:
+                process.wait(timeout=timeout)
+            except sub.TimeoutExpired:
+                _kill_group(process)
+            except BaseException:
+                _kill_group(process)
+                raise
+        walltime = time.monotonic() - start
+    finally:
+        if staged:
+            # Keep the modified input and move the files produced by ORCA, except temporary ones
+            os.makedirs(runfiles, exist_ok=True)
+            os.replace(
+                os.path.join(rundir, inpname), os.path.join(rundir, f"{basename}.new.inp")
+            )
+            for filename in os.listdir(rundir):
+                if ".tmp" in filename:
+                    continue
+                shutil.move(
+                    os.path.join(rundir, filename), os.path.join(runfiles, filename)
+                )
+        shutil.rmtree(rundir, ignore_errors=True)
+
+    # Crashed runs are left as they are, so they can be resumed
+    if compact and check_normal_termination(output)[0]:
+        output, runfiles = compact_run(output, runfiles, method=compact)
+    if key and check_normal_termination(output)[0]:
+        memo.set(key, output, runfiles)
+    return RunResult(orcainp, output, process.returncode, walltime, runfiles)
+
+
+def _kill_group(process):
+    """
+    Kill a process started in a new session together with all its children.
+    """
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    process.wait()
+
+
+def _memo_key(orcainp, tolerance):
+    """
+    Return the canonical hash of an input file, or None if it cannot be read as an ORCAINP (i.e. coordinates in an external file).
+    """
+    from orcatools.inp import ORCAINP
+
+    try:
+        return ORCAINP.from_file(orcainp).canonical_hash(tolerance)
+    except BaseException:
+        return None
+
+
+def _link_or_copy(source, target):
+    """
+    Hard link a file, or copy it when linking is not possible (i.e. another file system).
+    """
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+    return target
+
+
+def _reuse_run(orcainp, output, runfiles, cached_output, cached_runfiles):
+    """
+    Place the results of an identical calculation run before as the results of orcainp, instead of running ORCA.
+    The output is copied, since it is overwritten in place by new runs, and the run files are hard linked and renamed after the new input.
+    """
+    method = detect_compression(cached_output)
+    if method:
+        output += EXTENSIONS[method]
+    if cached_output != output:
+        shutil.copy2(cached_output, output)
+
+    if cached_runfiles and os.path.isdir(cached_runfiles):
+        if cached_runfiles != runfiles:
+            old_basename = os.path.basename(cached_runfiles)[: -len("-runfiles")]
+            new_basename = os.path.basename(runfiles)[: -len("-runfiles")]
+            os.makedirs(runfiles, exist_ok=True)
+            for filename in os.listdir(cached_runfiles):
+                source = os.path.join(cached_runfiles, filename)
+                if not os.path.isfile(source):
+                    continue
+                if filename.startswith(old_basename):
+                    filename = new_basename + filename[len(old_basename) :]
+                target = os.path.join(runfiles, filename)
+                if os.path.exists(target):
+                    os.remove(target)
+                _link_or_copy(source, target)
+    elif cached_runfiles and os.path.isfile(cached_runfiles):
+        # Compacted run files
+        if cached_runfiles != f"{runfiles}.zip":
+            shutil.copy2(cached_runfiles, f"{runfiles}.zip")
+        runfiles = f"{runfiles}.zip"
+    return RunResult(orcainp, output, None, None, runfiles)
+
+
+def _backup_name(filename):
+    """
+    Return the first free <filename>.<n> name, for keeping the output of previous runs.
+    """
+    n = 1
+    while os.path.exists(f"{filename}.{n}"):
+        n += 1
+    return f"{filename}.{n}"
+
+
+def prepare_restart(orcainp, output=None):
+    """
+    Prepare an ORCAINP object to restart an abnormally terminated calculation, from the last geometry found in the output
+    and the .gbw file in <input>-runfiles, which is read with MORead.
+
+    :param orcainp:
+        The ORCAINP object of the calculation.
+    :param output=None:
+        Output file of the previous run. Default: input basename with .out extension.
+    :return:
+        A list with the extra files required by the restart (the copy of the previous .gbw file).
+    """
+    calcdir = os.path.dirname(os.path.abspath(orcainp.orcainp_name))
+    basename = os.path.splitext(os.path.basename(orcainp.orcainp_name))[0]
+    output = output or os.path.join(calcdir, f"{basename}.out")
+
+    if os.path.isfile(output):
+        try:
+            orcainp.update_xyz(ORCAOUT(output, function_mode=True).get_molecule())
+        except BaseException:
+            # The calculation died before printing any geometry
+            pass
+
+    # ORCA does not read the orbitals from a file with the same name as its own .gbw
+    runfiles = os.path.join(calcdir, f"{basename}-runfiles")
+    gbw_file = os.path.join(runfiles, f"{basename}.gbw")
+    guess_file = os.path.join(runfiles, f"{basename}.restart.gbw")
+    if os.path.isfile(gbw_file):
+        shutil.copy(gbw_file, guess_file)
+    elif os.path.isfile(f"{runfiles}.zip"):
+        # Compacted run files, only the .gbw is extracted
+        try:
+            gbw_file = extract_file(f"{runfiles}.zip", f"{basename}.gbw", runfiles)
+        except BaseException:
+            return []
+        os.replace(gbw_file, guess_file)
+    else:
+        return []
+    orcainp.update_guess(os.path.basename(guess_file))
+    return [guess_file]
+
+
+def resume(orcainp, output=None, **run_kwargs):
+    """
+    Resume a calculation which crashed or timed out, restarting it from its last geometry and orbitals.
+
+    Calculations whose output already terminated normally are not run again. Otherwise the previous output is kept
+    as <output>.<n>, the input is rewritten with the last geometry and MORead of the previous .gbw file, and ORCA is run.
+
+    :param orcainp:
+        An ORCAINP object or the name of an ORCA input file with Cartesian coordinates.
+    :param output=None:
+        Output file name. Default: input basename with .out extension.
+    :param run_kwargs:
+        Keyword arguments for run, such as nprocs, maxcore, extrafiles, orca, scratch and timeout.
+    :return:
+        A RunResult object, with returncode None if the calculation had already finished.
+    """
+    if isinstance(orcainp, str):
+        from orcatools.inp import ORCAINP
+
+        orcainp = ORCAINP.from_file(orcainp)
+    calcdir = os.path.dirname(os.path.abspath(orcainp.orcainp_name))
+    basename = os.path.splitext(os.path.basename(orcainp.orcainp_name))[0]
+    output = os.path.abspath(output) if output else os.path.join(calcdir, f"{basename}.out")
+    runfiles = os.path.join(calcdir, f"{basename}-runfiles")
+
+    for compacted in (output + extension for extension in EXTENSIONS.values()):
+        if os.path.isfile(compacted) and check_normal_termination(compacted)[0]:
+            return RunResult(orcainp.orcainp_name, compacted, None, None, f"{runfiles}.zip")
+    if os.path.isfile(output):
+        if check_normal_termination(output)[0]:
+            return RunResult(orcainp.orcainp_name, output, None, None, runfiles)
+        extrafiles = prepare_restart(orcainp, output)
+        os.replace(output, _backup_name(output))
+    else:
+        extrafiles = []
 
-def run(orcainp, orcaout=None, nprocs=None, maxcore=None, extrafiles=[]):
-        command = os.popen("echo $ORCARUN").read()
-        command += f" -i {orcainp} "
-        if nprocs:
-            command += f"-n {nprocs}"
-        elif maxcore:
-            command += f"-m {maxcore}"
-        elif extrafiles:
-            command += f'-a \"{''.join(extrafiles)} \"'
-        elif orcaout:
-            command += f"-o {orcaout}"
-
-        os.popen(f"{command}")
\ No newline at end of file
+    extrafiles += run_kwargs.pop("extrafiles", None) or []
+    orcainp.write_input()
+    return run(orcainp.orcainp_name, output=output, extrafiles=extrafiles, **run_kwargs)
@@ -1,5 +1,179 @@
 #!/usr/bin/env python3
+import mmap
 import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from functools import partial, wraps
+from itertools import islice
+
+import numpy as np
+
+from orcatools.compress import detect_compression, open_file
+from orcatools.molecule import Molecule
+from orcatools.tools import write_xyzfile_from_array
+
+# ----- Section headers indexed in a single pass over the output file
+# Every occurrence of each marker is recorded with the byte offset of the line holding it.
+_SECTION_MARKERS = {
+    "optimization": b"Geometry Optimization Run",
+    "energy": b"FINAL SINGLE POINT ENERGY",
+    "coordinates": b"CARTESIAN COORDINATES (ANGSTROEM)",
+    "absorption": b"ABSORPTION SPECTRUM",
+    "cd": b"CD SPECTRUM",
+    "casscf_results": b"CASSCF RESULTS",
+    "casscf_energy": b"Final CASSCF energy",
+    "active_electrons": b"Number of active electrons",
+    "active_orbitals": b"Number of active orbitals",
+    "orbital_ranges": b"Determined orbital ranges",
+    "zpe": b"Zero point energy",
+    "u_correction": b"Total correction",
+    "kbt_correction": b"Thermal Enthalpy correction",
+    "s_correction": b"Final entropy term",
+    "g_correction": b"G-E(el)",
+    "cbs": b"Extrapolated CBS correlation energy",
+    "nfod": b"N_FOD",
+    "extrapolation": b"Extrapolated Energy 2",
+    "e_corr": b"E(CORR)",
+    "t1_diagnostic": b"T1 diagnostic",
+    "final_correlation": b"Final correlation energy",
+    "e_ccsd": b"E(CCSD)",
+    "frequencies": b"VIBRATIONAL FREQUENCIES",
+    "normal_modes": b"NORMAL MODES",
+    "ir_spectrum": b"IR SPECTRUM",
+    "multiplicity": b"Multiplicity           Mult",
+    "total_mass": b"Total Mass",
+    "symmetry_number": b"Symmetry Number",
+    "rotational_constants": b"Rotational constants in cm-1",
+    "orbital_energies": b"ORBITAL ENERGIES",
+    "mulliken_charges": b"MULLIKEN ATOMIC CHARGES",
+    "loewdin_charges": b"LOEWDIN ATOMIC CHARGES",
+    "mayer_bond_orders": b"Mayer bond orders larger than",
+    "dipole": b"Total Dipole Moment",
+}
+_SECTION_NAMES = {marker: name for name, marker in _SECTION_MARKERS.items()}
+_SECTION_PATTERN = re.compile(
+    b"|".join(re.escape(marker) for marker in _SECTION_MARKERS.values())
+)
+
+
+def _index_sections(orcaout_name):
+    """
+    Scan an output file once and return a dictionary with the byte offsets of every known section header.
+    """
+    index = {name: [] for name in _SECTION_MARKERS}
+    if detect_compression(orcaout_name):
+        with open_file(orcaout_name) as out_file:
+            _index_stream(out_file, index)
+        return index
+    with open(orcaout_name, "rb") as out_file:
+        if os.fstat(out_file.fileno()).st_size == 0:
+            return index
+        with mmap.mmap(out_file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for match in _SECTION_PATTERN.finditer(mm):
+                offsets = index[_SECTION_NAMES[match.group()]]
+                offset = mm.rfind(b"\n", 0, match.start()) + 1
+                if not offsets or offsets[-1] != offset:
+                    offsets.append(offset)
+    return index
+
+
+def _index_stream(out_file, index, chunk_size=1 << 24):
+    """
+    Fill the section index from a file object read in chunks, i.e. a decompressing stream which cannot be memory-mapped.
+    Chunks are cut at line ends so every header line is searched whole.
+    """
+    start = 0
+    pending = b""
+    while True:
+        chunk = out_file.read(chunk_size)
+        data = pending + chunk
+        cut = data.rfind(b"\n") + 1 if chunk else len(data)
+        block = data[:cut]
+        for match in _SECTION_PATTERN.finditer(block):
+            offsets = index[_SECTION_NAMES[match.group()]]
+            offset = start + block.rfind(b"\n", 0, match.start()) + 1
+            if not offsets or offsets[-1] != offset:
+                offsets.append(offset)
+        start += cut
+        pending = data[cut:]
+        if not chunk:
+            break
+
+
+# ----- Termination check reading only the end of the output file
+_TERMINATION_MARKER = b"ORCA TERMINATED NORMALLY"
+_RUNTIME_PATTERN = re.compile(
+    rb"TOTAL RUN TIME:\s+(\d+) days (\d+) hours (\d+) minutes (\d+) seconds (\d+) msec"
+)
+
+
+def check_normal_termination(orcaout_name, tail_size=4096):
+    """
+    Check if an ORCA output file terminated normally, memory-mapping the file and reading only its last bytes.
+
+    :param orcaout_name:
+        A string with the name of the output file.
+    :param tail_size=4096:
+        Number of bytes at the end of the file where the termination message is searched.
+    :return normal_termination, runtime:
+        A boolean with the termination status and the runtime of the calculation in seconds (None if not found).
+    """
+    if detect_compression(orcaout_name):
+        # Compressed files can only be read from the start, keeping the last bytes of the stream
+        tail = b""
+        with open_file(orcaout_name) as out_file:
+            for chunk in iter(partial(out_file.read, 1 << 24), b""):
+                tail = (tail + chunk)[-tail_size:]
+        position = tail.rfind(_TERMINATION_MARKER)
+        if position == -1:
+            return False, None
+        match = _RUNTIME_PATTERN.search(tail, position)
+        if not match:
+            return True, None
+        days, hours, minutes, seconds, msec = (float(t) for t in match.groups())
+        return True, days * 86400 + hours * 3600 + minutes * 60 + seconds + msec / 1000
+
+    with open(orcaout_name, "rb") as out_file:
+        size = os.fstat(out_file.fileno()).st_size
+        if size == 0:
+            return False, None
+        with mmap.mmap(out_file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            position = mm.rfind(_TERMINATION_MARKER, max(0, size - tail_size))
+            if position == -1:
+                return False, None
+            match = _RUNTIME_PATTERN.search(mm, position)
+            if not match:
+                return True, None
+            days, hours, minutes, seconds, msec = (float(t) for t in match.groups())
+
+    runtime = days * 86400 + hours * 3600 + minutes * 60 + seconds + msec / 1000
+    return True, runtime
+
+
+def _cached(getter=None, version=1):
+    """
+    Decorator for ORCAOUT getters which stores and looks up their results in the ORCAOUT cache, if any.
+
+    The version is part of the cache key. Bump it whenever the result of the getter changes shape, so results cached
+    by older versions of orcatools are not served, i.e. @_cached(version=2).
+    """
+    if getter is None:
+        return partial(_cached, version=version)
+
+    @wraps(getter)
+    def wrapper(self, *args, **kwargs):
+        if self._cache is None:
+            return getter(self, *args, **kwargs)
+        key = f"{getter.__name__}@v{version}{args!r}{sorted(kwargs.items())!r}"
+        hit, value = self._cache.get(self.orcaout_name, key)
+        if not hit:
+            value = getter(self, *args, **kwargs)
+            self._cache.set(self.orcaout_name, key, value)
+        return value
+
+    return wrapper
 
 
 # ----- Define the OUTPUT class
@@ -7,12 +181,16 @@ class ORCAOUT:
     """
     Class which holds information for a ORCA input object.
 
+    The output file is scanned only once for its section headers, and every getter seeks straight to the section it needs.
+
     :param orcaout_name:
         A string with the name of the output file.
     :param verbose=False:
         Specify verbosity when starting the ORCAOUT class.
     :param function_mode=False:
         Activate function mode, where attributes are not gathered at __init__. Useful for saving time when specific functions are requested.
+    :param cache=None:
+        An orcatools.cache.OutputCache object. When given, the attributes and getter results are stored in and reused from it.
 
     :attribute runtime:
         The runtime of the calculation.
@@ -24,22 +202,27 @@ class ORCAOUT:
         The final coordinates of the system.
     :attribute xyzstr:
         The final coordinates of the system in string format.
+    :attribute molecule:
+        The final coordinates of the system as a Molecule.
     """
 
-    def __init__(self, orcaout_name, verbose=False, function_mode=False):
+    def __init__(self, orcaout_name, verbose=False, function_mode=False, cache=None):
 
         if not os.path.exists(orcaout_name):
             raise FileNotFoundError(f"File {orcaout_name} not found!")
 
         self.orcaout_name = orcaout_name
+        self._index = None
+        self._cache = cache
 
         if not function_mode:
             self.optimization = False
             self.scf_energy = 0
             self.coordinates = []
             self.xyzstr = ""
+            self.molecule = None
             self.runtime = 0
-            self._process_output_file()
+            self.__dict__.update(self._process_output_file())
 
         if verbose:
             print(f"Orca Output -> {os.path.abspath(orcaout_name)}")
@@ -51,6 +234,7 @@ class ORCAOUT:
             print(f"Final SCF Energy (Hartree) = {self.scf_energy:.12f}")
             print(f"Calculation Time = {self.runtime} s")
 
+    @_cached
     def get_thermal_corrections(self):
         """
         Function that returns a dictionary with the thermal correction data from the output file.
@@ -63,46 +247,41 @@ class ORCAOUT:
             "S" - Entropy
             "G" - Gibbs Free Energy
         """
-        with open(self.orcaout_name, "r", encoding="utf8", errors="ignore") as out_file:
-            dic = None
-            for line in out_file:
-                if "Zero point energy" in line:
-                    zpe = float(line.strip().split()[-4])
-                if "Total correction" in line:
-                    u_correction = float(line.strip().split()[-4])
-                if "Thermal Enthalpy correction" in line:
-                    kbt_correction = float(line.strip().split()[-4])
-                    h_correction = u_correction + kbt_correction
-                if "Final entropy term" in line:
-                    s_correction = float(line.strip().split()[-4])
-                if "G-E(el)" in line:
-                    g_correction = float(line.strip().split()[-4])
-            try:
-                dic = {
-                    "ZPE": zpe,
-                    "U": u_correction,
-                    "H": h_correction,
-                    "S": s_correction,
-                    "G": g_correction,
-                }
-            except:
-                raise BaseException(
-                    "We did not find vibrational data in your output. Check your calculation!"
-                )
+        try:
+            zpe = float(self._last_line("zpe").strip().split()[-4])
+            u_correction = float(self._last_line("u_correction").strip().split()[-4])
+            kbt_correction = float(
+                self._last_line("kbt_correction").strip().split()[-4]
+            )
+            h_correction = u_correction + kbt_correction
+            s_correction = float(self._last_line("s_correction").strip().split()[-4])
+            g_correction = float(self._last_line("g_correction").strip().split()[-4])
+        except (AttributeError, IndexError, ValueError):
+            raise BaseException(
+                "We did not find vibrational data in your output. Check your calculation!"
+            )
+
+        dic = {
+            "ZPE": zpe,
+            "U": u_correction,
+            "H": h_correction,
+            "S": s_correction,
+            "G": g_correction,
+        }
 
         return dic
 
+    @_cached
     def get_correlation_cbs(self):
         """
         Function that returns the CBS correlation energy from the output file.
         """
         correction = None
-        with open(self.orcaout_name, "r", encoding="utf8", errors="ignore") as out_file:
-            for line in out_file:
-                if f"Extrapolated CBS correlation energy" in line and "SCF" not in line:
-                    line = line.strip().split()
-                    correction = float(line[-1].replace("(", "").replace(")", ""))
-                    break
+        for line in self._section_lines("cbs"):
+            if "SCF" not in line:
+                line = line.strip().split()
+                correction = float(line[-1].replace("(", "").replace(")", ""))
+                break
         if not correction:
             raise BaseException(
                 "It seems your output is not from a CBS (extrapolate) calculation. Please check it and try again!"
@@ -110,17 +289,17 @@ class ORCAOUT:
 
         return correction
 
+    @_cached
     def get_nfod(self):
         """
         Function that returns the fraction occupation density (FOD) number from the output file.
         """
         n_fod = None
-        with open(self.orcaout_name, "r", encoding="utf8", errors="ignore") as out_file:
-            for line in out_file:
-                if f"N_FOD" in line and "alpha" not in line and "beta" not in line:
-                    line = line.strip().split()
-                    n_fod = float(line[-1])
-                    break
+        for line in self._section_lines("nfod"):
+            if "alpha" not in line and "beta" not in line:
+                line = line.strip().split()
+                n_fod = float(line[-1])
+                break
         if not n_fod:
             raise BaseException(
                 "It seems your output is not from a FOD calculation. Please check it and try again!"
@@ -128,6 +307,7 @@ class ORCAOUT:
 
         return n_fod
 
+    @_cached
     def get_cc_diagnostic(self, extrapolation=False):
         """
         Function that returns the CCSD or CCSD(T) parameters from the output file.
@@ -147,48 +327,40 @@ class ORCAOUT:
                 "The CC diagnostic must be used for Single Point Calculations only."
             )
 
-        with open(self.orcaout_name, "r", encoding="utf8", errors="ignore") as out_file:
-            for line in out_file:
-                if extrapolation:
-                    if "Extrapolated Energy 2" in line:
-                        for line in out_file:
-                            if "E(CORR)" in line:
-                                line = line.strip().split()
-                                e_corr = float(line[-1])
-                            if "T1 diagnostic" in line:
-                                line = line.strip().split()
-                                t1_diagnostic = float(line[-1])
-                                dic = {"corr": e_corr, "t1": t1_diagnostic}
-                            # Only for Triples calculation
-                            if "Final correlation energy" in line:
-                                for line in out_file:
-                                    if "E(CCSD)" in line:
-                                        line = line.strip().split()
-                                        e_ccsd = float(line[-1])
-                                        break
-                else:
-                    if "E(CORR)" in line:
-                        line = line.strip().split()
-                        e_corr = float(line[-1])
-                    if "T1 diagnostic" in line:
-                        line = line.strip().split()
-                        t1_diagnostic = float(line[-1])
-                        dic = {"corr": e_corr, "t1": t1_diagnostic}
-                    # Only for Triples calculation
-                    if "Final correlation energy" in line:
-                        for line in out_file:
-                            if "E(CCSD)" in line:
-                                line = line.strip().split()
-                                e_ccsd = float(line[-1])
-                                break
-
-        dic.update({"ccsd": e_ccsd})
+        index = self._get_index()
+        # With extrapolation only the data after the second extrapolated energy is used
+        start = -1
+        if extrapolation:
+            start = index["extrapolation"][0] if index["extrapolation"] else None
+
+        if start is not None:
+            t1_offsets = [o for o in index["t1_diagnostic"] if o > start]
+            corr_offsets = [
+                o for o in index["e_corr"] if t1_offsets and start < o < t1_offsets[-1]
+            ]
+            if corr_offsets:
+                t1_line, corr_line = self._read_lines_at(
+                    [t1_offsets[-1], corr_offsets[-1]]
+                )
+                dic = {
+                    "corr": float(corr_line.strip().split()[-1]),
+                    "t1": float(t1_line.strip().split()[-1]),
+                }
+                # Only for Triples calculation
+                final_offsets = [o for o in index["final_correlation"] if o > start]
+                if final_offsets:
+                    ccsd_offsets = [o for o in index["e_ccsd"] if o > final_offsets[-1]]
+                    if ccsd_offsets:
+                        line = self._read_lines_at(ccsd_offsets[:1])[0]
+                        dic.update({"ccsd": float(line.strip().split()[-1])})
+
         if not dic:
             raise BaseException(
                 "It seems your output is not from a CCSD or CCSD(T) calculation. Please check it and try again!"
             )
         return dic
 
+    @_cached
     def get_mcscf_correlation(self):
         """
         Function that returns the MCSCF correlation energy from the output file.
@@ -203,22 +375,16 @@ class ORCAOUT:
                 "The MCSCF correlation must be used for Single Point Calculations only."
             )
 
-        with open(self.orcaout_name, "r", encoding="utf8", errors="ignore") as out_file:
-            e_casscf = 0
-            e_corr = None
-
-            for line in out_file:
-                # First the code always do CASSCF and print
-                if "Final CASSCF energy" not in line:
-                    continue
-                else:
-                    e_casscf = float(line.strip().split()[4])
-                    e_corr = self.scf_energy - e_casscf
-                    dic = {
-                        "casscf": e_casscf,
-                        "corr": e_corr,
-                    }
-                    break
+        # First the code always do CASSCF and print
+        casscf_offsets = self._get_index()["casscf_energy"]
+        if casscf_offsets:
+            line = self._read_lines_at(casscf_offsets[:1])[0]
+            e_casscf = float(line.strip().split()[4])
+            e_corr = self.scf_energy - e_casscf
+            dic = {
+                "casscf": e_casscf,
+                "corr": e_corr,
+            }
         if not dic:
             raise BaseException(
                 "It seems your output is not from a NEVPT2, CASPT2 or MRCI calculation. Please check it and try again!"
@@ -226,6 +392,7 @@ class ORCAOUT:
 
         return dic
 
+    @_cached
     def get_absorption_data(self, unit="eV"):
         """
         Function that returns the absorption energies and oscillator strengths from the output file.
@@ -241,31 +408,26 @@ class ORCAOUT:
         e_idx = {"cm": 5, "nm": 6, "eV": 5}
         energies = []
         fosc = []
-        with open(self.orcaout_name, "r", encoding="utf8", errors="ignore") as out_file:
-            in_block = False
-            for line in out_file:
-                if (
-                    "------------------------------------------------------------------------------------------"
-                    in line
-                ):
-                    for line in out_file:
-                        if "ABSORPTION SPECTRUM" in line:
-                            in_block = True
-                        elif in_block and "CD SPECTRUM" in line:
-                            break
-                        elif in_block and "0(" in line:
-                            fo = float(line.split()[7])
-                            E = float(line.split()[e_idx[unit]])
-                            if unit == "eV":
-                                E = E * 0.000123984
-                            energies.append(E)
-                            fosc.append(fo)
+        index = self._get_index()
+        # Each absorption block ends at the next CD SPECTRUM or ABSORPTION SPECTRUM header
+        headers = sorted(index["absorption"] + index["cd"])
+        for offset in index["absorption"]:
+            stop = next((h for h in headers if h > offset), None)
+            for line in self._iter_lines(offset, stop):
+                if "0(" in line:
+                    fo = float(line.split()[7])
+                    E = float(line.split()[e_idx[unit]])
+                    if unit == "eV":
+                        E = E * 0.000123984
+                    energies.append(E)
+                    fosc.append(fo)
         if not energies:
             raise ValueError(
                 "No absorption spectrum values found in the specified output file."
             )
         return energies, fosc
-    
+
+    @_cached
     def get_active_space(self):
         """
         Function that returns the active space (initial and final orbital numbers) from the output file of a CASSCF calculation.
@@ -273,43 +435,47 @@ class ORCAOUT:
         n = None
         m = None
         active_space = None
-        with open(self.orcaout_name, "r", encoding="utf8", errors="ignore") as out_file:
-            for line in out_file:
-                if "Number of active electrons" in line:
-                    n = int(line.strip().split()[-1])
-                if "Number of active orbitals" in line:
-                    m = int(line.strip().split()[-1])
-                if "Determined orbital ranges" in line:
-                    for line in out_file:
-                        if "Active" in line:
-                            active_space = (int(line.strip().split()[1]), int(line.strip().split()[3]))
-                            break
+        index = self._get_index()
+        electrons_line = self._last_line("active_electrons")
+        if electrons_line:
+            n = int(electrons_line.strip().split()[-1])
+        orbitals_line = self._last_line("active_orbitals")
+        if orbitals_line:
+            m = int(orbitals_line.strip().split()[-1])
+        if index["orbital_ranges"]:
+            with closing(self._iter_lines(index["orbital_ranges"][-1])) as lines:
+                for line in lines:
+                    if "Active" in line:
+                        active_space = (int(line.strip().split()[1]), int(line.strip().split()[3]))
+                        break
         if not active_space or not n or not m:
             raise BaseException(
                 "It seems your output is not from a CASSCF calculation. Please check it and try again!"
             )
 
         return n, m, active_space
-    
+
+    @_cached
     def get_occupation_numbers(self):
         """
         Function that returns the occupation numbers from the output file of a CASSCF calculation.
         """
         n, m, active_MOs = self.get_active_space()
-        with open(self.orcaout_name, "r", encoding="utf8", errors="ignore") as out_file:
-            for line in out_file:
-                if "CASSCF RESULTS" in line:
-                    occ_numbers = []
-                    read_active_MOs = False
-                    for line in out_file:
-                        if read_active_MOs and int(line.strip().split()[0]) > active_MOs[1]:
-                            break
-                        if not line.strip():
-                            continue
-                        if line.strip().split()[0] == str(active_MOs[0]):
-                            read_active_MOs = True
-                        if read_active_MOs:
-                            occ_numbers.append(float(line.strip().split()[1]))
+        occ_numbers = []
+        results_offsets = self._get_index()["casscf_results"]
+        if results_offsets:
+            read_active_MOs = False
+            # Closed explicitly, since breaking out of the loop leaves the generator and its file open
+            with closing(self._iter_lines(results_offsets[-1])) as lines:
+                for line in lines:
+                    if not line.strip():
+                        continue
+                    if read_active_MOs and int(line.strip().split()[0]) > active_MOs[1]:
+                        break
+                    if line.strip().split()[0] == str(active_MOs[0]):
+                        read_active_MOs = True
+                    if read_active_MOs:
+                        occ_numbers.append(float(line.strip().split()[1]))
         if not occ_numbers:
             raise BaseException(
                 "It seems your output is not from a CASSCF calculation. Please check it and try again!"
@@ -317,38 +483,851 @@ class ORCAOUT:
 
         return occ_numbers
 
+    def follow(self, interval=5.0, timeout=None, process=None):
+        """
+        Follow a running calculation, yielding events as new lines are appended to the output file.
+        Use it with function_mode=True, since unfinished outputs are refused otherwise.
+
+        After ORCA TERMINATED NORMALLY the file is still read until the TOTAL RUN TIME line fills the runtime of the
+        termination event, or until the file stops growing (once process finished, when it is given).
+
+        :param interval=5.0:
+            Time in seconds between checks of the output file.
+        :param timeout=None:
+            Maximum time in seconds to follow the file. Default: until the calculation terminates.
+        :param process=None:
+            The subprocess.Popen object running ORCA, if any.
+
+        :return: A generator of (kind, data) event tuples. See OutputFollower for the event kinds.
+        """
+        follower = OutputFollower(self.orcaout_name)
+        start = time.monotonic()
+        while True:
+            # Checked before reading, so the file is read up to its end after the process exits
+            finished = process is not None and process.poll() is not None
+            offset = follower.offset
+            yield from follower.poll()
+            if follower.terminated and follower.runtime_pending:
+                if finished or (process is None and follower.offset == offset):
+                    return
+            elif follower.terminated:
+                return
+            if timeout is not None and time.monotonic() - start > timeout:
+                return
+            time.sleep(interval)
+
+    def get_trajectory(self, xyz_file=None):
+        """
+        Function that returns every geometry of the output file, such as all the steps of a geometry optimization.
+
+        :param xyz_file=None:
+            A string with the name of a multi-frame .xyz file where the trajectory is also written.
+
+        :return: Tuple (coordinates, energies, elements)
+
+        1. Array of shape (nsteps, natoms, 3) with the coordinates in Angstroem
+        2. Array of shape (nsteps,) with the final single point energy of each step (nan if not found)
+        3. List with the element symbols
+        """
+        index = self._get_index()
+        coordinates_offsets = index["coordinates"]
+        if not coordinates_offsets:
+            raise BaseException(
+                "No cartesian coordinates found in your output. Check your calculation!"
+            )
+
+        # Energy of a step is the first one printed before the next geometry
+        energy_offsets = []
+        bounds = coordinates_offsets[1:] + [float("inf")]
+        energies_iter = iter(index["energy"])
+        energy = next(energies_iter, None)
+        for start, stop in zip(coordinates_offsets, bounds):
+            while energy is not None and energy < start:
+                energy = next(energies_iter, None)
+            energy_offsets.append(energy if energy is not None and energy < stop else None)
+
+        rows = []
+        natoms = None
+        with open_file(self.orcaout_name) as out_file:
+            for offset in coordinates_offsets:
+                out_file.seek(offset)
+                # Skip the header and the dashed line below it
+                out_file.readline()
+                out_file.readline()
+                block = []
+                for line in out_file:
+                    if not line.strip():
+                        break
+                    block.append(line)
+                if natoms is None:
+                    natoms = len(block)
+                elif len(block) != natoms:
+                    raise BaseException(
+                        "The number of atoms changes along your output. Check your calculation!"
+                    )
+                rows += block
+            energy_lines = [None] * len(energy_offsets)
+            for i, offset in enumerate(energy_offsets):
+                if offset is not None:
+                    out_file.seek(offset)
+                    energy_lines[i] = out_file.readline()
+
+        tokens = np.array(b"".join(rows).split()).reshape(len(coordinates_offsets), natoms, 4)
+        coordinates = tokens[:, :, 1:].astype(float)
+        elements = [symbol.decode() for symbol in tokens[0, :, 0]]
+        energies = np.array(
+            [float(line.split()[-1]) if line else np.nan for line in energy_lines]
+        )
+
+        if xyz_file:
+            titles = [
+                f"Step {step + 1} E = {energy:.12f}"
+                for step, energy in enumerate(energies)
+            ]
+            write_xyzfile_from_array(elements, coordinates, xyz_file, titles=titles)
+
+        return coordinates, energies, elements
+
+    @_cached
+    def get_molecule(self, step=-1):
+        """
+        Function that returns a single geometry of the output file as a Molecule. It does not require a normal termination,
+        so the last geometry of a crashed optimization can be recovered.
+
+        :param step=-1:
+            Index of the geometry in the output, i.e. -1 for the last one.
+        """
+        coordinates_offsets = self._get_index()["coordinates"]
+        if not coordinates_offsets:
+            raise BaseException(
+                "No cartesian coordinates found in your output. Check your calculation!"
+            )
+        coordinates = []
+        with closing(self._iter_lines(coordinates_offsets[step])) as lines:
+            # Skip the header and the dashed line below it
+            next(lines)
+            next(lines)
+            for line in lines:
+                if line.strip() == "":
+                    break
+                coordinates.append(line.strip())
+        return Molecule.from_xyz(coordinates)
+
+    @_cached
+    def get_frequencies(self):
+        """
+        Function that returns the vibrational frequencies from the output file, including the zero ones of translations and rotations.
+
+        :return: Array of shape (nmodes,) with the frequencies in cm-1. Imaginary modes have negative frequencies.
+        """
+        frequencies = _FREQUENCY_PATTERN.findall(self._section_bytes("frequencies"))
+        if not frequencies:
+            raise BaseException(
+                "We did not find vibrational data in your output. Check your calculation!"
+            )
+        return np.array(frequencies, dtype=float)
+
+    @_cached
+    def get_normal_modes(self):
+        """
+        Function that returns the normal modes from the output file, as the mass weighted Cartesian displacements printed by ORCA.
+
+        :return: Array of shape (nmodes, natoms, 3) with the displacements of each mode.
+        """
+        nmodes = len(self.get_frequencies())
+        offsets = self._get_index()["normal_modes"]
+        if not offsets:
+            raise BaseException(
+                "We did not find the normal modes in your output. Check your calculation!"
+            )
+        with open_file(self.orcaout_name) as out_file:
+            out_file.seek(offsets[-1])
+            # Skip the explanation text up to the first line of column numbers
+            while True:
+                header = out_file.readline()
+                if not header:
+                    # Truncated output, or one still being written
+                    raise BaseException(
+                        "We did not find the normal modes in your output. Check your calculation!"
+                    )
+                tokens = header.split()
+                if tokens and all(token.isdigit() for token in tokens):
+                    break
+            modes = _read_blocked_matrix(out_file, nmodes, nmodes, header)
+        return modes.T.reshape(nmodes, nmodes // 3, 3)
+
+    @_cached
+    def get_ir_spectrum(self):
+        """
+        Function that returns the IR spectrum from the output file.
+
+        :return: Dictionary of arrays with the following keys:
+            "modes" - Mode numbers
+            "frequencies" - Frequencies in cm-1
+            "eps" - Molar absorption coefficients in L/(mol*cm)
+            "intensities" - Intensities in km/mol
+            "t2" - Squared transition dipoles in a.u.
+            "tdm" - Transition dipoles (TX, TY, TZ) in a.u., shape (nmodes, 3)
+        """
+        rows = _IR_PATTERN.findall(self._section_bytes("ir_spectrum"))
+        if not rows:
+            raise BaseException(
+                "We did not find an IR spectrum in your output. Check your calculation!"
+            )
+        table = np.array(rows, dtype=float)
+        return {
+            "modes": table[:, 0].astype(int),
+            "frequencies": table[:, 1],
+            "eps": table[:, 2],
+            "intensities": table[:, 3],
+            "t2": table[:, 4],
+            "tdm": table[:, 5:8],
+        }
+
+    @_cached
+    def get_thermo_data(self):
+        """
+        Function that returns the data needed to recompute the thermochemistry of a frequency calculation (see orcatools.thermo).
+
+        :return:
+            A dictionary with the following keys:
+            "frequencies" - Array with the vibrational frequencies in cm-1
+            "mass" - Total mass in amu
+            "rotational_constants" - Array with the rotational constants in cm-1
+            "symmetry_number" - Rotational symmetry number (1 if not printed)
+            "multiplicity" - Spin multiplicity (1 if not printed)
+            "electronic_energy" - The final single point energy in Hartree
+        """
+        mass_line = self._last_line("total_mass")
+        rotational_line = self._last_line("rotational_constants")
+        if not mass_line or not rotational_line:
+            raise BaseException(
+                "We did not find vibrational data in your output. Check your calculation!"
+            )
+        symmetry_line = self._last_line("symmetry_number")
+        multiplicity_line = self._last_line("multiplicity")
+        energy_line = self._last_line("energy")
+        return {
+            "frequencies": self.get_frequencies(),
+            "mass": float(mass_line.split()[-2]),
+            "rotational_constants": np.array(rotational_line.split()[-3:], dtype=float),
+            "symmetry_number": int(symmetry_line.split()[-1]) if symmetry_line else 1,
+            "multiplicity": int(multiplicity_line.split()[-1]) if multiplicity_line else 1,
+            "electronic_energy": float(energy_line.split()[-1]) if energy_line else np.nan,
+        }
+
+    @_cached
+    def get_orbital_energies(self):
+        """
+        Function that returns the last printed orbital energies and occupations from the output file.
+
+        :return:
+            A dictionary with the following keys:
+            "energies" - Array of shape (nspin, norbitals) with the orbital energies in Hartree
+            "occupations" - Array of shape (nspin, norbitals) with the occupation numbers
+            where nspin is 1 for restricted and 2 (alpha, beta) for unrestricted calculations.
+        """
+        tables = _ORBITAL_TABLE_PATTERN.findall(self._section_bytes("orbital_energies"))
+        if not tables:
+            raise BaseException(
+                "We did not find the orbital energies in your output. Check your calculation!"
+            )
+        tables = [np.fromstring(table.decode(), sep=" ").reshape(-1, 4) for table in tables[:2]]
+        return {
+            "energies": np.array([table[:, 2] for table in tables]),
+            "occupations": np.array([table[:, 1] for table in tables]),
+        }
+
+    @_cached
+    def get_homo_lumo(self):
+        """
+        Function that returns the frontier orbital energies from the output file. For unrestricted calculations,
+        the highest occupied and lowest unoccupied orbitals of both spins are used.
+
+        :return:
+            A dictionary with the following keys:
+            "homo" - HOMO energy in Hartree
+            "lumo" - LUMO energy in Hartree (nan if there are no virtual orbitals)
+            "gap" - HOMO-LUMO gap in Hartree
+        """
+        orbitals = self.get_orbital_energies()
+        occupied = orbitals["occupations"] > 0
+        homo = orbitals["energies"][occupied].max()
+        virtuals = orbitals["energies"][~occupied]
+        lumo = virtuals.min() if virtuals.size else np.nan
+        return {"homo": float(homo), "lumo": float(lumo), "gap": float(lumo - homo)}
+
+    # Version 2 fixed the Loewdin table running into the reduced orbital charges
+    @_cached(version=2)
+    def get_charges(self, method="mulliken"):
+        """
+        Function that returns the atomic charges (and spin populations) of a population analysis from the output file.
+
+        :param method="mulliken":
+            The population analysis. Options are "mulliken" and "loewdin".
+        :return:
+            A dictionary with the following keys:
+            "elements" - List with the element symbols
+            "charges" - Array with the atomic charges
+            "spin_populations" - Array with the atomic spin populations, or None for closed shell calculations
+        """
+        if method not in ("mulliken", "loewdin"):
+            raise ValueError('The population analysis must be "mulliken" or "loewdin".')
+        # Only the first block of consecutive rows, since the reduced orbital charges which follow use a similar format
+        table = _CHARGE_TABLE_PATTERN.search(self._section_bytes(f"{method}_charges"))
+        rows = _CHARGE_PATTERN.findall(table.group()) if table else []
+        if not rows:
+            raise BaseException(
+                f"We did not find {method.capitalize()} charges in your output. Check your calculation!"
+            )
+        spin = [row[3] for row in rows]
+        return {
+            "elements": [row[1].decode() for row in rows],
+            "charges": np.array([row[2] for row in rows], dtype=float),
+            "spin_populations": np.array(spin, dtype=float) if all(spin) else None,
+        }
+
+    @_cached
+    def get_mayer_bond_orders(self):
+        """
+        Function that returns the Mayer bond orders printed in the output file (only the ones above ORCA's print threshold).
+
+        :return:
+            A dictionary with the following keys:
+            "pairs" - Integer array of shape (nbonds, 2) with the atom indices of each bond (counting from 0)
+            "orders" - Array with the bond orders
+        """
+        data = self._section_bytes("mayer_bond_orders")
+        end = data.find(b"\n\n")
+        rows = _MAYER_PATTERN.findall(data if end < 0 else data[:end])
+        if not rows:
+            raise BaseException(
+                "We did not find Mayer bond orders in your output. Check your calculation!"
+            )
+        table = np.array(rows, dtype=float)
+        return {"pairs": table[:, :2].astype(int), "orders": table[:, 2]}
+
+    @_cached
+    def get_dipole_moment(self):
+        """
+        Function that returns the total dipole moment from the output file.
+
+        :return:
+            A dictionary with the following keys:
+            "vector" - Array with the X, Y and Z components in a.u.
+            "magnitude" - Magnitude in a.u.
+            "magnitude_debye" - Magnitude in Debye
+        """
+        data = self._section_bytes("dipole")
+        vector = _DIPOLE_PATTERN.search(data)
+        if not vector:
+            raise BaseException(
+                "We did not find the dipole moment in your output. Check your calculation!"
+            )
+        magnitude = re.search(rb"Magnitude \(a\.u\.\)\s*:\s*(\S+)", data)
+        debye = re.search(rb"Magnitude \(Debye\)\s*:\s*(\S+)", data)
+        vector = np.array(vector.groups(), dtype=float)
+        return {
+            "vector": vector,
+            "magnitude": float(magnitude.group(1)) if magnitude else float(np.linalg.norm(vector)),
+            "magnitude_debye": float(debye.group(1)) if debye else None,
+        }
+
+    def _section_bytes(self, name):
+        """
+        Return the raw bytes from the last occurrence of an indexed section up to the next indexed section (or the end of the file).
+        """
+        index = self._get_index()
+        if not index[name]:
+            return b""
+        start = index[name][-1]
+        following = [o for offsets in index.values() for o in offsets if o > start]
+        with open_file(self.orcaout_name) as out_file:
+            out_file.seek(start)
+            return out_file.read(min(following) - start if following else -1)
+
+    def _get_index(self):
+        """
+        Return the section index of the output file, scanning the file on first use.
+        """
+        if self._index is None:
+            hit = False
+            if self._cache is not None:
+                hit, self._index = self._cache.get(self.orcaout_name, "_index")
+            # Indexes cached by older versions may miss newer sections
+            if not hit or self._index.keys() != _SECTION_MARKERS.keys():
+                self._index = _index_sections(self.orcaout_name)
+                if self._cache is not None:
+                    self._cache.set(self.orcaout_name, "_index", self._index)
+        return self._index
+
+    def _iter_lines(self, offset, stop=None):
+        """
+        Yield the lines of the output file from byte offset up to byte offset stop (end of file by default).
+        """
+        with open_file(self.orcaout_name) as out_file:
+            out_file.seek(offset)
+            for line in out_file:
+                if stop is not None and offset >= stop:
+                    break
+                offset += len(line)
+                yield line.decode("utf8", errors="ignore")
+
+    def _read_lines_at(self, offsets):
+        """
+        Return a list with the lines starting at each of the byte offsets.
+        """
+        lines = []
+        with open_file(self.orcaout_name) as out_file:
+            for offset in offsets:
+                out_file.seek(offset)
+                lines.append(out_file.readline().decode("utf8", errors="ignore"))
+        return lines
+
+    def _section_lines(self, name):
+        """
+        Return the header line of every occurrence of an indexed section.
+        """
+        return self._read_lines_at(self._get_index()[name])
+
+    def _last_line(self, name):
+        """
+        Return the header line of the last occurrence of an indexed section, or None if it is absent.
+        """
+        lines = self._read_lines_at(self._get_index()[name][-1:])
+        return lines[0] if lines else None
+
+    # Version 2 added the molecule attribute
+    @_cached(version=2)
     def _process_output_file(self):
-        with open(self.orcaout_name, "r", encoding="utf8", errors="ignore") as out_file:
-
-            lines = out_file.readlines()
-            for line in reversed(lines):
-                if line.strip():  # Skip blank lines
-                    if "ORCA TERMINATED NORMALLY" in line:
-                        normal_termination = True
-                        clock = lines[lines.index(line) + 1].split()[3:]
-                        self.runtime = (
-                            float(clock[0]) * 86400
-                            + float(clock[2]) * 3600
-                            + float(clock[4]) * 60
-                            + float(clock[6])
-                            + float(clock[8]) / 1000
-                        )
+        """
+        Gather the main attributes of the output file and return them in a dictionary.
+        """
+        attributes = {}
+        normal_termination, runtime = check_normal_termination(self.orcaout_name)
+        if not normal_termination:
+            raise BaseException(
+                """Your ORCA output file did not have a normal termination! Check your calculation and try again."""
+            )
+        if runtime is not None:
+            attributes["runtime"] = runtime
+
+        index = self._get_index()
+        attributes["optimization"] = bool(index["optimization"])
+        if index["energy"]:
+            attributes["scf_energy"] = float(self._last_line("energy").split()[-1])
+        if index["coordinates"]:
+            coordinates = []
+            xyzstr = ""
+            with closing(self._iter_lines(index["coordinates"][-1])) as lines:
+                # Skip the header and the dashed line below it
+                next(lines)
+                next(lines)
+                for line in lines:
+                    if line.strip() == "":
                         break
-            if not normal_termination:
-                raise BaseException(
-                    """Your ORCA output file did not have a normal termination! Check your calculation and try again."""
+                    coordinates.append(line.strip())
+                    xyzstr += line
+            attributes["coordinates"] = coordinates
+            attributes["xyzstr"] = xyzstr
+            attributes["molecule"] = Molecule.from_xyz(coordinates)
+
+        return attributes
+
+
+# ----- Vibrational data and Hessian files
+_FREQUENCY_PATTERN = re.compile(rb"^\s*\d+:\s+(-?\d+\.\d+)\s+cm\*\*-1", re.MULTILINE)
+_IR_PATTERN = re.compile(
+    rb"^\s*(\d+):\s+(-?\d+\.\d+)\s+(\S+)\s+(\S+)\s+(\S+)\s+\(\s*(\S+)\s+(\S+)\s+(\S+)\s*\)",
+    re.MULTILINE,
+)
+
+
+# ----- Orbital energies and population analysis
+_ORBITAL_TABLE_PATTERN = re.compile(
+    rb"NO\s+OCC\s+E\(Eh\)\s+E\(eV\)[ \t]*\r?\n((?:[ \t]*\d+[ \t]+-?\d+\.\d+[ \t]+-?\d+\.\d+[ \t]+-?\d+\.\d+[ \t]*\r?\n)+)"
+)
+_CHARGE_PATTERN = re.compile(
+    rb"^[ \t]*(\d+)[ \t]+([A-Za-z]+)[ \t]*:[ \t]+(-?\d+\.\d+)(?:[ \t]+(-?\d+\.\d+))?", re.MULTILINE
+)
+_CHARGE_TABLE_PATTERN = re.compile(
+    rb"(?:^[ \t]*\d+[ \t]+[A-Za-z]+[ \t]*:[ \t]+-?\d+\.\d+(?:[ \t]+-?\d+\.\d+)?[ \t]*\r?\n)+", re.MULTILINE
+)
+_MAYER_PATTERN = re.compile(
+    rb"B\(\s*(\d+)-\s*[A-Za-z]+\s*,\s*(\d+)-\s*[A-Za-z]+\s*\)\s*:\s*(-?\d+\.\d+)"
+)
+_DIPOLE_PATTERN = re.compile(
+    rb"Total Dipole Moment\s*:\s*(-?\d+\.\d+)\s+(-?\d+\.\d+)\s+(-?\d+\.\d+)"
+)
+
+
+def _read_blocked_matrix(file_handle, nrows, ncols, header=None):
+    """
+    Read a matrix printed by ORCA in blocks of columns, each one a line with the column numbers followed by one line per row.
+    The file must be positioned at the first column numbers line, or right after it when that line is given as header.
+    Only one block is held in memory as text.
+    """
+    matrix = np.empty((nrows, ncols))
+    column = 0
+    while column < ncols:
+        if header is None:
+            header = file_handle.readline()
+        if not header:
+            raise BaseException("The matrix ended before all its columns were read!")
+        if not header.strip():
+            header = None
+            continue
+        width = len(header.split())
+        block = np.fromstring(b"".join(islice(file_handle, nrows)).decode(), sep=" ")
+        if block.size != nrows * (width + 1):
+            raise BaseException(f"Malformed matrix block starting at column {column}!")
+        matrix[:, column : column + width] = block.reshape(nrows, width + 1)[:, 1:]
+        column += width
+        header = None
+    return matrix
+
+
+def _read_table(file_handle, nrows):
+    return np.fromstring(b"".join(islice(file_handle, nrows)).decode(), sep=" ").reshape(nrows, -1)
+
+
+def read_hess(hess_file):
+    """
+    Read an ORCA .hess file, streaming the Hessian and normal modes block by block into arrays.
+
+    :param hess_file:
+        A string with the .hess file name.
+    :return:
+        A dictionary with the sections found in the file:
+        "hessian" - Array of shape (3N, 3N) with the Cartesian Hessian in Hartree/Bohr^2
+        "frequencies" - Array with the vibrational frequencies in cm-1
+        "normal_modes" - Array of shape (nmodes, natoms, 3) with the normal mode displacements
+        "elements", "masses", "coordinates" - The atoms, their masses and an (natoms, 3) array of positions in Bohr
+        "energy", "temperature", "scale_factor" - The $act_energy, $actual_temperature and $frequency_scale_factor values
+        "dipole_derivatives" - Array of shape (3N, 3)
+        "ir_spectrum" - Array with one row per mode, as in the file
+    """
+    if not os.path.isfile(hess_file):
+        raise BaseException("The .hess file does not exist!")
+
+    data = {}
+    scalars = {
+        "act_energy": "energy",
+        "actual_temperature": "temperature",
+        "frequency_scale_factor": "scale_factor",
+    }
+    with open_file(hess_file) as hess:
+        for line in hess:
+            if not line.startswith(b"$"):
+                continue
+            section = line.strip()[1:].decode().lower()
+            if section == "end":
+                break
+            if section in ("hessian", "normal_modes"):
+                shape = [int(x) for x in hess.readline().split()]
+                matrix = _read_blocked_matrix(hess, shape[0], shape[-1])
+                if section == "normal_modes":
+                    matrix = matrix.T.reshape(shape[-1], shape[0] // 3, 3)
+                data[section] = matrix
+            elif section == "atoms":
+                natoms = int(hess.readline())
+                rows = [hess.readline().split() for _ in range(natoms)]
+                data["elements"] = [row[0].decode() for row in rows]
+                table = np.array([row[1:5] for row in rows], dtype=float)
+                data["masses"] = table[:, 0]
+                data["coordinates"] = table[:, 1:]
+            elif section in ("vibrational_frequencies", "dipole_derivatives", "ir_spectrum"):
+                table = _read_table(hess, int(hess.readline().split()[0]))
+                if section == "vibrational_frequencies":
+                    data["frequencies"] = table[:, -1]
+                else:
+                    data[section] = table
+            elif section in scalars:
+                data[scalars[section]] = float(hess.readline())
+
+    return data
+
+
+# ----- Incremental parsing of running calculations
+_SCF_ITERATION_PATTERN = re.compile(rb"^\s*(\d+)\s+(-?\d+\.\d+)\s")
+_SCF_END_MARKERS = (b"SCF CONVERGED", b"TOTAL SCF ENERGY", b"FINAL SINGLE POINT ENERGY")
+_OPTIMIZATION_CYCLE_PATTERN = re.compile(rb"GEOMETRY OPTIMIZATION CYCLE\s+(\d+)")
+_CONVERGENCE_MARKER = b"|Geometry convergence|"
+_ERROR_TERMINATION_MARKER = b"ORCA finished by error termination"
+
+
+class OutputFollower:
+    """
+    Incremental parser of a running ORCA output file. Each call to poll parses only the bytes appended since the previous call.
+
+    Events are tuples (kind, data) where data is a dictionary. The kinds are:
+    "scf_iteration" - {"iteration", "energy"}
+    "energy" - {"energy"} for every FINAL SINGLE POINT ENERGY
+    "geometry" - {"elements", "coordinates"} with coordinates as an (natoms, 3) array
+    "optimization_cycle" - {"cycle"}
+    "convergence" - {item: value} from the geometry convergence table, i.e. "Energy change", "RMS gradient", "MAX gradient",
+                    given once the whole table was read
+    "termination" - {"normal", "runtime"}, where the runtime is filled in the same dictionary once its line is read
+
+    The state of blocks still being read is kept between calls, so the file may grow by any number of bytes at a time.
+
+    :param orcaout_name:
+        A string with the name of the output file.
+    :param chunk_size=16777216:
+        Maximum number of bytes read at once.
+    """
+
+    def __init__(self, orcaout_name, chunk_size=1 << 24):
+        self.orcaout_name = orcaout_name
+        self.chunk_size = chunk_size
+        self.offset = 0
+        self.terminated = False
+        self._reset()
+
+    def _reset(self):
+        self._partial = b""
+        self._mode = None
+        self._block = []
+        self._convergence = None
+        self._termination = None
+
+    @property
+    def runtime_pending(self):
+        """
+        Boolean that tells if a normal termination was read but its TOTAL RUN TIME line was not yet.
+        """
+        return self._mode == "termination"
+
+    def poll(self):
+        """
+        Parse the lines appended to the output file since the last call.
+
+        :return: A list with the new events.
+        """
+        events = []
+        if not os.path.exists(self.orcaout_name):
+            return events
+        with open(self.orcaout_name, "rb") as out_file:
+            size = os.fstat(out_file.fileno()).st_size
+            # The file was truncated or replaced, start over
+            if size < self.offset:
+                self.offset = 0
+                self.terminated = False
+                self._reset()
+            out_file.seek(self.offset)
+            while self.offset < size:
+                chunk = out_file.read(min(self.chunk_size, size - self.offset))
+                if not chunk:
+                    break
+                self.offset += len(chunk)
+                lines = (self._partial + chunk).split(b"\n")
+                # Keep the last incomplete line for the next read
+                self._partial = lines.pop()
+                for line in lines:
+                    self._parse_line(line, events)
+        return events
+
+    def _parse_line(self, line, events):
+        mode = self._mode
+        if mode == "scf":
+            match = _SCF_ITERATION_PATTERN.match(line)
+            if match:
+                events.append(
+                    (
+                        "scf_iteration",
+                        {"iteration": int(match.group(1)), "energy": float(match.group(2))},
+                    )
+                )
+                return
+            if any(marker in line for marker in _SCF_END_MARKERS):
+                self._mode = None
+        elif mode == "coordinates":
+            if line.strip(b" -\r"):
+                self._block.append(line.split())
+                return
+            if self._block:
+                events.append(
+                    (
+                        "geometry",
+                        {
+                            "elements": [row[0].decode() for row in self._block],
+                            "coordinates": np.array(
+                                [row[1:4] for row in self._block]
+                            ).astype(float),
+                        },
+                    )
+                )
+                self._block = []
+                self._mode = None
+            # Blank lines before the coordinates are still part of the header
+            if not line.strip():
+                return
+        elif mode == "convergence":
+            content = line.split()
+            if content and content[-1] in (b"YES", b"NO"):
+                item = b" ".join(content[:-3]).decode()
+                self._convergence[item] = float(content[-3])
+                return
+            if not line.strip() or line.strip().startswith(b"...."):
+                events.append(("convergence", self._convergence))
+                self._convergence = None
+                self._mode = None
+            return
+        elif mode == "termination":
+            match = _RUNTIME_PATTERN.search(line)
+            if match:
+                days, hours, minutes, seconds, msec = (float(t) for t in match.groups())
+                self._termination["runtime"] = (
+                    days * 86400 + hours * 3600 + minutes * 60 + seconds + msec / 1000
+                )
+                self._mode = None
+            return
+
+        if b"SCF ITERATIONS" in line:
+            self._mode = "scf"
+        elif _SECTION_MARKERS["coordinates"] in line:
+            self._mode = "coordinates"
+            self._block = []
+        elif _SECTION_MARKERS["energy"] in line:
+            events.append(("energy", {"energy": float(line.split()[-1])}))
+        elif _OPTIMIZATION_CYCLE_PATTERN.search(line):
+            cycle = int(_OPTIMIZATION_CYCLE_PATTERN.search(line).group(1))
+            events.append(("optimization_cycle", {"cycle": cycle}))
+        elif _CONVERGENCE_MARKER in line:
+            self._mode = "convergence"
+            self._convergence = {}
+        elif _TERMINATION_MARKER in line:
+            self._mode = "termination"
+            self.terminated = True
+            self._termination = {"normal": True, "runtime": None}
+            events.append(("termination", self._termination))
+        elif _ERROR_TERMINATION_MARKER in line:
+            self.terminated = True
+            events.append(("termination", {"normal": False, "runtime": None}))
+
+
+# ----- Batch parsing of many output files
+# Fields that can be requested from parse_many, given as attributes or getters of ORCAOUT.
+_BATCH_FIELDS = {
+    "scf_energy": lambda out: out.scf_energy,
+    "runtime": lambda out: out.runtime,
+    "optimization": lambda out: out.optimization,
+    "coordinates": lambda out: out.coordinates,
+    "xyzstr": lambda out: out.xyzstr,
+    "molecule": lambda out: out.molecule,
+    "thermal_corrections": ORCAOUT.get_thermal_corrections,
+    "correlation_cbs": ORCAOUT.get_correlation_cbs,
+    "nfod": ORCAOUT.get_nfod,
+    "cc_diagnostic": ORCAOUT.get_cc_diagnostic,
+    "mcscf_correlation": ORCAOUT.get_mcscf_correlation,
+    "absorption_data": ORCAOUT.get_absorption_data,
+    "active_space": ORCAOUT.get_active_space,
+    "occupation_numbers": ORCAOUT.get_occupation_numbers,
+    "frequencies": ORCAOUT.get_frequencies,
+    "ir_spectrum": ORCAOUT.get_ir_spectrum,
+    "thermo_data": ORCAOUT.get_thermo_data,
+    "orbital_energies": ORCAOUT.get_orbital_energies,
+    "homo_lumo": ORCAOUT.get_homo_lumo,
+    "mulliken_charges": partial(ORCAOUT.get_charges, method="mulliken"),
+    "loewdin_charges": partial(ORCAOUT.get_charges, method="loewdin"),
+    "mayer_bond_orders": ORCAOUT.get_mayer_bond_orders,
+    "dipole_moment": ORCAOUT.get_dipole_moment,
+}
+_DEFAULT_BATCH_FIELDS = ["scf_energy", "runtime", "optimization"]
+
+
+def _parse_output(orcaout_name, fields):
+    """
+    Parse a single output file into a row dictionary, storing any error message instead of raising it.
+    """
+    row = {field: None for field in fields}
+    errors = []
+    try:
+        out = ORCAOUT(orcaout_name)
+    except (KeyboardInterrupt, SystemExit):
+        raise
+    except BaseException as error:
+        return row, str(error)
+    for field in fields:
+        try:
+            row[field] = _BATCH_FIELDS[field](out)
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except BaseException as error:
+            errors.append(f"{field}: {error}")
+    return row, "; ".join(errors) or None
+
+
+def iter_parse_many(paths, fields=None, workers=None, chunk_size=1000):
+    """
+    Parse many ORCA output files over a process pool, yielding the results in columnar chunks.
+
+    :param paths:
+        An iterable with the output file names. It is consumed lazily, one chunk at a time.
+    :param fields=None:
+        A list with the fields to gather. Default: ["scf_energy", "runtime", "optimization"].
+        Options are "scf_energy", "runtime", "optimization", "coordinates", "xyzstr", "molecule", "thermal_corrections", "correlation_cbs",
+        "nfod", "cc_diagnostic", "mcscf_correlation", "absorption_data", "active_space", "occupation_numbers",
+        "frequencies", "ir_spectrum", "thermo_data", "orbital_energies", "homo_lumo", "mulliken_charges", "loewdin_charges",
+        "mayer_bond_orders" and "dipole_moment".
+    :param workers=None:
+        Number of worker processes. Default: number of CPUs. With workers=1 the files are parsed in the current process.
+    :param chunk_size=1000:
+        Number of files parsed per chunk, which bounds the memory used.
+    :return:
+        A generator of dictionaries with the keys "path", "error" and one key per field, each holding a list with one value per file.
+        Files which failed to parse have None values and their error message in the "error" column.
+    """
+    if fields is None:
+        fields = _DEFAULT_BATCH_FIELDS
+    unknown = [field for field in fields if field not in _BATCH_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields requested: {', '.join(unknown)}")
+
+    workers = workers or os.cpu_count() or 1
+    worker = partial(_parse_output, fields=fields)
+    paths = iter(paths)
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        while True:
+            chunk = list(islice(paths, chunk_size))
+            if not chunk:
+                break
+            if executor:
+                rows = executor.map(
+                    worker, chunk, chunksize=max(1, len(chunk) // (4 * workers))
                 )
+            else:
+                rows = map(worker, chunk)
+            table = {"path": chunk, "error": []}
+            table.update({field: [] for field in fields})
+            for row, error in rows:
+                table["error"].append(error)
+                for field in fields:
+                    table[field].append(row[field])
+            yield table
+    finally:
+        if executor:
+            executor.shutdown()
 
-            for i, line in enumerate(lines):
-                if "Geometry Optimization Run" in line:
-                    self.optimization = True
-                if "FINAL SINGLE POINT ENERGY" in line:
-                    self.scf_energy = float(line.split()[-1])
-                if "CARTESIAN COORDINATES (ANGSTROEM)" in line:
-                    self.coordinates = []
-                    self.xyzstr = ""
-                    for j in range(i + 2, len(lines)):
-                        if lines[j].strip() == "":
-                            break
-                        self.coordinates.append(lines[j].strip())
-                        self.xyzstr += lines[j]
+
+def parse_many(paths, fields=None, workers=None, chunk_size=1000):
+    """
+    Parse many ORCA output files over a process pool and return a single columnar table.
+
+    See iter_parse_many for the parameters. For very large sets of files prefer iter_parse_many, which keeps only one chunk in memory.
+
+    :return:
+        A dictionary with the keys "path", "error" and one key per field, each holding a list with one value per file.
+    """
+    table = None
+    for chunk in iter_parse_many(paths, fields, workers, chunk_size):
+        if table is None:
+            table = chunk
+        else:
+            for key, values in chunk.items():
+                table[key].extend(values)
+    if table is None:
+        table = {"path": [], "error": []}
+        table.update({field: [] for field in fields or _DEFAULT_BATCH_FIELDS})
+    return table
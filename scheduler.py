@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+import os
+import threading
+from concurrent.futures import Future
+
+from orcatools.orcarun import run
+
+
+def _total_memory():
+    """
+    Return the physical memory of the machine in MB.
+    """
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 1024**2
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+class Scheduler:
+    """
+    Local scheduler which runs many ORCA calculations at once, packing them onto the available cores and memory.
+
+    Jobs start in submission order as soon as their cores and memory (nprocs * maxcore) fit in what is left,
+    and smaller jobs may start ahead of larger ones waiting for resources.
+
+    :param cores=None:
+        Number of cores available for the calculations. Default: all the cores of the machine.
+    :param memory=None:
+        Memory available for the calculations in MB. Default: all the physical memory of the machine.
+    :param run_kwargs:
+        Extra keyword arguments for orcatools.orcarun.run, such as orca and scratch.
+
+    Example:
+        with Scheduler(cores=128) as scheduler:
+            futures = [scheduler.submit(inp) for inp in inputs]
+        results = [future.result() for future in futures]
+    """
+
+    def __init__(self, cores=None, memory=None, **run_kwargs):
+        self.cores = cores or os.cpu_count() or 1
+        self.memory = memory or _total_memory()
+        self.run_kwargs = run_kwargs
+        self.free_cores = self.cores
+        self.free_memory = self.memory
+        self._pending = []
+        self._running = 0
+        self._shutdown = False
+        self._condition = threading.Condition()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown(wait=True)
+
+    def submit(
+        self,
+        orcainp,
+        nprocs=None,
+        maxcore=None,
+        output=None,
+        extrafiles=None,
+        callback=None,
+    ):
+        """
+        Submit a calculation to the scheduler.
+
+        :param orcainp:
+            An ORCAINP object, which is written before running, or the name of an ORCA input file.
+        :param nprocs=None:
+            Number of cores to run. Default: the ORCAINP nprocs, or 1.
+        :param maxcore=None:
+            Memory per core in MB. Default: the ORCAINP maxcore. Without it the job does not count against the memory.
+        :param output=None:
+            Output file name.
+        :param extrafiles=None:
+            A list containing extra files to run ORCA, such as .gbw and .xyz.
+        :param callback=None:
+            A function called with the future when the calculation finishes.
+        :return:
+            A concurrent.futures.Future whose result is an orcatools.orcarun.RunResult.
+        """
+        nprocs = nprocs or getattr(orcainp, "nprocs", None) or 1
+        maxcore = maxcore or getattr(orcainp, "maxcore", None)
+        memory = nprocs * maxcore if maxcore else 0
+        if nprocs > self.cores or (self.memory and memory > self.memory):
+            raise ValueError(
+                f"The calculation requires {nprocs} cores and {memory} MB, more than the scheduler has available."
+            )
+
+        future = Future()
+        if callback:
+            future.add_done_callback(callback)
+        job = (orcainp, nprocs, maxcore, memory, output, extrafiles, future)
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit calculations after shutdown.")
+            self._pending.append(job)
+            self._dispatch()
+        return future
+
+    def map(self, orcainps, **kwargs):
+        """
+        Submit a list of calculations with the same options, returning a list of futures.
+        """
+        return [self.submit(orcainp, **kwargs) for orcainp in orcainps]
+
+    def shutdown(self, wait=True):
+        """
+        Stop accepting new calculations, optionally waiting for all the submitted ones to finish.
+        """
+        with self._condition:
+            self._shutdown = True
+            if wait:
+                self._condition.wait_for(lambda: not self._pending and not self._running)
+
+    def _fits(self, nprocs, memory):
+        if nprocs > self.free_cores:
+            return False
+        return self.memory is None or memory <= self.free_memory
+
+    def _dispatch(self):
+        """
+        Start every pending job that fits in the free resources. Must be called holding the condition lock.
+        """
+        for job in list(self._pending):
+            nprocs, memory, future = job[1], job[3], job[6]
+            if future.cancelled():
+                self._pending.remove(job)
+                continue
+            if not self._fits(nprocs, memory):
+                continue
+            self._pending.remove(job)
+            if not future.set_running_or_notify_cancel():
+                continue
+            self.free_cores -= nprocs
+            if self.memory is not None:
+                self.free_memory -= memory
+            self._running += 1
+            threading.Thread(target=self._run_job, args=(job,)).start()
+        self._condition.notify_all()
+
+    def _run_job(self, job):
+        orcainp, nprocs, maxcore, memory, output, extrafiles, future = job
+        try:
+            if isinstance(orcainp, str):
+                orcainp_name = orcainp
+            else:
+                orcainp.write_input()
+                orcainp_name = orcainp.orcainp_name
+            result = run(
+                orcainp_name,
+                output=output,
+                nprocs=nprocs,
+                maxcore=maxcore,
+                extrafiles=extrafiles,
+                **self.run_kwargs,
+            )
+        except BaseException as error:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+        finally:
+            with self._condition:
+                self.free_cores += nprocs
+                if self.memory is not None:
+                    self.free_memory += memory
+                self._running -= 1
+                self._dispatch()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+import numpy as np
+
+from orcatools.out import ORCAOUT
+
+# Same cm-1 to eV factor used by ORCAOUT.get_absorption_data
+CM_TO_EV = 0.000123984
+# Boltzmann constant in Hartree/K
+KB_HARTREE = 3.166811563e-6
+# Number of transitions broadened at once, which bounds the memory to grid size * chunk
+_CHUNK = 2048
+
+
+def convert_energy(values, from_unit="eV", to_unit="eV"):
+    """
+    Convert excitation energies between units.
+
+    :param values:
+        A number or array with the energies.
+    :param from_unit="eV":
+        Unit of the values. Options are "eV", "cm" (cm-1) and "nm".
+    :param to_unit="eV":
+        Unit of the result. Options are "eV", "cm" (cm-1) and "nm".
+    """
+    values = np.asarray(values, dtype=float)
+    to_cm = {"cm": lambda x: x, "eV": lambda x: x / CM_TO_EV, "nm": lambda x: 1e7 / x}
+    from_cm = {"cm": lambda x: x, "eV": lambda x: x * CM_TO_EV, "nm": lambda x: 1e7 / x}
+    if from_unit not in to_cm or to_unit not in from_cm:
+        raise ValueError('Energy units must be "eV", "cm" or "nm".')
+    return from_cm[to_unit](to_cm[from_unit](values))
+
+
+def boltzmann_weights(energies, temperature=298.15):
+    """
+    Boltzmann populations of a set of conformers.
+
+    :param energies:
+        A list or array with the energies in Hartree (i.e. SCF or Gibbs free energies).
+    :param temperature=298.15:
+        Temperature in K.
+    :return:
+        An array with the normalized weights.
+    """
+    energies = np.asarray(energies, dtype=float)
+    weights = np.exp(-(energies - energies.min()) / (KB_HARTREE * temperature))
+    return weights / weights.sum()
+
+
+def broaden(energies, fosc, grid, fwhm=0.3, shape="gaussian", unit="eV"):
+    """
+    Broaden stick transitions over an energy grid, evaluating all the transitions at once.
+
+    :param energies:
+        A list or array with the transition energies, in unit.
+    :param fosc:
+        A list or array with the oscillator strengths (or weighted oscillator strengths).
+    :param grid:
+        A list or array with the grid points where the spectrum is evaluated, in unit.
+    :param fwhm=0.3:
+        Full width at half maximum of the line shape in eV. The broadening is always done in energy.
+    :param shape="gaussian":
+        Line shape. Options are "gaussian" and "lorentzian".
+    :param unit="eV":
+        Unit of energies and grid. Options are "eV", "cm" (cm-1) and "nm".
+    :return:
+        An array with the intensity at each grid point, in eV^-1 (each line has an area of fosc in eV).
+    """
+    energies = convert_energy(np.ravel(energies), unit, "eV")
+    fosc = np.ravel(np.asarray(fosc, dtype=float))
+    grid_ev = convert_energy(np.ravel(grid), unit, "eV")
+    intensity = np.zeros(grid_ev.shape)
+
+    for start in range(0, len(energies), _CHUNK):
+        delta = grid_ev[:, np.newaxis] - energies[np.newaxis, start : start + _CHUNK]
+        if shape == "gaussian":
+            sigma = fwhm / (2.0 * np.sqrt(2.0 * np.log(2.0)))
+            profile = np.exp(-0.5 * (delta / sigma) ** 2) / (sigma * np.sqrt(2.0 * np.pi))
+        elif shape == "lorentzian":
+            gamma = fwhm / 2.0
+            profile = gamma / (np.pi * (delta**2 + gamma**2))
+        else:
+            raise ValueError('Line shape must be "gaussian" or "lorentzian".')
+        intensity += profile @ fosc[start : start + _CHUNK]
+
+    return intensity
+
+
+def build_spectrum(
+    outputs,
+    grid=None,
+    unit="eV",
+    fwhm=0.3,
+    shape="gaussian",
+    weights=None,
+    temperature=None,
+    npoints=2000,
+):
+    """
+    Build a broadened absorption spectrum from one or many ORCA outputs, i.e. a conformer ensemble.
+
+    :param outputs:
+        An ORCAOUT object or output file name, or a list of them.
+    :param grid=None:
+        A list or array with the grid points, in unit. Default: npoints spanning the transitions plus 3 fwhm on each side.
+    :param unit="eV":
+        Unit of the grid. Options are "eV", "cm" (cm-1) and "nm".
+    :param fwhm=0.3:
+        Full width at half maximum of the line shape in eV.
+    :param shape="gaussian":
+        Line shape. Options are "gaussian" and "lorentzian".
+    :param weights=None:
+        A list with the weight of each output. Default: equal weights, or Boltzmann weights if temperature is given.
+    :param temperature=None:
+        Temperature in K for Boltzmann weights from the final SCF energy of each output.
+    :param npoints=2000:
+        Number of points of the default grid.
+    :return grid, intensity:
+        Arrays with the grid points and the intensity at each point.
+    """
+    if isinstance(outputs, (str, ORCAOUT)):
+        outputs = [outputs]
+    outputs = [out if isinstance(out, ORCAOUT) else ORCAOUT(out) for out in outputs]
+
+    if weights is None:
+        if temperature is not None:
+            weights = boltzmann_weights([out.scf_energy for out in outputs], temperature)
+        else:
+            weights = np.full(len(outputs), 1.0 / len(outputs))
+
+    energies = []
+    fosc = []
+    for out, weight in zip(outputs, weights):
+        out_energies, out_fosc = out.get_absorption_data(unit="cm")
+        energies.append(convert_energy(out_energies, "cm", "eV"))
+        fosc.append(weight * np.asarray(out_fosc))
+    energies = np.concatenate(energies)
+    fosc = np.concatenate(fosc)
+
+    if grid is None:
+        limits = np.array([energies.min() - 3 * fwhm, energies.max() + 3 * fwhm])
+        grid_ev = np.linspace(max(limits[0], 1e-3), limits[1], npoints)
+        grid = convert_energy(grid_ev, "eV", unit)
+    grid = np.asarray(grid, dtype=float)
+
+    intensity = broaden(
+        energies, fosc, convert_energy(grid, unit, "eV"), fwhm=fwhm, shape=shape
+    )
+    return grid, intensity
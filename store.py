@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+import glob
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from orcatools.out import iter_parse_many
+
+# Fields of ORCAOUT gathered for every stored calculation
+_STORE_FIELDS = [
+    "scf_energy",
+    "runtime",
+    "optimization",
+    "thermal_corrections",
+    "cc_diagnostic",
+    "active_space",
+    "absorption_data",
+    "occupation_numbers",
+    "molecule",
+]
+# Stored columns and their types. Missing floats are nan and missing integers are -1.
+SCHEMA = {
+    "path": "str",
+    "scf_energy": "float",
+    "runtime": "float",
+    "optimization": "bool",
+    "zpe": "float",
+    "u_correction": "float",
+    "h_correction": "float",
+    "s_correction": "float",
+    "g_correction": "float",
+    "cc_corr": "float",
+    "cc_t1": "float",
+    "cc_ccsd": "float",
+    "active_electrons": "int",
+    "active_orbitals": "int",
+    "active_first": "int",
+    "active_last": "int",
+}
+# Ragged columns, with a variable number of values per calculation.
+# Each one is stored as its flat values plus a <name>_offsets column with one more entry than the calculations.
+RAGGED_SCHEMA = {
+    "absorption_energies": "float",
+    "absorption_fosc": "float",
+    "occupation_numbers": "float",
+    "elements": "str",
+    "coordinates": "float",
+}
+_EXTENSIONS = {"npz": ".npz", "parquet": ".parquet", "hdf5": ".h5"}
+# Outputs which could not be stored, as JSON lines with their size, modification time and error message
+_REJECTED_FILE = "rejected.jsonl"
+
+
+def _floats(values):
+    return np.array([np.nan if value is None else value for value in values], dtype=float)
+
+
+def _ints(values):
+    return np.array([-1 if value is None else value for value in values], dtype=np.int64)
+
+
+def _ragged(rows, dtype, width=None):
+    """
+    Flatten a list of per-calculation lists into (values, offsets) arrays.
+    """
+    rows = [[] if row is None else row for row in rows]
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(row) for row in rows])
+    shape = (int(offsets[-1]),) if width is None else (int(offsets[-1]), width)
+    values = np.empty(shape, dtype=dtype)
+    for row, start, stop in zip(rows, offsets[:-1], offsets[1:]):
+        if stop > start:
+            values[start:stop] = row
+    return values, offsets
+
+
+def _table_to_columns(table):
+    """
+    Convert a parse_many table into the stored columns.
+    """
+    columns = {"path": np.array([os.path.abspath(path) for path in table["path"]], dtype=str)}
+    columns["scf_energy"] = _floats(table["scf_energy"])
+    columns["runtime"] = _floats(table["runtime"])
+    columns["optimization"] = np.array([bool(value) for value in table["optimization"]])
+
+    thermal = [value or {} for value in table["thermal_corrections"]]
+    for column, key in zip(
+        ["zpe", "u_correction", "h_correction", "s_correction", "g_correction"],
+        ["ZPE", "U", "H", "S", "G"],
+    ):
+        columns[column] = _floats([value.get(key) for value in thermal])
+    cc = [value or {} for value in table["cc_diagnostic"]]
+    for column, key in zip(["cc_corr", "cc_t1", "cc_ccsd"], ["corr", "t1", "ccsd"]):
+        columns[column] = _floats([value.get(key) for value in cc])
+    active = [value or (None, None, (None, None)) for value in table["active_space"]]
+    columns["active_electrons"] = _ints([value[0] for value in active])
+    columns["active_orbitals"] = _ints([value[1] for value in active])
+    columns["active_first"] = _ints([value[2][0] for value in active])
+    columns["active_last"] = _ints([value[2][1] for value in active])
+
+    absorption = [value or ([], []) for value in table["absorption_data"]]
+    ragged = {
+        "absorption_energies": _ragged([value[0] for value in absorption], float),
+        "absorption_fosc": _ragged([value[1] for value in absorption], float),
+        "occupation_numbers": _ragged(table["occupation_numbers"], float),
+        "elements": _ragged(
+            [None if mol is None else mol.elements.tolist() for mol in table["molecule"]], "U8"
+        ),
+        "coordinates": _ragged(
+            [None if mol is None else mol.coordinates for mol in table["molecule"]], float, 3
+        ),
+    }
+    for name, (values, offsets) in ragged.items():
+        columns[name] = values
+        columns[f"{name}_offsets"] = offsets
+    return columns
+
+
+def _with_offsets(columns):
+    """
+    Return the column names with the <name>_offsets column after each ragged column.
+    """
+    names = []
+    for name in columns:
+        names.append(name)
+        if name in RAGGED_SCHEMA:
+            names.append(f"{name}_offsets")
+    return list(dict.fromkeys(names))
+
+
+# ----- Part file formats
+def _write_npz(part_file, columns):
+    np.savez(part_file, **columns)
+
+
+def _read_npz(part_file, names):
+    with np.load(part_file, allow_pickle=False) as data:
+        return {name: data[name] for name in names}
+
+
+def _write_parquet(part_file, columns):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError(
+            "pyarrow package is not installed. Please install it with 'pip install pyarrow'."
+        )
+    arrays = {name: pa.array(columns[name]) for name in SCHEMA}
+    for name in RAGGED_SCHEMA:
+        values = pa.array(columns[name].reshape(-1))
+        if name == "coordinates":
+            values = pa.FixedSizeListArray.from_arrays(values, 3)
+        arrays[name] = pa.ListArray.from_arrays(pa.array(columns[f"{name}_offsets"]), values)
+    pq.write_table(pa.table(arrays), part_file)
+
+
+def _read_parquet(part_file, names):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError(
+            "pyarrow package is not installed. Please install it with 'pip install pyarrow'."
+        )
+    stored = {name[: -len("_offsets")] if name.endswith("_offsets") else name for name in names}
+    table = pq.read_table(part_file, columns=sorted(stored))
+    columns = {}
+    for name in stored:
+        column = table.column(name).combine_chunks()
+        if name in RAGGED_SCHEMA:
+            values = column.flatten()
+            if name == "coordinates":
+                values = values.flatten()
+            columns[name] = values.to_numpy(zero_copy_only=False)
+            if name == "coordinates":
+                columns[name] = columns[name].reshape(-1, 3)
+            offsets = column.offsets.to_numpy()
+            columns[f"{name}_offsets"] = offsets - offsets[0]
+        else:
+            columns[name] = column.to_numpy(zero_copy_only=False)
+    return {name: np.asarray(columns[name]) for name in names}
+
+
+def _write_hdf5(part_file, columns):
+    try:
+        import h5py
+    except ImportError:
+        raise ImportError("h5py package is not installed. Please install it with 'pip install h5py'.")
+    with h5py.File(part_file, "w") as h5:
+        for name, values in columns.items():
+            if values.dtype.kind == "U":
+                # HDF5 has no fixed width unicode type
+                values = np.char.encode(values, "utf-8")
+            h5.create_dataset(name, data=values)
+
+
+def _read_hdf5(part_file, names):
+    try:
+        import h5py
+    except ImportError:
+        raise ImportError("h5py package is not installed. Please install it with 'pip install h5py'.")
+    columns = {}
+    with h5py.File(part_file, "r") as h5:
+        for name in names:
+            values = h5[name][()]
+            if values.dtype.kind == "S":
+                values = np.char.decode(values, "utf-8")
+            columns[name] = values
+    return columns
+
+
+_WRITERS = {"npz": _write_npz, "parquet": _write_parquet, "hdf5": _write_hdf5}
+_READERS = {"npz": _read_npz, "parquet": _read_parquet, "hdf5": _read_hdf5}
+
+
+class ResultStore:
+    """
+    Columnar store of parsed ORCA outputs, for campaign-level analysis of many calculations.
+
+    The store is a directory of part files, each one holding the columns of a set of calculations, so new outputs are
+    appended by writing a new part. Reading concatenates the requested columns of all the parts.
+    The columns are described in SCHEMA and RAGGED_SCHEMA. A ragged column holds the flat values of all the calculations,
+    and the values of calculation i are values[offsets[i]:offsets[i + 1]] with the <name>_offsets column.
+
+    :param directory:
+        A string with the directory of the store. It is created if needed.
+    :param format="npz":
+        Format of the part files. Options are "npz", "parquet" (requires pyarrow) and "hdf5" (requires h5py).
+
+    Example:
+        store = ResultStore("results")
+        store.append(glob.glob("calcs/**/*.out", recursive=True))
+        data = store.read(["path", "scf_energy", "g_correction"])
+    """
+
+    def __init__(self, directory, format="npz"):
+        if format not in _EXTENSIONS:
+            raise ValueError('The store format must be "npz", "parquet" or "hdf5".')
+        self.directory = directory
+        self.format = format
+        os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self.read(["path"])["path"])
+
+    def _parts(self):
+        return sorted(glob.glob(os.path.join(self.directory, f"part-*{_EXTENSIONS[self.format]}")))
+
+    def _write_temporary(self, columns):
+        """
+        Write columns to a temporary file of the store directory, which readers never see.
+        """
+        handle, temporary = tempfile.mkstemp(suffix=_EXTENSIONS[self.format], prefix=".tmp-", dir=self.directory)
+        os.close(handle)
+        try:
+            _WRITERS[self.format](temporary, columns)
+        except BaseException:
+            os.remove(temporary)
+            raise
+        return temporary
+
+    def _publish(self, temporary, number=None):
+        """
+        Link a temporary file into the store as the first free part from number (default: after the last part).
+        """
+        if number is None:
+            parts = self._parts()
+            number = int(os.path.basename(parts[-1])[5:11]) + 1 if parts else 0
+        while True:
+            part_file = os.path.join(self.directory, f"part-{number:06d}{_EXTENSIONS[self.format]}")
+            # Linking fails if the part exists, so concurrent appends never overwrite each other's parts
+            try:
+                os.link(temporary, part_file)
+            except FileExistsError:
+                number += 1
+                continue
+            return part_file
+
+    def _write_part(self, columns):
+        # Write to a temporary name first, so readers never see half-written parts
+        temporary = self._write_temporary(columns)
+        try:
+            return self._publish(temporary)
+        finally:
+            os.remove(temporary)
+
+    def _rejected(self):
+        """
+        Return a dictionary with the (size, mtime_ns, error) of each rejected output, from its last record.
+        """
+        records = {}
+        try:
+            with open(os.path.join(self.directory, _REJECTED_FILE)) as rejected_file:
+                for line in rejected_file:
+                    if line.strip():
+                        record = json.loads(line)
+                        records[record["path"]] = (record["size"], record["mtime_ns"], record["error"])
+        except FileNotFoundError:
+            pass
+        return records
+
+    def rejected(self):
+        """
+        Return a dictionary with the outputs which could not be stored and their error messages, leaving out the outputs
+        which changed since (i.e. calculations which were still running) and those already stored.
+        """
+        stored = self.paths()
+        rejected = {}
+        for path, (size, mtime_ns, error) in self._rejected().items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if path not in stored and (stat.st_size, stat.st_mtime_ns) == (size, mtime_ns):
+                rejected[path] = error
+        return rejected
+
+    def paths(self):
+        """
+        Return a set with the (absolute) output paths already in the store.
+        """
+        return set(self.read(["path"])["path"].tolist())
+
+    def append(self, paths, workers=None, chunk_size=1000, skip_existing=True):
+        """
+        Parse output files over a process pool and append them to the store, writing one part per chunk.
+
+        Outputs which cannot be read, such as running or crashed calculations, are not stored. They are recorded with their
+        error message in rejected.jsonl of the store directory instead (see rejected), and only parsed again once they change.
+
+        :param paths:
+            An iterable with the output file names.
+        :param workers=None:
+            Number of worker processes. Default: number of CPUs.
+        :param chunk_size=1000:
+            Number of outputs written per part file.
+        :param skip_existing=True:
+            Skip outputs already in the store, and the rejected outputs which did not change since, so the same directory
+            can be appended as new calculations finish.
+        :return:
+            The number of outputs appended.
+        """
+        stored = self.paths() if skip_existing else set()
+        rejected = self._rejected() if skip_existing else {}
+        # Size and modification time of the outputs being parsed, taken before parsing them
+        stats = {}
+
+        def pending():
+            for path in paths:
+                path = os.path.abspath(path)
+                if path in stored:
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    stat = None
+                if stat and rejected.get(path, (None, None))[:2] == (stat.st_size, stat.st_mtime_ns):
+                    continue
+                stats[path] = stat
+                yield path
+
+        count = 0
+        for table in iter_parse_many(pending(), _STORE_FIELDS, workers, chunk_size):
+            # Outputs which could not be read at all have no optimization flag
+            keep = [optimization is not None for optimization in table["optimization"]]
+            records = []
+            for path, error, kept in zip(table["path"], table["error"], keep):
+                stat = stats.pop(path)
+                # Missing outputs are not recorded, as they may still be written
+                if not kept and stat:
+                    records.append(
+                        {"path": path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "error": error}
+                    )
+            if records:
+                with open(os.path.join(self.directory, _REJECTED_FILE), "a") as rejected_file:
+                    rejected_file.write("".join(json.dumps(record) + "\n" for record in records))
+            table = {key: [v for v, k in zip(values, keep) if k] for key, values in table.items()}
+            if table["path"]:
+                self._write_part(_table_to_columns(table))
+                count += len(table["path"])
+        return count
+
+    def read(self, columns=None):
+        """
+        Read columns of all the stored calculations.
+
+        :param columns=None:
+            A list with the column names. Ragged columns also return their <name>_offsets column. Default: all the columns.
+        :return:
+            A dictionary with one array per column.
+        """
+        if columns is None:
+            columns = list(SCHEMA) + list(RAGGED_SCHEMA)
+        unknown = [
+            name
+            for name in columns
+            if name not in SCHEMA and name not in RAGGED_SCHEMA and not name.endswith("_offsets")
+        ]
+        if unknown:
+            raise ValueError(f"Unknown columns requested: {', '.join(unknown)}")
+        return self._concatenate(self._parts(), _with_offsets(columns))
+
+    def _concatenate(self, part_files, names):
+        """
+        Read the named columns of part files into one array per column.
+        """
+        parts = [_READERS[self.format](part_file, names) for part_file in part_files]
+        data = {}
+        for name in names:
+            if name.endswith("_offsets"):
+                # Shift the offsets of each part by the values of the previous parts
+                offsets = [np.zeros(1, dtype=np.int64)]
+                for part in parts:
+                    offsets.append(part[name][1:] + offsets[-1][-1])
+                data[name] = np.concatenate(offsets)
+            elif parts:
+                data[name] = np.concatenate([part[name] for part in parts])
+            else:
+                kind = {**SCHEMA, **RAGGED_SCHEMA}[name]
+                dtype = {"str": str, "float": float, "int": np.int64, "bool": bool}[kind]
+                data[name] = np.zeros((0, 3) if name == "coordinates" else 0, dtype=dtype)
+        return data
+
+    def compact(self):
+        """
+        Merge all the part files into a single one, which speeds up reading stores built from many small appends.
+
+        The merged part is written under a temporary name before the parts are removed, and linked into place as the first
+        of them afterwards. If compact is interrupted in between, the merged data is kept in a .tmp-* file of the store.
+        """
+        parts = self._parts()
+        if len(parts) < 2:
+            return
+        # Only the listed parts are merged and removed, so parts appended meanwhile are kept
+        temporary = self._write_temporary(
+            self._concatenate(parts, _with_offsets(list(SCHEMA) + list(RAGGED_SCHEMA)))
+        )
+        for part_file in parts:
+            os.remove(part_file)
+        self._publish(temporary, int(os.path.basename(parts[0])[5:11]))
+        os.remove(temporary)
@@ -0,0 +1,129 @@
+import importlib.util
+import os
+import shutil
+import stat
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLES = os.path.join(ROOT, "examples")
+
+# The repository itself is the orcatools package, so make it importable under that name wherever it is checked out
+if "orcatools" not in sys.modules:
+    spec = importlib.util.spec_from_file_location(
+        "orcatools", os.path.join(ROOT, "__init__.py"), submodule_search_locations=[ROOT]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["orcatools"] = module
+    spec.loader.exec_module(module)
+
+
+# Fake ORCA which prints its input, writes a .gbw file and a temporary file into its working directory,
+# logs the run next to itself and terminates normally
+FAKE_ORCA = """#!/bin/sh
+cat "$1"
+ls
+echo "gbw" > "${1%.*}.gbw"
+echo "tmp" > "${1%.*}.scfp.tmp"
+echo "run" >> "$(dirname "$0")/runs.log"
+echo "                             ****ORCA TERMINATED NORMALLY****"
+echo "TOTAL RUN TIME: 0 days 0 hours 0 minutes 1 seconds 5 msec"
+"""
+
+
+class FakeOrca:
+    """
+    Executable shell script standing in for ORCA (or one of its programs), written into a test directory.
+    """
+
+    def __init__(self, directory, script=FAKE_ORCA, name="orca"):
+        self.directory = directory
+        executable = directory / name
+        executable.write_text(script)
+        executable.chmod(executable.stat().st_mode | stat.S_IEXEC)
+        self.path = str(executable)
+
+    @property
+    def runs(self):
+        """
+        Number of runs logged by the script.
+        """
+        log = self.directory / "runs.log"
+        return len(log.read_text().splitlines()) if log.exists() else 0
+
+
+@pytest.fixture
+def fake_orca(tmp_path):
+    """
+    Factory of FakeOrca scripts in the test directory, i.e. fake_orca().path or fake_orca(script, "orca_plot").
+    """
+    return lambda script=FAKE_ORCA, name="orca": FakeOrca(tmp_path, script, name)
+
+
+class StubRunner:
+    """
+    Replacement of orcarun.run for the Scheduler and Workflow tests, returning the basename of each input.
+
+    Every call is recorded. When an output name is given, examples/a.out is copied to it and a .gbw file is written into
+    <input>-runfiles. Inputs named bad* raise and inputs named crash* do not terminate normally.
+    With hold set, each calculation waits until it is released.
+    """
+
+    def __init__(self):
+        self.hold = False
+        self.calls = {}
+        self.inputs = {}
+        self.order = []
+        self._lock = threading.Lock()
+        self._started = {}
+        self._released = {}
+
+    def _event(self, events, name):
+        with self._lock:
+            return events.setdefault(name, threading.Event())
+
+    def __call__(self, orcainp_name, **kwargs):
+        basename = os.path.splitext(os.path.basename(orcainp_name))[0]
+        with self._lock:
+            self.calls[basename] = kwargs
+            self.order.append(basename)
+            if os.path.isfile(orcainp_name):
+                with open(orcainp_name) as inp:
+                    self.inputs[basename] = inp.read()
+        self._event(self._started, basename).set()
+        if self.hold:
+            assert self._event(self._released, basename).wait(5)
+        if basename.startswith("bad"):
+            raise RuntimeError(f"{basename} crashed")
+
+        output = kwargs.get("output")
+        if output and basename.startswith("crash"):
+            with open(output, "w") as out:
+                out.write("ORCA crashed\n")
+        elif output:
+            shutil.copy(os.path.join(EXAMPLES, "a.out"), output)
+            runfiles = os.path.splitext(orcainp_name)[0] + "-runfiles"
+            os.makedirs(runfiles, exist_ok=True)
+            with open(os.path.join(runfiles, f"{basename}.gbw"), "w") as gbw:
+                gbw.write("gbw")
+        return basename
+
+    def wait_started(self, name):
+        assert self._event(self._started, name).wait(5)
+
+    def release(self, name):
+        self._event(self._released, name).set()
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    """
+    A StubRunner replacing orcarun.run in the scheduler.
+    """
+    import orcatools.scheduler
+
+    runner = StubRunner()
+    monkeypatch.setattr(orcatools.scheduler, "run", runner)
+    return runner
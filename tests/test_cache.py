@@ -0,0 +1,87 @@
+import os
+import shutil
+import time
+
+from conftest import EXAMPLES
+from orcatools.cache import OutputCache
+from orcatools.out import ORCAOUT
+
+
+def _copy_output(tmp_path, name="a.out"):
+    output = str(tmp_path / name)
+    shutil.copy(os.path.join(EXAMPLES, "a.out"), output)
+    return output
+
+
+def test_output_cache_hits(tmp_path):
+    output = _copy_output(tmp_path)
+    with OutputCache(str(tmp_path / "cache.sqlite")) as cache:
+        cache.set(output, "key", {"energy": -1.0})
+        assert cache.get(output, "key") == (True, {"energy": -1.0})
+        assert cache.get(output, "other") == (False, None)
+
+        reference = ORCAOUT(output)
+        first = ORCAOUT(output, cache=cache)
+        keys = {key for (key,) in cache._connection.execute("SELECT key FROM results")}
+        assert "_index" in keys and len(keys) > 2
+        # Rewrite the file with the same size and modification time, so only cached results can give the old values
+        stat = os.stat(output)
+        with open(output, "r+b") as fh:
+            fh.write(b" " * 4096)
+        os.utime(output, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        second = ORCAOUT(output, cache=cache)
+        assert second.scf_energy == first.scf_energy == reference.scf_energy
+        assert second.xyzstr == reference.xyzstr
+
+
+def test_output_cache_invalidation(tmp_path):
+    output = _copy_output(tmp_path)
+    with OutputCache(str(tmp_path / "cache.sqlite")) as cache:
+        cache.set(output, "key", 1)
+        # A new modification time with the same content keeps the results
+        stat = os.stat(output)
+        os.utime(output, (stat.st_atime + 10, stat.st_mtime + 10))
+        assert cache.get(output, "key") == (True, 1)
+        # New content drops them
+        with open(output, "a") as fh:
+            fh.write("appended\n")
+        assert cache.get(output, "key") == (False, None)
+
+        cache.set(output, "key", 2)
+        cache.invalidate(output)
+        assert cache.get(output, "key") == (False, None)
+
+
+def test_output_cache_max_size(tmp_path):
+    outputs = [_copy_output(tmp_path, f"{name}.out") for name in "abc"]
+    cache_file = str(tmp_path / "cache.sqlite")
+    with OutputCache(cache_file) as cache:
+        for output in outputs:
+            cache.set(output, "key", b"x" * 10000)
+        # b.out becomes the least recently used one
+        assert cache.get(outputs[0], "key")[0]
+        assert cache.get(outputs[2], "key")[0]
+    with OutputCache(cache_file, max_size=25000) as cache:
+        assert [cache.get(output, "key")[0] for output in outputs] == [True, False, True]
+
+
+def test_output_cache_bounded_while_storing(tmp_path):
+    outputs = [_copy_output(tmp_path, f"{i}.out") for i in range(20)]
+    with OutputCache(str(tmp_path / "cache.sqlite"), max_size=25000) as cache:
+        for output in outputs:
+            cache.set(output, "key", b"x" * 10000)
+            stored = cache._connection.execute("SELECT SUM(LENGTH(value)) FROM results").fetchone()[0]
+            assert stored <= 25000
+        # The most recently stored outputs are kept
+        assert [cache.get(output, "key")[0] for output in outputs[-2:]] == [True, True]
+        assert not cache.get(outputs[0], "key")[0]
+
+
+def test_output_cache_max_age(tmp_path):
+    old, new = _copy_output(tmp_path, "old.out"), _copy_output(tmp_path, "new.out")
+    with OutputCache(str(tmp_path / "cache.sqlite"), max_age=0.2) as cache:
+        cache.set(old, "key", 1)
+        time.sleep(0.3)
+        cache.set(new, "key", 2)
+        paths = [path for (path,) in cache._connection.execute("SELECT path FROM results")]
+        assert paths == [os.path.abspath(new)]
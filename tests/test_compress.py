@@ -0,0 +1,85 @@
+import importlib.util
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from conftest import EXAMPLES, ROOT
+from orcatools.compress import (
+    compact_run,
+    compress_file,
+    detect_compression,
+    extract_file,
+    list_archive,
+    open_file,
+)
+from orcatools.inp import ORCAINP, read_input
+from orcatools.molecule import Molecule
+from orcatools.out import ORCAOUT, _index_sections, check_normal_termination, read_hess
+
+METHODS = [
+    "gzip",
+    "xz",
+    pytest.param(
+        "zstd",
+        marks=pytest.mark.skipif(
+            importlib.util.find_spec("zstandard") is None, reason="zstandard is not installed"
+        ),
+    ),
+]
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_compressed_output(tmp_path, method):
+    plain = str(tmp_path / "b.out")
+    shutil.copy(os.path.join(EXAMPLES, "b.out"), plain)
+    compressed = compress_file(plain, method, remove=False)
+    assert detect_compression(compressed) == method and detect_compression(plain) is None
+
+    assert _index_sections(compressed) == _index_sections(plain)
+    assert check_normal_termination(compressed) == check_normal_termination(plain)
+    out, reference = ORCAOUT(compressed), ORCAOUT(plain)
+    assert out.scf_energy == reference.scf_energy and out.xyzstr == reference.xyzstr
+    assert np.array_equal(out.get_trajectory()[0], reference.get_trajectory()[0])
+    assert np.array_equal(out.get_charges("loewdin")["charges"], reference.get_charges("loewdin")["charges"])
+    with open_file(compressed, "r") as fh, open(plain) as reference_fh:
+        assert fh.readline() == reference_fh.readline()
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_compressed_inputs(tmp_path, method):
+    molecule = ORCAOUT(os.path.join(EXAMPLES, "a.out")).molecule
+    xyz_file = str(tmp_path / "mol.xyz")
+    molecule.write(xyz_file)
+    xyz_file = compress_file(xyz_file, method)
+    assert Molecule.from_xyz(xyz_file).formula() == molecule.formula()
+
+    inp = ORCAINP(str(tmp_path / "calc.inp"), molecule, "! B3LYP def2-SVP", charge=2, mult=1)
+    inp.write_input()
+    parsed = read_input(compress_file(inp.orcainp_name, method))
+    assert parsed.osi_block == "! B3LYP def2-SVP" and parsed.charge == 2
+
+    hess_file = str(tmp_path / "freq.hess")
+    shutil.copy(os.path.join(ROOT, "tests", "data", "freq.hess"), hess_file)
+    hess = read_hess(compress_file(hess_file, method))
+    assert hess["hessian"][0, 0] == -1.2776801664
+
+
+def test_compact_run(tmp_path):
+    output = str(tmp_path / "calc.out")
+    shutil.copy(os.path.join(EXAMPLES, "a.out"), output)
+    runfiles = tmp_path / "calc-runfiles"
+    runfiles.mkdir()
+    (runfiles / "calc.gbw").write_bytes(b"orbitals" * 1000)
+    (runfiles / "calc.prop").write_text("properties")
+
+    output, archive = compact_run(output)
+    assert output.endswith("calc.out.gz") and archive.endswith("calc-runfiles.zip")
+    assert not runfiles.exists()
+    assert check_normal_termination(output)[0]
+    assert list_archive(archive) == {"calc.gbw": 8000, "calc.prop": 10}
+    gbw_file = extract_file(archive, "calc.gbw", str(tmp_path / "restart"))
+    assert Path(gbw_file).read_bytes() == b"orbitals" * 1000
+    assert sorted(os.listdir(tmp_path / "restart")) == ["calc.gbw"]
@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pytest
+
+from orcatools.cube import BOHR_TO_ANGSTROEM, Cube, read_cube
+
+
+def _gaussian_cube(shape=(8, 9, 7), step=0.5):
+    axes = np.diag([step] * 3)
+    origin = -step * (np.array(shape) - 1) / 2
+    grid = np.stack(np.meshgrid(*(np.arange(n) * step + o for n, o in zip(shape, origin)), indexing="ij"), -1)
+    data = np.exp(-np.sum(grid**2, axis=-1))
+    return Cube(["orbital", "test"], origin, axes, [8, 1], [8.0, 1.0], [[0, 0, 0], [0, 0, 1.8]], data)
+
+
+def test_cube_round_trip(tmp_path):
+    cube = _gaussian_cube()
+    cube_file = str(tmp_path / "mo.cube")
+    cube.write(cube_file)
+
+    read = read_cube(cube_file, cache=False)
+    assert read.shape == (8, 9, 7) and read.comments == cube.comments
+    assert np.allclose(read.data, cube.data, rtol=1e-4, atol=1e-9)
+    assert np.array_equal(read.numbers, [8, 1]) and np.allclose(read.positions, cube.positions)
+    assert not os.path.exists(cube_file + ".npy")
+
+    # The grid is cached next to the cube and memory-mapped on the next reads
+    first = read_cube(cube_file)
+    assert isinstance(first.data, np.memmap) and os.path.isfile(cube_file + ".npy")
+    assert np.array_equal(read_cube(cube_file).data, first.data)
+    assert np.array_equal(read_cube(cube_file, mmap=False).data, read.data)
+
+
+def test_cube_angstroem_axes(tmp_path):
+    cube_file = tmp_path / "density.cube"
+    cube_file.write_text(
+        "density\n\n    1    0.0    0.0    0.0\n"
+        f"   -2 {BOHR_TO_ANGSTROEM}  0.0  0.0\n   -1  0.0  1.0  0.0\n   -3  0.0  0.0  1.0\n"
+        "    1    1.0    0.0    0.0    0.0\n 1.0 2.0 3.0\n 4.0 5.0 6.0\n"
+    )
+    cube = read_cube(str(cube_file), cache=False)
+    assert cube.shape == (2, 1, 3)
+    assert np.allclose(cube.axes[0], [1.0, 0.0, 0.0])
+    assert cube.data[1, 0, 2] == 6.0
+
+
+def test_cube_grid_operations():
+    cube = _gaussian_cube(shape=(40, 40, 40), step=0.2)
+    # Integral of exp(-r^2) over all space
+    assert cube.integrate() == pytest.approx(np.pi**1.5, rel=1e-3)
+    assert (2 * cube - cube).integrate() == pytest.approx(cube.integrate())
+    with pytest.raises(ValueError):
+        cube - _gaussian_cube()
+
+    isovalue = cube.isovalue(fraction=0.85)
+    enclosed = np.sum(cube.data[cube.data >= isovalue] ** 2) / np.sum(cube.data**2)
+    assert enclosed == pytest.approx(0.85, abs=0.01)
+
+    coarse = cube.downsample(2)
+    assert coarse.shape == (20, 20, 20)
+    assert coarse.integrate() == pytest.approx(cube.integrate())
+    assert np.allclose(coarse.origin, cube.origin + 0.1)
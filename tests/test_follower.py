@@ -0,0 +1,121 @@
+import os
+import random
+
+import numpy as np
+
+from conftest import EXAMPLES
+from orcatools.out import ORCAOUT, OutputFollower
+
+CONVERGENCE_TABLE = b"""
+                                .--------------------.
+          ----------------------|Geometry convergence|-------------------------
+          Item                value                   Tolerance       Converged
+          ---------------------------------------------------------------------
+          Energy change      -0.0001234567            0.0000050000      NO
+          RMS gradient        0.0012345678            0.0001000000      NO
+          MAX gradient        0.0034567890            0.0003000000      NO
+          ........................................................
+"""
+
+
+def _output_bytes():
+    with open(os.path.join(EXAMPLES, "a.out"), "rb") as fh:
+        text = fh.read()
+    position = text.index(b"FINAL SINGLE POINT ENERGY")
+    position = text.rindex(b"\n", 0, position) + 1
+    return text[:position] + CONVERGENCE_TABLE + text[position:]
+
+
+def _normalize(events):
+    return [
+        (kind, {key: np.asarray(value).tolist() for key, value in data.items()})
+        for kind, data in events
+    ]
+
+
+def test_follower_chunks(tmp_path):
+    text = _output_bytes()
+    whole = tmp_path / "whole.out"
+    whole.write_bytes(text)
+    expected = OutputFollower(str(whole)).poll()
+    kinds = [kind for kind, _ in expected]
+    assert "convergence" in kinds and "geometry" in kinds and kinds[-1] == "termination"
+    assert expected[kinds.index("convergence")][1]["MAX gradient"] == 0.003456789
+    assert expected[-1][1]["runtime"] == 99.382
+
+    rng = random.Random(0)
+    growing = tmp_path / "growing.out"
+    growing.write_bytes(b"")
+    follower = OutputFollower(str(growing))
+    events = []
+    position = 0
+    with open(growing, "ab") as fh:
+        while position < len(text):
+            size = rng.choice([1, 7, 64, 500])
+            fh.write(text[position : position + size])
+            fh.flush()
+            position += size
+            events += follower.poll()
+    assert _normalize(events) == _normalize(expected)
+
+
+def test_follower_runtime_in_later_poll(tmp_path):
+    text = _output_bytes()
+    cut = text.index(b"TOTAL RUN TIME")
+    output = tmp_path / "run.out"
+    output.write_bytes(text[:cut])
+    follower = OutputFollower(str(output))
+    events = follower.poll()
+    assert follower.terminated and events[-1] == ("termination", {"normal": True, "runtime": None})
+    with open(output, "ab") as fh:
+        fh.write(text[cut:])
+    follower.poll()
+    assert events[-1][1]["runtime"] == 99.382
+
+
+def test_follow_waits_for_runtime(tmp_path):
+    text = _output_bytes()
+    cut = text.index(b"TOTAL RUN TIME")
+    output = tmp_path / "run.out"
+    output.write_bytes(text[:cut])
+    events = ORCAOUT(str(output), function_mode=True).follow(interval=0.01)
+    for kind, data in events:
+        if kind == "termination":
+            # The run time is flushed after the termination line
+            assert data["runtime"] is None
+            with open(output, "ab") as fh:
+                fh.write(text[cut:])
+    assert data["runtime"] == 99.382
+
+
+class _Process:
+    """
+    Stand-in for the subprocess running ORCA, which writes the rest of the output after a few polls and then finishes.
+    """
+
+    def __init__(self, output, rest, polls):
+        self.output, self.rest, self.polls = output, rest, polls
+
+    def poll(self):
+        self.polls -= 1
+        if self.polls:
+            return None
+        with open(self.output, "ab") as fh:
+            fh.write(self.rest)
+        return 0
+
+
+def test_follow_process(tmp_path):
+    text = _output_bytes()
+    cut = text.index(b"TOTAL RUN TIME")
+    output = tmp_path / "run.out"
+    output.write_bytes(text[:cut])
+    process = _Process(output, text[cut:], 3)
+    events = list(ORCAOUT(str(output), function_mode=True).follow(interval=0.01, process=process))
+    assert events[-1] == ("termination", {"normal": True, "runtime": 99.382})
+
+    # Without the run time line, following ends once the process finished and the file stopped growing
+    output.write_bytes(text[:cut])
+    process = _Process(output, b"", 3)
+    events = list(ORCAOUT(str(output), function_mode=True).follow(interval=0.01, process=process))
+    assert events[-1] == ("termination", {"normal": True, "runtime": None}) and process.polls == 0
@@ -0,0 +1,142 @@
+import os
+import tarfile
+from pathlib import Path
+
+import pytest
+
+from orcatools.inp import ORCAINP, parse_input, read_input, write_inputs
+from orcatools.molecule import Molecule
+
+
+def test_coordinates_edit_in_place():
+    inp = ORCAINP("h2.inp", "H 0.0 0.0 0.0\nH 0.0 0.0 0.74\n", "! HF def2-SVP")
+    inp.coordinates[0][1] = 5.0
+    inp.coordinates.append(["O", 1.0, 1.0, 1.0])
+    assert inp.coordinates == [
+        ["H", 5.0, 0.0, 0.0],
+        ["H", 0.0, 0.0, 0.74],
+        ["O", 1.0, 1.0, 1.0],
+    ]
+    assert inp.molecule.natoms == 3
+
+
+def test_coordinates_rows_write_through():
+    inp = ORCAINP("h2.inp", "H 0.0 0.0 0.0\nH 0.0 0.0 0.74\n", "! HF def2-SVP")
+    positions = inp.molecule.coordinates
+    for row in inp.coordinates:
+        row[1] += 1.0
+    inp.coordinates[1][0] = "Cl"
+    # Row edits change the molecule arrays in place
+    assert inp.molecule.coordinates is positions
+    assert inp.coordinates == [["H", 1.0, 0.0, 0.0], ["Cl", 1.0, 0.0, 0.74]]
+    assert inp.coordinates.pop() == ["Cl", 1.0, 0.0, 0.74]
+    assert inp.molecule.natoms == 1
+
+
+def test_xyzstr_setter():
+    inp = ORCAINP("h2.inp", "H 0.0 0.0 0.0\nH 0.0 0.0 0.74\n", "! HF def2-SVP")
+    inp.xyzstr = "He 0.0 0.0 1.0\n"
+    assert inp.coordinates == [["He", 0.0, 0.0, 1.0]]
+
+
+INPUT = """%pal nprocs 4 end
+%maxcore 3000
+! B3LYP def2-SVP
+! Opt TightSCF   # comment
+%geom
+  Constraints
+    { B 0 1 C }
+  end
+end
+%basis
+  NewGTO 1 "cc-pVDZ" end
+end
+* xyz 1 2
+H 0.0 0.0 0.0
+H 0.0 0.0 0.74
+*
+"""
+
+
+def _round_trip(parsed, tmp_path):
+    inp = parsed.to_orcainp(str(tmp_path / "new.inp"))
+    inp.write_input()
+    return read_input(inp.orcainp_name)
+
+
+def test_parse_input(tmp_path):
+    parsed = parse_input(INPUT)
+    assert parsed.keywords == ["B3LYP", "def2-SVP", "Opt", "TightSCF"]
+    assert (parsed.nprocs, parsed.maxcore, parsed.charge, parsed.mult) == (4, 3000, 1, 2)
+    assert [name for name, _ in parsed.blocks] == ["pal", "maxcore", "geom", "basis"]
+    assert parsed.get_block("geom").endswith("{ B 0 1 C }\n  end\nend")
+    assert parsed.get_block("basis") == '%basis\n  NewGTO 1 "cc-pVDZ" end\nend'
+    assert parsed.molecule.formula() == "H2"
+
+    again = _round_trip(parsed, tmp_path)
+    for attribute in ("keywords", "nprocs", "maxcore", "charge", "mult", "obl_block", "coordinate_type"):
+        assert getattr(again, attribute) == getattr(parsed, attribute)
+    assert again.blocks[2:] == parsed.blocks[2:]
+    assert again.molecule.to_list() == parsed.molecule.to_list()
+
+
+def test_parse_xyzfile(tmp_path):
+    Molecule(["H", "H"], [[0.0, 0.0, 0.0], [0.0, 0.0, 0.74]]).write(str(tmp_path / "h2.xyz"))
+    (tmp_path / "calc.inp").write_text('! HF def2-SVP\n%moinp "old.gbw"\n*xyzfile 0 1 h2.xyz\n')
+    parsed = read_input(str(tmp_path / "calc.inp"))
+    assert (parsed.coordinate_type, parsed.xyz_file, parsed.guess_file) == ("xyzfile", "h2.xyz", "old.gbw")
+
+    again = _round_trip(parsed, tmp_path)
+    assert again.coordinate_type == "xyz" and again.guess_file == "old.gbw"
+    assert again.keywords == ["HF", "def2-SVP", "MORead"]
+    assert again.molecule.to_list() == parsed.molecule.to_list()
+
+
+def test_parse_internal_coordinates():
+    parsed = parse_input("! HF\n*int 0 1\nC 0 0 0 0.0 0.0 0.0\nO 1 0 0 1.2 0.0 0.0\n*\n")
+    assert parsed.coordinate_type == "int" and parsed.molecule is None
+    assert parsed.coordinates_text == "C 0 0 0 0.0 0.0 0.0\nO 1 0 0 1.2 0.0 0.0\n"
+    with pytest.raises(BaseException, match="not int"):
+        parsed.to_orcainp()
+
+
+def test_parse_input_errors():
+    with pytest.raises(BaseException, match=r"must be lines of .* \(scan.inp, line 3\)"):
+        parse_input("! HF\n%paras R = 0.7, 1.2, 6 end\n* xyz 0 1\nH 0 0 0\nH 0 0 {R}\n*\n", "scan.inp")
+    with pytest.raises(BaseException, match=r"%geom block is not closed"):
+        parse_input("! HF\n%geom Constraints { B 0 1 C } end\n")
+    with pytest.raises(BaseException, match=r"not closed with \*"):
+        parse_input("! HF\n* xyz 0 1\nH 0 0 0\n")
+
+
+def test_write_inputs(tmp_path):
+    geometries = {"h2": "H 0.0 0.0 0.0\nH 0.0 0.0 0.74\n", "lih": "Li 0.0 0.0 0.0\nH 0.0 0.0 1.6\n"}
+    methods = ["B3LYP D3BJ", "PBE0"]
+    basis_sets = ["def2-SVP", "def2-TZVP"]
+    options = dict(obl_block="%scf\n  MaxIter 200\nend", charge=1, mult=2, guess_file="guess.gbw", nprocs=4, maxcore=2000)
+    written = write_inputs(geometries, methods, basis_sets, directory=str(tmp_path / "sweep"), **options)
+    assert len(written) == 8
+    assert os.path.basename(written[0]) == "h2_B3LYP-D3BJ_def2-SVP.inp"
+
+    # Byte for byte the inputs ORCAINP writes
+    expected = {}
+    for geometry_name, geometry in geometries.items():
+        for method in methods:
+            for basis in basis_sets:
+                name = f"{geometry_name}_{method.replace(' ', '-')}_{basis}.inp"
+                inp = ORCAINP(str(tmp_path / name), geometry, f"! {method} {basis}", **options)
+                inp.write_input()
+                expected[name] = (tmp_path / name).read_bytes()
+    assert {os.path.basename(f): Path(f).read_bytes() for f in written} == expected
+
+    members = write_inputs(geometries, methods, basis_sets, archive=str(tmp_path / "sweep.tar.gz"), **options)
+    with tarfile.open(tmp_path / "sweep.tar.gz") as archive:
+        assert {name: archive.extractfile(name).read() for name in members} == expected
+
+
+def test_write_inputs_without_basis_sweep(tmp_path):
+    xyz_file = str(tmp_path / "water.xyz")
+    Molecule(["O", "H", "H"], [[0.0, 0.0, 0.0], [0.0, 0.76, 0.59], [0.0, -0.76, 0.59]]).write(xyz_file)
+    written = write_inputs([xyz_file], {"hf": "HF"}, osi_template="! {method} def2-SVP{basis}", directory=str(tmp_path))
+    assert written == [str(tmp_path / "water_hf.inp")]
+    assert read_input(written[0]).keywords == ["HF", "def2-SVP"]
@@ -0,0 +1,56 @@
+import os
+from pathlib import Path
+
+from conftest import EXAMPLES
+from orcatools.cache import RunCache
+from orcatools.inp import ORCAINP
+from orcatools.orcarun import run
+from orcatools.out import ORCAOUT
+
+def test_canonical_hash():
+    molecule = ORCAOUT(os.path.join(EXAMPLES, "a.out")).molecule
+    reference = ORCAINP("a.inp", molecule, "! B3LYP def2-SVP TightSCF", "%scf\n  maxiter 100 # comment\nend", 2, 1)
+    shifted = molecule.copy()
+    shifted.coordinates[0] += 1e-6
+    same = ORCAINP(
+        "b.inp", shifted, "!tightscf  def2-svp\n! b3lyp PAL8", "%SCF MaxIter 100 END\n%maxcore 2000", 2, 1,
+        guess_file="guess.gbw", nprocs=8,
+    )
+    assert same.canonical_hash() == reference.canonical_hash()
+    assert ORCAINP("c.inp", molecule, "! B3LYP def2-TZVP", charge=2).canonical_hash() != reference.canonical_hash()
+    assert ORCAINP("d.inp", molecule, "! B3LYP def2-SVP TightSCF", charge=2, mult=3).canonical_hash() != reference.canonical_hash()
+
+
+def test_run_cache_entries(tmp_path):
+    output = tmp_path / "calc.out"
+    output.write_bytes(Path(EXAMPLES, "a.out").read_bytes())
+    with RunCache(str(tmp_path / "runs.sqlite")) as memo:
+        memo.set("key", str(output), str(tmp_path / "calc-runfiles"))
+        assert memo.get("key") == (str(output), str(tmp_path / "calc-runfiles"))
+        assert memo.get("other") is None
+        # Outputs which were removed are dropped
+        output.unlink()
+        assert memo.get("key") is None and len(memo) == 0
+
+
+def test_run_memo(tmp_path, fake_orca):
+    fake = fake_orca()
+    orca = fake.path
+    molecule = ORCAOUT(os.path.join(EXAMPLES, "a.out")).molecule
+    with RunCache(str(tmp_path / "runs.sqlite")) as memo:
+        first = ORCAINP(str(tmp_path / "first.inp"), molecule, "! B3LYP def2-SVP", charge=2)
+        first.write_input()
+        result = run(first.orcainp_name, orca=orca, memo=memo)
+        assert result.returncode == 0 and fake.runs == 1
+
+        second = ORCAINP(str(tmp_path / "second.inp"), molecule, "! def2-svp b3lyp", charge=2)
+        second.write_input()
+        result = run(second.orcainp_name, orca=orca, memo=memo)
+        assert result.returncode is None and fake.runs == 1
+        assert result.normal_termination
+        assert sorted(os.listdir(result.runfiles)) == ["second.gbw", "second.new.inp"]
+
+        third = ORCAINP(str(tmp_path / "third.inp"), molecule, "! B3LYP def2-TZVP", charge=2)
+        third.write_input()
+        assert run(third.orcainp_name, orca=orca, memo=memo).returncode == 0
+        assert fake.runs == 2 and len(memo) == 2
@@ -0,0 +1,140 @@
+import os
+import shutil
+import time
+
+import numpy as np
+import pytest
+
+from conftest import EXAMPLES
+from orcatools.compress import compress_file, pack_directory
+from orcatools.inp import ORCAINP
+from orcatools.orcarun import resume, run, set_resources
+from orcatools.out import ORCAOUT
+
+# Fake ORCA which leaves a background child running, as mpirun and the orca_*_mpi programs do
+HANGING_ORCA = """#!/bin/sh
+sleep 60 &
+echo $! > "$(dirname "$0")/child.pid"
+sleep 60
+"""
+
+
+def _alive(pid):
+    # Killed children may linger a moment as zombies before being reaped
+    try:
+        with open(f"/proc/{pid}/stat") as stat_file:
+            return stat_file.read().split(")")[-1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_set_resources():
+    text = "%pal\n  nprocs 8\nend\n! B3LYP def2-SVP\n%maxcore 1000\n* xyzfile 0 1 mol.xyz\n"
+    assert set_resources(text) == text
+    assert set_resources(text, nprocs=4, maxcore=2000) == (
+        "%pal nprocs 4 end\n%maxcore 2000\n! B3LYP def2-SVP\n* xyzfile 0 1 mol.xyz\n"
+    )
+    assert set_resources(text, maxcore=500).startswith("%maxcore 500\n%pal\n  nprocs 8\nend\n")
+
+
+def test_run(tmp_path, fake_orca):
+    orca = fake_orca().path
+    scratch = tmp_path / "scratch"
+    (tmp_path / "guess.gbw").write_text("guess")
+    (tmp_path / "calc.inp").write_text("! B3LYP def2-SVP\n%maxcore 1000\n* xyz 0 1\nH 0 0 0\nH 0 0 0.74\n*\n")
+
+    result = run(
+        str(tmp_path / "calc.inp"), nprocs=4, maxcore=2000, extrafiles=[str(tmp_path / "guess.gbw")],
+        orca=orca, scratch=str(scratch),
+    )
+    assert result.orcainp_name == str(tmp_path / "calc.inp")
+    assert result.output == str(tmp_path / "calc.out")
+    assert result.runfiles == str(tmp_path / "calc-runfiles")
+    assert result.returncode == 0 and result.walltime >= 0 and result.normal_termination
+
+    # ORCA ran in the scratch directory, with the extra files and the new resources
+    output = (tmp_path / "calc.out").read_text()
+    assert "%pal nprocs 4 end\n%maxcore 2000\n! B3LYP def2-SVP\n* xyz" in output
+    assert "guess.gbw" in output and "%maxcore 1000" not in output
+    assert os.listdir(scratch) == []
+    assert "number of processors = 4" in (tmp_path / "calc.nodes").read_text()
+
+    # Everything but the temporary files is copied back
+    runfiles = tmp_path / "calc-runfiles"
+    assert sorted(os.listdir(runfiles)) == ["calc.gbw", "calc.new.inp", "guess.gbw"]
+    assert (runfiles / "calc.new.inp").read_text().startswith("%pal nprocs 4 end\n")
+    assert (tmp_path / "calc.inp").read_text().startswith("! B3LYP")
+
+
+def test_run_output_name(tmp_path, fake_orca):
+    orca = fake_orca().path
+    (tmp_path / "calc.inp").write_text("! B3LYP def2-SVP\n* xyz 0 1\nH 0 0 0\nH 0 0 0.74\n*\n")
+    result = run(str(tmp_path / "calc.inp"), output=str(tmp_path / "other.out"), orca=orca, scratch=str(tmp_path))
+    assert result.output == str(tmp_path / "other.out") and result.normal_termination
+    assert not (tmp_path / "calc.out").exists()
+
+
+def test_run_timeout_kills_children(tmp_path, fake_orca):
+    orca = fake_orca(HANGING_ORCA).path
+    (tmp_path / "calc.inp").write_text("! B3LYP def2-SVP\n* xyz 0 1\nH 0 0 0\nH 0 0 0.74\n*\n")
+    result = run(str(tmp_path / "calc.inp"), orca=orca, scratch=str(tmp_path / "scratch"), timeout=1)
+    assert result.returncode == -9 and not result.normal_termination
+
+    child = int((tmp_path / "child.pid").read_text())
+    deadline = time.monotonic() + 5
+    while _alive(child) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _alive(child)
+
+
+def _crashed_run(directory, compacted=False):
+    """
+    Write calc.inp with the output of a run which died after printing its geometry, and its .gbw file in calc-runfiles.
+    """
+    orcainp = ORCAINP(str(directory / "calc.inp"), "H 0.0 0.0 0.0\nH 0.0 0.0 0.74\n", "! B3LYP def2-SVP")
+    orcainp.write_input()
+    with open(os.path.join(EXAMPLES, "a.out")) as source:
+        (directory / "calc.out").write_text("".join(source.readlines()[:1000]))
+    (directory / "calc-runfiles").mkdir()
+    (directory / "calc-runfiles" / "calc.gbw").write_text("previous gbw")
+    if compacted:
+        pack_directory(str(directory / "calc-runfiles"))
+    return orcainp
+
+
+@pytest.mark.parametrize("compacted", [False, True])
+def test_resume_crashed(tmp_path, fake_orca, compacted):
+    orca = fake_orca()
+    orcainp = _crashed_run(tmp_path, compacted)
+    crashed_output = (tmp_path / "calc.out").read_text()
+    last_geometry = ORCAOUT(os.path.join(EXAMPLES, "a.out")).get_molecule()
+
+    result = orcainp.resume(orca=orca.path, scratch=str(tmp_path / "scratch"))
+    assert orca.runs == 1 and result.returncode == 0 and result.normal_termination
+
+    # Restarted from the last geometry and from a copy of the previous .gbw, which ORCA received as an extra file
+    restart = ORCAINP.from_file(str(tmp_path / "calc.inp"))
+    assert restart.molecule.elements.tolist() == last_geometry.elements.tolist()
+    assert np.allclose(restart.molecule.coordinates, last_geometry.coordinates)
+    text = (tmp_path / "calc.inp").read_text()
+    assert "!MORead" in text and '%moinp "calc.restart.gbw"' in text
+    assert "calc.restart.gbw" in (tmp_path / "calc.out").read_text()
+    assert (tmp_path / "calc-runfiles" / "calc.restart.gbw").read_text() == "previous gbw"
+
+    # The output of the crashed run is kept
+    assert (tmp_path / "calc.out.1").read_text() == crashed_output
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_resume_finished(tmp_path, fake_orca, compressed):
+    orca = fake_orca()
+    orcainp = _crashed_run(tmp_path)
+    shutil.copy(os.path.join(EXAMPLES, "a.out"), tmp_path / "calc.out")
+    output = str(tmp_path / "calc.out")
+    if compressed:
+        output = compress_file(output)
+
+    result = resume(str(tmp_path / "calc.inp"), orca=orca.path, scratch=str(tmp_path / "scratch"))
+    assert result.output == output and result.returncode is None
+    assert orca.runs == 0 and not (tmp_path / "calc.out.1").exists()
+    assert ORCAINP.from_file(orcainp.orcainp_name).guess_file is None
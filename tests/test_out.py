@@ -0,0 +1,225 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import orcatools.out
+from conftest import EXAMPLES
+from orcatools.compress import compress_file, open_file
+from orcatools.molecule import Molecule
+from orcatools.out import ORCAOUT, check_normal_termination, iter_parse_many, parse_many
+
+OUTPUTS = [os.path.join(EXAMPLES, name) for name in ("a.out", "b.out")]
+
+
+def _full_scan(orcaout_name):
+    """
+    Read the attributes of an output scanning every line, as ORCAOUT did before the section index.
+    """
+    with open(orcaout_name, "r", encoding="utf8", errors="ignore") as out_file:
+        lines = out_file.readlines()
+    reference = {"optimization": False}
+    for i, line in enumerate(lines):
+        if "ORCA TERMINATED NORMALLY" in line:
+            clock = lines[i + 1].split()[3:]
+            reference["runtime"] = (
+                float(clock[0]) * 86400
+                + float(clock[2]) * 3600
+                + float(clock[4]) * 60
+                + float(clock[6])
+                + float(clock[8]) / 1000
+            )
+        if "Geometry Optimization Run" in line:
+            reference["optimization"] = True
+        if "FINAL SINGLE POINT ENERGY" in line:
+            reference["scf_energy"] = float(line.split()[-1])
+        if "CARTESIAN COORDINATES (ANGSTROEM)" in line:
+            block = []
+            for coordinates_line in lines[i + 2 :]:
+                if not coordinates_line.strip():
+                    break
+                block.append(coordinates_line)
+            reference["coordinates"] = [coordinates_line.strip() for coordinates_line in block]
+            reference["xyzstr"] = "".join(block)
+    return reference
+
+
+@pytest.mark.parametrize("output", OUTPUTS)
+def test_index_matches_full_scan(output):
+    out = ORCAOUT(output)
+    for attribute, value in _full_scan(output).items():
+        assert getattr(out, attribute) == value
+    assert len(out.coordinates) == out.molecule.natoms == 23
+
+
+def test_pinned_results():
+    a, b = (ORCAOUT(output) for output in OUTPUTS)
+    assert (a.scf_energy, a.runtime) == (-527.790676459792, 99.382)
+    assert (b.scf_energy, b.runtime) == (-527.787792738157, 134.513)
+    assert b.coordinates[0] == "Ru     5.143047    5.901015    8.240666"
+
+
+@pytest.mark.parametrize(
+    "getter, message",
+    [
+        ("get_thermal_corrections", "We did not find vibrational data in your output."),
+        ("get_correlation_cbs", "It seems your output is not from a CBS (extrapolate) calculation."),
+        ("get_nfod", "It seems your output is not from a FOD calculation."),
+        ("get_mcscf_correlation", "It seems your output is not from a NEVPT2, CASPT2 or MRCI calculation."),
+        ("get_absorption_data", "No absorption spectrum values found in the specified output file."),
+        ("get_active_space", "It seems your output is not from a CASSCF calculation."),
+        ("get_occupation_numbers", "It seems your output is not from a CASSCF calculation."),
+    ],
+)
+def test_missing_sections(getter, message):
+    # The same errors as the full scan for sections which are not in the output
+    with pytest.raises(BaseException) as error:
+        getattr(ORCAOUT(OUTPUTS[0]), getter)()
+    assert str(error.value).startswith(message)
+
+
+def _optimization(tmp_path, energies):
+    """
+    Write an output with one geometry and energy block of examples/a.out per energy, shifting the atoms along x at each step.
+    A None energy leaves the step without one.
+    """
+    text = Path(OUTPUTS[0]).read_text()
+    start = text.rindex("\n", 0, text.index("CARTESIAN COORDINATES (ANGSTROEM)")) + 1
+    stop = text.index("\n", text.rindex("FINAL SINGLE POINT ENERGY")) + 1
+    body = text[start:stop]
+    coordinates = ORCAOUT(OUTPUTS[0]).coordinates
+    steps = []
+    for step, energy in enumerate(energies):
+        block = body
+        for line in coordinates:
+            symbol, x, y, z = line.split()
+            block = block.replace(line, f"{symbol:6s}{float(x) + step:10.6f}    {y}    {z}")
+        if energy is None:
+            block = block[: block.index("FINAL SINGLE POINT ENERGY")]
+        else:
+            block = block.replace("-527.790676459792", f"{energy:.12f}")
+        steps.append(block)
+    output = tmp_path / "opt.out"
+    output.write_text(text[:start] + "".join(steps) + text[stop:])
+    return str(output)
+
+
+def test_trajectory(tmp_path):
+    output = _optimization(tmp_path, [-527.5, -527.7, None, -527.8])
+    out = ORCAOUT(output)
+    xyz_file = str(tmp_path / "trajectory.xyz")
+    coordinates, energies, elements = out.get_trajectory(xyz_file=xyz_file)
+    assert coordinates.shape == (4, 23, 3) and len(elements) == 23 and elements[0] == "Ru"
+    assert np.array_equal(energies[[0, 1, 3]], [-527.5, -527.7, -527.8]) and np.isnan(energies[2])
+    assert np.allclose(coordinates[1:] - coordinates[:-1], [1.0, 0.0, 0.0])
+    # The last step is the final geometry
+    assert np.array_equal(coordinates[-1], out.molecule.coordinates)
+
+    lines = Path(xyz_file).read_text().splitlines()
+    assert len(lines) == 4 * 25 and lines[1] == "Step 1 E = -527.500000000000"
+    assert np.allclose(Molecule.from_xyz("\n".join(lines[77:100])).coordinates, coordinates[3])
+
+
+def test_trajectory_single_point():
+    coordinates, energies, elements = ORCAOUT(OUTPUTS[1]).get_trajectory()
+    assert coordinates.shape == (1, 23, 3)
+    assert energies.tolist() == [-527.787792738157]
+
+
+CASSCF = """
+Number of active electrons          ...    4
+Number of active orbitals           ...    4
+Determined orbital ranges:
+   Internal       0 -   10 ( 11 orbitals)
+   Active        11 -   14 (  4 orbitals)
+   External      15 -   40 ( 26 orbitals)
+
+CASSCF RESULTS
+--------------
+
+Final CASSCF energy       : -527.790676459792 Eh
+
+ORBITAL ENERGIES
+  NO   OCC          E(Eh)            E(eV)
+  10   2.0000      -0.500000       -13.6057
+  11   1.9500      -0.400000       -10.8846
+  12   1.9000      -0.300000        -8.1634
+  13   0.1000       0.100000         2.7211
+  14   0.0500       0.200000         5.4423
+  15   0.0000       0.300000         8.1634
+  16   0.0000       0.400000        10.8846
+"""
+
+
+def test_casscf_getters_close_their_files(tmp_path, monkeypatch):
+    text = Path(OUTPUTS[0]).read_text()
+    position = text.index("-------------------------   --------------------\nFINAL SINGLE POINT ENERGY")
+    output = tmp_path / "casscf.out"
+    output.write_text(text[:position] + CASSCF + text[position:])
+
+    opened = []
+
+    def tracked_open_file(*args, **kwargs):
+        opened.append(open_file(*args, **kwargs))
+        return opened[-1]
+
+    out = ORCAOUT(str(output))
+    monkeypatch.setattr(orcatools.out, "open_file", tracked_open_file)
+    assert out.get_active_space() == (4, 4, (11, 14))
+    assert out.get_occupation_numbers() == [1.95, 1.9, 0.1, 0.05]
+    assert opened and all(fh.closed for fh in opened)
+
+
+def test_parse_many(tmp_path):
+    (tmp_path / "empty.out").write_text("")
+    (tmp_path / "unreadable.out").write_text("FINAL SINGLE POINT ENERGY -1.0\n")
+    (tmp_path / "unreadable.out").chmod(0)
+    paths = [
+        OUTPUTS[0],
+        str(tmp_path / "missing.out"),
+        str(tmp_path / "empty.out"),
+        OUTPUTS[1],
+        str(tmp_path / "unreadable.out"),
+    ]
+
+    # Chunks smaller than the input keep the order of the paths
+    chunks = list(iter_parse_many(paths, workers=1, chunk_size=2))
+    assert [chunk["path"] for chunk in chunks] == [paths[:2], paths[2:4], paths[4:]]
+    table = parse_many(paths, workers=1, chunk_size=2)
+    assert table["path"] == paths
+    assert table["scf_energy"] == [-527.790676459792, None, None, -527.787792738157, None]
+    assert table["runtime"] == [99.382, None, None, 134.513, None]
+    # The unreadable output also fails where permissions are not enforced (root), as it did not terminate
+    assert [bool(error) for error in table["error"]] == [False, True, True, False, True]
+    assert "not found" in table["error"][1]
+
+    assert parse_many(paths, workers=2, chunk_size=2) == table
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_check_normal_termination(tmp_path, compressed):
+    text = Path(OUTPUTS[0]).read_text()
+    marker = text.rindex("                             ****ORCA TERMINATED NORMALLY****")
+    runtime = text.rindex("TOTAL RUN TIME")
+    outputs = {
+        "finished": text,
+        "truncated": text[:marker],
+        "empty": "",
+        "no_runtime": text[:runtime],
+        # Messages printed after ORCA finished, as mpirun does, push the marker back
+        "trailing": text + "mpirun: warning: some ranks exited late\n" * 50,
+    }
+    paths = {}
+    for name, contents in outputs.items():
+        paths[name] = str(tmp_path / f"{name}.out")
+        Path(paths[name]).write_text(contents)
+        if compressed:
+            paths[name] = compress_file(paths[name])
+
+    assert check_normal_termination(paths["finished"]) == (True, 99.382)
+    assert check_normal_termination(paths["truncated"]) == (False, None)
+    assert check_normal_termination(paths["empty"]) == (False, None)
+    assert check_normal_termination(paths["no_runtime"]) == (True, None)
+    assert check_normal_termination(paths["trailing"]) == (True, 99.382)
+    assert check_normal_termination(paths["trailing"], tail_size=1024) == (False, None)
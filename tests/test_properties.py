@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import EXAMPLES
+from orcatools.out import ORCAOUT, parse_many
+
+# Total charge and number of unpaired electrons of the examples
+EXAMPLE_STATES = {"a.out": (2, 0), "b.out": (2, 2)}
+
+
+@pytest.mark.parametrize("example", sorted(EXAMPLE_STATES))
+@pytest.mark.parametrize("method", ["mulliken", "loewdin"])
+def test_charges(example, method):
+    out = ORCAOUT(os.path.join(EXAMPLES, example))
+    charge, unpaired = EXAMPLE_STATES[example]
+    charges = out.get_charges(method)
+    assert charges["elements"] == out.molecule.elements.tolist()
+    assert np.isclose(charges["charges"].sum(), charge, atol=1e-4)
+    if unpaired:
+        assert np.isclose(charges["spin_populations"].sum(), unpaired, atol=1e-4)
+    else:
+        assert charges["spin_populations"] is None
+
+
+def test_orbital_energies():
+    restricted = ORCAOUT(os.path.join(EXAMPLES, "a.out")).get_orbital_energies()
+    assert restricted["energies"].shape == (1, 347)
+    assert restricted["energies"][0, 0] == -19.398346
+    unrestricted = ORCAOUT(os.path.join(EXAMPLES, "b.out")).get_orbital_energies()
+    assert unrestricted["energies"].shape == (2, 347)
+    # Two more alpha than beta electrons in the triplet
+    occupied = (unrestricted["occupations"] > 0).sum(axis=1)
+    assert occupied[0] - occupied[1] == 2
+
+
+def test_homo_lumo():
+    frontier = ORCAOUT(os.path.join(EXAMPLES, "a.out")).get_homo_lumo()
+    assert frontier["homo"] == -0.479027 and frontier["lumo"] == -0.381619
+    assert np.isclose(frontier["gap"], frontier["lumo"] - frontier["homo"])
+
+
+def test_mayer_bond_orders():
+    bonds = ORCAOUT(os.path.join(EXAMPLES, "a.out")).get_mayer_bond_orders()
+    assert bonds["pairs"].shape == (23, 2)
+    assert bonds["pairs"][0].tolist() == [0, 1] and bonds["orders"][0] == 0.7943
+
+
+def test_dipole_moment():
+    dipole = ORCAOUT(os.path.join(EXAMPLES, "a.out")).get_dipole_moment()
+    assert dipole["vector"].tolist() == [-3.26798, -0.00678, -0.18123]
+    assert dipole["magnitude"] == 3.27301 and dipole["magnitude_debye"] == 8.31933
+
+
+def test_batch_fields():
+    paths = [os.path.join(EXAMPLES, name) for name in sorted(EXAMPLE_STATES)]
+    table = parse_many(paths, ["loewdin_charges", "dipole_moment"], workers=1)
+    assert table["error"] == [None, None]
+    assert [len(row["charges"]) for row in table["loewdin_charges"]] == [23, 23]
@@ -0,0 +1,65 @@
+import pytest
+
+from orcatools.scheduler import Scheduler
+
+
+def test_scheduler_packs_jobs(runner):
+    runner.hold = True
+    scheduler = Scheduler(cores=4, memory=4000, orca="orca")
+    big = scheduler.submit("big.inp", nprocs=2, maxcore=1500)
+    waiting = scheduler.submit("waiting.inp", nprocs=2, maxcore=1000)
+    small = scheduler.submit("small.inp", nprocs=1, maxcore=1000)
+    runner.wait_started("big")
+    runner.wait_started("small")
+    # waiting.inp needs 2000 MB but only 1000 MB were left after big.inp, so the smaller job starts ahead of it
+    assert waiting.running() is False and big.running() and small.running()
+    assert (scheduler.free_cores, scheduler.free_memory) == (1, 0)
+    assert runner.calls["big"] == {"output": None, "nprocs": 2, "maxcore": 1500, "extrafiles": None, "orca": "orca"}
+
+    runner.release("big")
+    runner.wait_started("waiting")
+    assert big.result() == "big"
+    assert (scheduler.free_cores, scheduler.free_memory) == (1, 1000)
+
+    runner.release("waiting")
+    runner.release("small")
+    scheduler.shutdown(wait=True)
+    assert waiting.result() == "waiting" and small.result() == "small"
+    assert (scheduler.free_cores, scheduler.free_memory) == (4, 4000)
+
+
+def test_scheduler_queues_on_cores(runner):
+    runner.hold = True
+    with Scheduler(cores=2, memory=None) as scheduler:
+        first = scheduler.submit("first.inp", nprocs=2)
+        second = scheduler.submit("second.inp")
+        runner.wait_started("first")
+        assert scheduler.free_cores == 0 and not second.running()
+        runner.release("first")
+        runner.release("second")
+    assert first.result() == "first" and second.result() == "second"
+    assert scheduler.free_cores == 2
+
+
+def test_scheduler_releases_failed_jobs(runner):
+    runner.hold = True
+    with Scheduler(cores=2, memory=2000) as scheduler:
+        bad = scheduler.submit("bad.inp", nprocs=2, maxcore=1000)
+        after = scheduler.submit("after.inp", nprocs=2, maxcore=1000)
+        runner.release("bad")
+        runner.wait_started("after")
+        runner.release("after")
+    assert isinstance(bad.exception(), RuntimeError)
+    assert after.result() == "after"
+    assert (scheduler.free_cores, scheduler.free_memory) == (2, 2000)
+
+
+def test_scheduler_rejects_oversized_jobs(runner):
+    scheduler = Scheduler(cores=2, memory=1000)
+    with pytest.raises(ValueError):
+        scheduler.submit("calc.inp", nprocs=4)
+    with pytest.raises(ValueError):
+        scheduler.submit("calc.inp", nprocs=2, maxcore=1000)
+    scheduler.shutdown()
+    with pytest.raises(RuntimeError):
+        scheduler.submit("calc.inp")
@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+import pytest
+
+import orcatools.spectrum
+from conftest import EXAMPLES
+from orcatools.out import ORCAOUT
+from orcatools.spectrum import boltzmann_weights, broaden, build_spectrum, convert_energy
+
+# CASSCF absorption spectrum section, as printed by ORCA
+ABSORPTION = """
+---------------------------------------------------------------------------------
+                         ABSORPTION SPECTRUM
+---------------------------------------------------------------------------------
+      States           Energy   Wavelength   fosc          T2         TX         TY         TZ
+                       (cm-1)     (nm)                   (au**2)     (au)       (au)       (au)
+---------------------------------------------------------------------------------
+   0( 0)-> 1( 0) 1   {0:9.1f}    {1:6.1f}   0.100000000   0.10000    0.10000    0.10000    0.10000
+   0( 0)-> 2( 0) 1   {2:9.1f}    {3:6.1f}   0.300000000   0.30000    0.30000    0.30000    0.30000
+
+"""
+
+
+def _output(tmp_path, name, energies):
+    with open(os.path.join(EXAMPLES, "a.out")) as fh:
+        text = fh.read()
+    position = text.index("-------------------------   --------------------\nFINAL SINGLE POINT ENERGY")
+    values = [value for energy in energies for value in (energy, 1e7 / energy)]
+    output = tmp_path / name
+    output.write_text(text[:position] + ABSORPTION.format(*values) + text[position:])
+    return str(output)
+
+
+def test_convert_energy():
+    assert convert_energy(10000.0, "cm", "nm") == pytest.approx(1000.0)
+    assert convert_energy(1.0, "eV", "cm") == pytest.approx(8065.54, rel=1e-5)
+    assert np.allclose(convert_energy(convert_energy([2.0, 4.0], "eV", "nm"), "nm", "eV"), [2.0, 4.0])
+    with pytest.raises(ValueError):
+        convert_energy(1.0, "eV", "kcal")
+
+
+def test_boltzmann_weights():
+    weights = boltzmann_weights([-1.0, -1.0, -0.98])
+    assert weights.sum() == pytest.approx(1.0)
+    assert weights[0] == weights[1] and weights[2] < 1e-6
+
+
+@pytest.mark.parametrize("shape", ["gaussian", "lorentzian"])
+def test_broaden(monkeypatch, shape):
+    grid = np.linspace(-50.0, 60.0, 200001)
+    energies, fosc = np.array([3.0, 4.5, 5.0]), np.array([0.2, 0.5, 0.1])
+    intensity = broaden(energies, fosc, grid, fwhm=0.2, shape=shape)
+    # Each line has an area of its oscillator strength
+    assert intensity.sum() * (grid[1] - grid[0]) == pytest.approx(fosc.sum(), rel=2e-3)
+    assert grid[np.argmax(intensity)] == pytest.approx(4.5, abs=1e-3)
+
+    # The transitions are broadened in chunks
+    monkeypatch.setattr(orcatools.spectrum, "_CHUNK", 2)
+    assert np.allclose(broaden(energies, fosc, grid, fwhm=0.2, shape=shape), intensity)
+
+
+def test_broaden_units():
+    grid_nm = np.linspace(200.0, 600.0, 50)
+    in_ev = broaden([3.0], [1.0], convert_energy(grid_nm, "nm", "eV"))
+    in_nm = broaden(convert_energy([3.0], "eV", "nm"), [1.0], grid_nm, unit="nm")
+    assert np.allclose(in_ev, in_nm)
+    with pytest.raises(ValueError):
+        broaden([3.0], [1.0], grid_nm, shape="voigt")
+
+
+def test_build_spectrum(tmp_path):
+    first = _output(tmp_path, "first.out", [20000.0, 30000.0])
+    second = _output(tmp_path, "second.out", [25000.0, 35000.0])
+    assert ORCAOUT(first).get_absorption_data(unit="cm") == ([20000.0, 30000.0], [0.1, 0.3])
+
+    grid = np.linspace(1.0, 6.0, 500)
+    _, single = build_spectrum(first, grid=grid)
+    _, other = build_spectrum(second, grid=grid)
+    spectrum_grid, ensemble = build_spectrum([first, second], grid=grid, weights=[0.25, 0.75])
+    assert np.array_equal(spectrum_grid, grid)
+    assert np.allclose(ensemble, 0.25 * single + 0.75 * other)
+
+    grid, intensity = build_spectrum([first, second], unit="nm", npoints=300)
+    assert grid.shape == intensity.shape == (300,)
+    assert grid.min() < 1e7 / 35000.0 and grid.max() > 1e7 / 20000.0
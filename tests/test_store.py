@@ -0,0 +1,93 @@
+import os
+import shutil
+
+import numpy as np
+
+import orcatools.store
+from conftest import EXAMPLES
+from orcatools.out import parse_many
+from orcatools.store import _STORE_FIELDS, ResultStore, _table_to_columns
+
+
+def test_append_picks_up_finished_outputs(tmp_path):
+    with open(os.path.join(EXAMPLES, "a.out"), "rb") as fh:
+        text = fh.read()
+    running = tmp_path / "running.out"
+    # A calculation still running has no normal termination yet
+    running.write_bytes(text[: text.index(b"ORCA TERMINATED NORMALLY")])
+    finished = tmp_path / "b.out"
+    shutil.copy(os.path.join(EXAMPLES, "b.out"), finished)
+    paths = [str(running), str(finished), str(tmp_path / "missing.out")]
+
+    store = ResultStore(str(tmp_path / "store"))
+    assert store.append(paths, workers=1) == 1
+    assert store.paths() == {str(finished)}
+
+    running.write_bytes(text)
+    assert store.append(paths, workers=1) == 1
+    assert store.paths() == {str(finished), str(running)}
+    data = store.read(["path", "scf_energy", "coordinates"])
+    assert len(data["path"]) == 2 and np.isfinite(data["scf_energy"]).all()
+    assert data["coordinates_offsets"][-1] == len(data["coordinates"])
+
+
+def test_concurrent_parts_are_not_overwritten(tmp_path, monkeypatch):
+    store = ResultStore(str(tmp_path / "store"))
+    parts = store._parts
+    # Both appends list the parts before either one writes, as concurrent appends do
+    monkeypatch.setattr(store, "_parts", lambda: [])
+    first = store._write_part({"path": np.array(["first.out"])})
+    second = store._write_part({"path": np.array(["second.out"])})
+    monkeypatch.setattr(store, "_parts", parts)
+    assert [os.path.basename(part) for part in (first, second)] == ["part-000000.npz", "part-000001.npz"]
+    assert store.paths() == {"first.out", "second.out"}
+    assert sorted(os.listdir(tmp_path / "store")) == ["part-000000.npz", "part-000001.npz"]
+
+
+def test_rejected_outputs_are_parsed_again_only_once_changed(tmp_path, monkeypatch):
+    crashed = tmp_path / "crashed.out"
+    crashed.write_text("ORCA finished by error termination in SCF\n")
+    paths = [str(crashed), str(tmp_path / "missing.out")]
+    parsed = []
+    iter_parse_many = orcatools.store.iter_parse_many
+
+    def tracked_iter_parse_many(paths, *args):
+        paths = list(paths)
+        parsed.extend(paths)
+        return iter_parse_many(paths, *args)
+
+    monkeypatch.setattr(orcatools.store, "iter_parse_many", tracked_iter_parse_many)
+    store = ResultStore(str(tmp_path / "store"))
+    assert store.append(paths, workers=1) == 0
+    assert list(store.rejected()) == [str(crashed)] and "normal termination" in store.rejected()[str(crashed)]
+
+    # The missing output is tried again, the unchanged crashed one is not
+    parsed.clear()
+    assert store.append(paths, workers=1) == 0
+    assert parsed == [str(tmp_path / "missing.out")]
+
+    shutil.copy(os.path.join(EXAMPLES, "b.out"), crashed)
+    assert store.append(paths, workers=1) == 1
+    assert store.paths() == {str(crashed)} and store.rejected() == {}
+
+
+def test_compact_keeps_parts_appended_meanwhile(tmp_path, monkeypatch):
+    a, b = (os.path.join(EXAMPLES, name) for name in ("a.out", "b.out"))
+    store = ResultStore(str(tmp_path / "store"))
+    for _ in range(3):
+        store._write_part(_table_to_columns(parse_many([a], _STORE_FIELDS, workers=1)))
+    concatenate = store._concatenate
+
+    def concatenate_during_append(part_files, names):
+        # Another process appends a part after compact listed the parts
+        store._write_part(_table_to_columns(parse_many([b], _STORE_FIELDS, workers=1)))
+        return concatenate(part_files, names)
+
+    monkeypatch.setattr(store, "_concatenate", concatenate_during_append)
+    store.compact()
+    monkeypatch.setattr(store, "_concatenate", concatenate)
+
+    assert sorted(os.listdir(tmp_path / "store")) == ["part-000000.npz", "part-000003.npz"]
+    data = store.read(["path", "coordinates"])
+    assert data["path"].tolist() == [a, a, a, b]
+    assert data["coordinates_offsets"].tolist() == [0, 23, 46, 69, 92]
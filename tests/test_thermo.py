@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import ROOT
+from orcatools.thermo import HARTREE_TO_JMOL, R_GAS, thermochemistry, thermochemistry_from_outputs
+
+WATER = ([1594.6, 3657.1, 3755.9], 18.0106, [27.877, 14.512, 9.285])
+CO2 = ([667.4, 667.4, 1333.0, 2349.1], 43.9898, [0.0, 0.39021, 0.39021])
+T = 298.15
+
+
+def _entropy(result, temperature=T):
+    # J/(mol K) from the T*S term in Hartree
+    return result["S"] * HARTREE_TO_JMOL / temperature
+
+
+def test_standard_entropies():
+    water = thermochemistry(*WATER, symmetry_number=2)
+    assert _entropy(water) == pytest.approx(188.6, abs=0.05)
+    assert (water["H"] - water["U"]) * HARTREE_TO_JMOL == pytest.approx(R_GAS * T)
+    assert water["G"] == pytest.approx(water["H"] - water["S"])
+    # Linear molecule
+    assert _entropy(thermochemistry(*CO2, symmetry_number=2)) == pytest.approx(213.7, abs=0.05)
+
+
+def test_grid_broadcasting():
+    temperature = np.array([200.0, 298.15, 400.0])
+    result = thermochemistry(
+        [WATER[0], CO2[0]], [WATER[1], CO2[1]], [WATER[2], CO2[2]],
+        temperature=temperature[:, None], pressure=[1.0, 10.0], symmetry_number=[2, 2],
+    )
+    for value in result.values():
+        assert value.shape == (2, 3, 2)
+    # The same as computing each molecule and condition alone
+    single = thermochemistry(*CO2, temperature=400.0, pressure=10.0, symmetry_number=2)
+    assert result["G"][1, 2, 1] == pytest.approx(single["G"])
+    # Only the translational entropy depends on the pressure
+    assert np.allclose(result["U"][..., 0], result["U"][..., 1])
+    assert np.allclose(
+        _entropy(result, temperature[:, None])[..., 0] - _entropy(result, temperature[:, None])[..., 1],
+        R_GAS * np.log(10.0),
+    )
+
+
+def test_quasi_rrho():
+    low = ([30.0, 80.0, 1500.0], 100.0, [0.1, 0.05, 0.04])
+    harmonic = thermochemistry(*low)
+    grimme = thermochemistry(*low, qrrho="grimme")
+    truhlar = thermochemistry(*low, qrrho="truhlar")
+    assert grimme["S"] < harmonic["S"] and truhlar["S"] < harmonic["S"]
+    assert grimme["ZPE"] == harmonic["ZPE"] and grimme["U"] == harmonic["U"]
+    # Without low frequencies nothing changes
+    assert thermochemistry(*WATER, qrrho="truhlar")["S"] == pytest.approx(thermochemistry(*WATER)["S"])
+    with pytest.raises(ValueError):
+        thermochemistry(*low, qrrho="other")
+
+
+def test_thermochemistry_from_outputs():
+    output = os.path.join(ROOT, "tests", "data", "freq.out")
+    result = thermochemistry_from_outputs(output, temperature=[298.15, 500.0])
+    assert result["G"].shape == (2,)
+    assert np.allclose(result["G_total"], result["E"] + result["G"])
+    assert np.allclose(thermochemistry_from_outputs([output, output])["S"], result["S"][0])
+
+
+def test_reproduces_orca_thermochemistry():
+    # Excerpt of a real ORCA 6.1 optimization and frequency run (examples/selectivity/DA_endo_12_i.out of GoodVibes 4.4.0,
+    # MIT license), whose vibrational entropy uses Grimme's quasi-RRHO with a 100 cm-1 reference frequency
+    output = os.path.join(ROOT, "tests", "data", "freq_orca6.out")
+    result = thermochemistry_from_outputs(output, temperature=298.15, pressure=1.0, qrrho="grimme")
+    # Printed by ORCA in Hartree, as corrections to its electronic energy of -613.88450977 Eh
+    electronic = -613.88450977
+    printed = {
+        "ZPE": 0.20402236,
+        "U": -613.66955344 - electronic,
+        "H": -613.66860923 - electronic,
+        "S": 0.04784987,
+        "G": 0.16805068,
+    }
+    # Within 1e-6 Eh (below 0.001 kcal/mol), the rounding of the printed mass and frequencies
+    for key, value in printed.items():
+        assert result[key] == pytest.approx(value, abs=1e-6), key
@@ -0,0 +1,85 @@
+import os
+import warnings
+
+import numpy as np
+import pytest
+
+from orcatools.tools import _distance_matrices, get_coordinates_array, idpp_interpolate, interpolate, interpolate_array, plot_orbitals
+
+XYZ_A = "O 0.0 0.0 0.0\nH 0.0 0.8 0.6\nH 0.0 -0.8 0.6\n"
+XYZ_B = "O 0.0 0.0 1.0\nH 0.0 1.2 1.6\nH 0.0 -1.0 1.5\n"
+
+
+def test_interpolate_array():
+    elements, images = interpolate_array(XYZ_A, XYZ_B, 5)
+    coord_a, coord_b = get_coordinates_array(XYZ_A)[1], get_coordinates_array(XYZ_B)[1]
+    assert elements == ["O", "H", "H"] and images.shape == (5, 3, 3)
+    assert np.array_equal(images[0], coord_a) and np.array_equal(images[-1], coord_b)
+    assert np.allclose(images[2], (coord_a + coord_b) / 2)
+    # Equally spaced images
+    assert np.allclose(np.diff(images, axis=0), (coord_b - coord_a) / 4)
+
+    # The list version gives the same images
+    assert np.allclose([[row[1:] for row in image] for image in interpolate(XYZ_A, XYZ_B, 5)], images)
+    assert interpolate(XYZ_A, XYZ_B, 5)[1][0][0] == "O"
+
+    with pytest.raises(BaseException, match="same number of atoms"):
+        interpolate_array(XYZ_A, "O 0.0 0.0 0.0\n", 5)
+
+
+def test_interpolate_array_files(tmp_path):
+    xyz_file = str(tmp_path / "path.xyz")
+    prefix = str(tmp_path / "image")
+    _, images = interpolate_array(XYZ_A, XYZ_B, 3, xyz_file=xyz_file, xyz_prefix=prefix)
+    lines = (tmp_path / "path.xyz").read_text().splitlines()
+    assert len(lines) == 3 * 5 and lines[1] == "Image 1" and lines[11] == "Image 3"
+    for idx, image in enumerate(images):
+        assert np.allclose(get_coordinates_array(f"{prefix}_{idx + 1:02d}.xyz")[1], image)
+
+
+def test_idpp_coincident_atoms():
+    # Swapping two atoms makes them coincide in the middle image of the linear interpolation
+    xyz_a = "H 0.0 0.0 0.0\nH 1.0 0.0 0.0\nO 0.5 1.5 0.0\n"
+    xyz_b = "H 1.0 0.0 0.0\nH 0.0 0.0 0.0\nO 0.5 1.5 0.0\n"
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        _, images = idpp_interpolate(xyz_a, xyz_b, 5)
+    assert np.isfinite(images).all()
+    distances = _distance_matrices(images)
+    pairs = np.triu_indices(3, k=1)
+    assert distances[:, pairs[0], pairs[1]].min() > 0.5
+
+
+# Fake orca_plot which reads the orbital from its menu input and writes a cube file named after it
+FAKE_ORCA_PLOT = """#!/bin/sh
+read choice
+read orbital
+echo "plotting orbital $orbital of $1"
+echo "cube $orbital" > "${1%.*}.mo${orbital}a.cube"
+echo "$orbital" >> "$(dirname "$0")/runs.log"
+"""
+
+
+def test_plot_orbitals(tmp_path, monkeypatch, fake_orca):
+    orca_plot = fake_orca(FAKE_ORCA_PLOT, "orca_plot")
+    (tmp_path / "mol.gbw").write_text("gbw")
+    monkeypatch.chdir(tmp_path)
+
+    # A relative path has to keep working from the scratch directory of each orbital
+    cubes = plot_orbitals("mol.gbw", (1, 3), orca_plot_path="./orca_plot", workers=2)
+    assert cubes == {orbital: f"mol.mo{orbital}a.cube" for orbital in (1, 2, 3)}
+    for orbital, cube in cubes.items():
+        assert (tmp_path / cube).read_text() == f"cube {orbital}\n"
+        assert (tmp_path / f"mol_plot.mo{orbital}.log").read_text() == f"plotting orbital {orbital} of mol.gbw\n"
+    assert orca_plot.runs == 3
+    assert not [name for name in os.listdir(tmp_path) if name.startswith("mol.mo") and os.path.isdir(name)]
+
+    # A bare name is looked up in the PATH and the existing cube files are not plotted again
+    monkeypatch.setenv("PATH", str(tmp_path), prepend=os.pathsep)
+    cubes = plot_orbitals("mol.gbw", (2, 4), orca_plot_path="orca_plot", workers=2, skip_existing=True)
+    assert cubes == {orbital: f"mol.mo{orbital}a.cube" for orbital in (2, 3, 4)}
+    assert (tmp_path / "mol.mo4a.cube").read_text() == "cube 4\n"
+    assert sorted((tmp_path / "runs.log").read_text().split()) == ["1", "2", "3", "4"]
+
+    with pytest.raises(BaseException, match="not found"):
+        plot_orbitals("mol.gbw", 1, orca_plot_path="no_such_orca_plot")
@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import ROOT
+from orcatools.out import ORCAOUT, read_hess
+
+DATA = os.path.join(ROOT, "tests", "data")
+
+
+def test_frequencies_and_modes():
+    out = ORCAOUT(os.path.join(DATA, "freq.out"))
+    frequencies = out.get_frequencies()
+    assert frequencies.shape == (9,)
+    assert np.allclose(frequencies[6:], [67.99, 1006.13, 2511.54])
+    assert not frequencies[:6].any()
+
+    modes = out.get_normal_modes()
+    assert modes.shape == (9, 3, 3)
+    # Mode 0 is the first printed column, atom 1 x is its fourth row
+    assert modes[0, 1, 0] == -1.009618
+    assert modes[8, 2, 2] == -1.091146
+
+    ir = out.get_ir_spectrum()
+    assert ir["modes"].tolist() == [6, 7, 8]
+    assert np.allclose(ir["intensities"], [9.0, 10.5, 12.0])
+    assert ir["tdm"].shape == (3, 3)
+
+
+def test_truncated_normal_modes(tmp_path):
+    with open(os.path.join(DATA, "freq.out")) as freq:
+        lines = freq.readlines()
+    truncated = tmp_path / "freq.out"
+    # Cut the output right after the explanation text of the normal modes
+    truncated.write_text("".join(lines[: lines.index("NORMAL MODES\n") + 6]))
+    out = ORCAOUT(str(truncated), function_mode=True)
+    assert out.get_frequencies().shape == (9,)
+    with pytest.raises(BaseException, match="did not find the normal modes"):
+        out.get_normal_modes()
+
+
+def test_read_hess():
+    hess = read_hess(os.path.join(DATA, "freq.hess"))
+    assert hess["hessian"].shape == (9, 9)
+    assert hess["hessian"][0, 0] == -1.2776801664
+    assert hess["hessian"][8, 8] == 1.8164759409
+    assert np.allclose(hess["frequencies"][6:], [67.991448, 1006.125526, 2511.542918])
+    assert hess["energy"] == -1.0
+    assert hess["dipole_derivatives"].shape == (9, 3)
+    # The output prints the same modes with fewer digits
+    modes = ORCAOUT(os.path.join(DATA, "freq.out")).get_normal_modes()
+    assert np.allclose(hess["normal_modes"], modes, atol=1e-6)
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from conftest import EXAMPLES
+from orcatools.inp import ORCAINP
+from orcatools.out import ORCAOUT
+from orcatools.workflow import Workflow
+
+H2 = "H 0.0 0.0 0.0\nH 0.0 0.0 0.74\n"
+
+
+def _inp(directory, name):
+    return ORCAINP(str(directory / f"{name}.inp"), H2, "! B3LYP def2-SVP", charge=2)
+
+
+def _workflow(directory, first="opt"):
+    wf = Workflow()
+    wf.add_stage("opt", _inp(directory, first))
+    wf.add_stage("freq", _inp(directory, "freq"), geometry_from="opt", guess_from="opt")
+    wf.add_stage("sp", _inp(directory, "sp"), geometry_from="opt")
+    wf.add_stage("report", _inp(directory, "report"), after=["freq", "sp"])
+    return wf
+
+
+def test_workflow_order(tmp_path, runner):
+    results = _workflow(tmp_path).run(cores=2, memory=None)
+    order = runner.order
+    assert order[0] == "opt" and order[-1] == "report"
+    assert sorted(order[1:3]) == ["freq", "sp"]
+    assert all(results[name] == name for name in ("opt", "freq", "sp", "report"))
+
+    # The final geometry and orbitals of opt are fed to freq
+    geometry = ORCAOUT(os.path.join(EXAMPLES, "a.out")).molecule.to_xyzstr()
+    assert geometry in runner.inputs["freq"] and '%moinp "opt.gbw"' in runner.inputs["freq"]
+    assert [os.path.basename(f) for f in runner.calls["freq"]["extrafiles"]] == ["opt.gbw"]
+    assert geometry in runner.inputs["sp"] and "moinp" not in runner.inputs["sp"]
+    assert runner.calls["sp"]["extrafiles"] == []
+
+
+def test_workflow_skips_finished_stages(tmp_path, runner):
+    _workflow(tmp_path).run(cores=2, memory=None)
+    (tmp_path / "report.out").unlink()
+    results = _workflow(tmp_path).run(cores=2, memory=None)
+    assert runner.order[4:] == ["report"]
+    assert results["opt"].returncode is None and results["opt"].output == str(tmp_path / "opt.out")
+    assert results["report"] == "report"
+
+
+@pytest.mark.parametrize("first", ["bad", "crash"])
+def test_workflow_errors(tmp_path, runner, first):
+    wf = _workflow(tmp_path, first)
+    wf.add_stage("other", _inp(tmp_path, "other"))
+    results = wf.run(cores=2, memory=None)
+    assert isinstance(results["opt"], BaseException)
+    for name in ("freq", "sp"):
+        assert "was not run since opt failed" in str(results[name])
+    assert "was not run since freq, sp failed" in str(results["report"])
+    assert results["other"] == "other"
+    assert sorted(runner.order) == sorted([first, "other"])
+
+
+def test_workflow_unknown_dependency(tmp_path):
+    wf = Workflow()
+    with pytest.raises(ValueError):
+        wf.add_stage("freq", _inp(tmp_path, "freq"), geometry_from="opt")
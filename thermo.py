@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+import numpy as np
+
+from orcatools.out import ORCAOUT
+
+# Physical constants (CODATA 2018, SI units)
+H_PLANCK = 6.62607015e-34
+K_BOLTZMANN = 1.380649e-23
+C_LIGHT = 2.99792458e10  # cm/s
+N_AVOGADRO = 6.02214076e23
+R_GAS = K_BOLTZMANN * N_AVOGADRO
+AMU = 1.66053906660e-27
+ATM = 101325.0
+HARTREE_TO_JMOL = 2625499.639
+# Average moment of inertia (kg m^2) limiting the free rotor moment of inertia in the Grimme quasi-RRHO entropy
+_B_AV = 1e-44
+
+
+def _pad(arrays):
+    """
+    Stack a list of 1D arrays with different lengths into a 2D array padded with nan.
+    """
+    arrays = [np.ravel(np.asarray(a, dtype=float)) for a in arrays]
+    padded = np.full((len(arrays), max(len(a) for a in arrays)), np.nan)
+    for row, values in zip(padded, arrays):
+        row[: len(values)] = values
+    return padded
+
+
+def thermochemistry(
+    frequencies,
+    mass,
+    rotational_constants,
+    temperature=298.15,
+    pressure=1.0,
+    symmetry_number=1,
+    multiplicity=1,
+    qrrho=None,
+    cutoff=100.0,
+    alpha=4,
+    scale=1.0,
+):
+    """
+    Compute the thermochemistry of ideal gas molecules (rigid rotor, harmonic oscillator) over a grid of temperatures and pressures,
+    for one or many molecules (i.e. conformers) at once.
+
+    Temperature and pressure are broadcast against each other, i.e. temperature[:, None] and pressure[None, :] give a full grid.
+    Zero and imaginary frequencies (translations, rotations and transition modes) are left out.
+
+    :param frequencies:
+        An array with the vibrational frequencies in cm-1, or a list of them (one per molecule, with any number of modes).
+    :param mass:
+        Total mass in amu, or an array with one mass per molecule.
+    :param rotational_constants:
+        Array of the 3 rotational constants in cm-1, or of shape (nmolecules, 3). Molecules with a zero constant are linear.
+    :param temperature=298.15:
+        Temperature in K, or an array of them.
+    :param pressure=1.0:
+        Pressure in atm, or an array of them.
+    :param symmetry_number=1:
+        Rotational symmetry number, or an array with one per molecule.
+    :param multiplicity=1:
+        Spin multiplicity, used for the electronic entropy, or an array with one per molecule.
+    :param qrrho=None:
+        Quasi-RRHO treatment of the low frequencies. Options are None (pure harmonic oscillator), "grimme" (entropy interpolated
+        to a free rotor below cutoff, Grimme 2012) and "truhlar" (frequencies below cutoff raised to cutoff for the entropy and
+        thermal energy, Ribeiro, Marenich, Cramer and Truhlar 2011).
+    :param cutoff=100.0:
+        Frequency in cm-1 where the quasi-RRHO treatment starts.
+    :param alpha=4:
+        Exponent of the Grimme damping function.
+    :param scale=1.0:
+        Scaling factor applied to all the frequencies.
+    :return:
+        A dictionary of arrays with the same keys as ORCAOUT.get_thermal_corrections, all in Hartree:
+        "ZPE" - Zero point energy
+        "U" - Total thermal correction to the energy (including the ZPE)
+        "H" - Enthalpy correction (U + kT)
+        "S" - Entropy term T*S
+        "G" - Gibbs free energy correction (H - T*S)
+        Their shape is the broadcast temperature/pressure shape, preceded by the number of molecules when many are given.
+    """
+    if qrrho not in (None, "grimme", "truhlar"):
+        raise ValueError('qrrho must be None, "grimme" or "truhlar".')
+
+    single = np.ndim(mass) == 0
+    if single:
+        frequencies = [frequencies]
+    freqs = _pad(frequencies) * scale
+    nmolecules = len(freqs)
+    mass = np.broadcast_to(np.asarray(mass, dtype=float), (nmolecules,))
+    rotational_constants = np.broadcast_to(
+        np.asarray(rotational_constants, dtype=float), (nmolecules, 3)
+    )
+    sigma = np.broadcast_to(np.asarray(symmetry_number, dtype=float), (nmolecules,))
+    multiplicity = np.broadcast_to(np.asarray(multiplicity, dtype=float), (nmolecules,))
+
+    temperature = np.asarray(temperature, dtype=float)
+    pressure = np.asarray(pressure, dtype=float)
+    grid_shape = np.broadcast_shapes(temperature.shape, pressure.shape)
+    # Molecule axis first, then the grid, then the modes. Only the translation depends on the pressure,
+    # so the rest is computed over the temperatures alone and broadcast at the end.
+    ndim = len(grid_shape)
+    expand = (slice(None),) + (np.newaxis,) * ndim
+    T = temperature.reshape((1,) * (ndim - temperature.ndim + 1) + temperature.shape)
+    P = pressure.reshape((1,) * (ndim - pressure.ndim + 1) + pressure.shape) * ATM
+    RT = R_GAS * T
+
+    # Translation
+    m = (mass * AMU)[expand]
+    s_trans = R_GAS * (
+        np.log((2 * np.pi * m * K_BOLTZMANN * T / H_PLANCK**2) ** 1.5 * K_BOLTZMANN * T / P) + 2.5
+    )
+    u_trans = 1.5 * RT
+
+    # Rotation, with rotational temperatures from the constants in cm-1
+    theta = H_PLANCK * C_LIGHT * rotational_constants / K_BOLTZMANN
+    linear = np.any(theta <= 0, axis=1)
+    theta_linear = np.max(theta, axis=1)
+    theta_product = np.prod(np.where(theta > 0, theta, 1.0), axis=1)
+    s_rot = np.where(
+        linear[expand],
+        R_GAS * (np.log(T / (sigma * theta_linear)[expand]) + 1.0),
+        R_GAS
+        * (np.log(np.sqrt(np.pi) / sigma[expand] * T**1.5 / np.sqrt(theta_product)[expand]) + 1.5),
+    )
+    u_rot = np.where(linear[expand], 1.0, 1.5) * RT
+
+    # Electronic
+    s_el = R_GAS * np.log(multiplicity)[expand] * np.ones_like(T)
+
+    # Vibration, with the modes in the last axis and nan for padding and non-real modes
+    nu = np.where(freqs > 0, freqs, np.nan)[expand + (slice(None),)]
+    zpe = 0.5 * N_AVOGADRO * H_PLANCK * C_LIGHT * np.nansum(nu, axis=-1)
+    zpe = zpe * np.ones_like(T)
+    nu_thermal = np.maximum(nu, cutoff) if qrrho == "truhlar" else nu
+    x = H_PLANCK * C_LIGHT * nu_thermal / (K_BOLTZMANN * T[..., np.newaxis])
+    u_vib = RT * np.nansum(x / np.expm1(x), axis=-1)
+    s_harmonic = R_GAS * (x / np.expm1(x) - np.log(-np.expm1(-x)))
+    if qrrho == "grimme":
+        # Free rotor entropy with the moment of inertia of a rotor with the mode frequency
+        mu = H_PLANCK / (8 * np.pi**2 * nu * C_LIGHT)
+        mu_eff = mu * _B_AV / (mu + _B_AV)
+        s_free = R_GAS * (
+            0.5
+            + np.log(
+                np.sqrt(8 * np.pi**3 * mu_eff * K_BOLTZMANN * T[..., np.newaxis] / H_PLANCK**2)
+            )
+        )
+        weight = 1.0 / (1.0 + (cutoff / nu) ** alpha)
+        s_vib = np.nansum(weight * s_harmonic + (1 - weight) * s_free, axis=-1)
+    else:
+        s_vib = np.nansum(s_harmonic, axis=-1)
+
+    u = zpe + u_vib + u_rot + u_trans
+    h = u + RT
+    ts = T * (s_trans + s_rot + s_vib + s_el)
+    result = {
+        "ZPE": zpe,
+        "U": u,
+        "H": h,
+        "S": ts,
+        "G": h - ts,
+    }
+    for key, value in result.items():
+        value = np.broadcast_to(value / HARTREE_TO_JMOL, (nmolecules,) + grid_shape)
+        result[key] = np.array(value[0] if single else value)
+    return result
+
+
+def thermochemistry_from_outputs(outputs, temperature=298.15, pressure=1.0, **kwargs):
+    """
+    Recompute the thermochemistry of one or many frequency calculations (i.e. conformers) over a temperature/pressure grid,
+    without running ORCA again.
+
+    :param outputs:
+        An ORCAOUT object or output file name, or a list of them.
+    :param temperature=298.15:
+        Temperature in K, or an array of them.
+    :param pressure=1.0:
+        Pressure in atm, or an array of them.
+    :param kwargs:
+        Options for thermochemistry, such as qrrho, cutoff and scale.
+    :return:
+        The thermochemistry dictionary, plus "E" with the electronic energies and "G_total" with E + G.
+        With a list of outputs the arrays have one row per output.
+    """
+    single = isinstance(outputs, (str, ORCAOUT))
+    if single:
+        outputs = [outputs]
+    data = [
+        (out if isinstance(out, ORCAOUT) else ORCAOUT(out)).get_thermo_data() for out in outputs
+    ]
+    result = thermochemistry(
+        [d["frequencies"] for d in data],
+        np.array([d["mass"] for d in data]),
+        np.array([d["rotational_constants"] for d in data]),
+        temperature,
+        pressure,
+        symmetry_number=np.array([d["symmetry_number"] for d in data]),
+        multiplicity=np.array([d["multiplicity"] for d in data]),
+        **kwargs,
+    )
+    energies = np.array([d["electronic_energy"] for d in data])
+    energies = energies.reshape((-1,) + (1,) * (result["G"].ndim - 1))
+    result["E"] = np.broadcast_to(energies, result["G"].shape).copy()
+    result["G_total"] = result["E"] + result["G"]
+    if single:
+        result = {key: value[0] for key, value in result.items()}
+    return result
@@ -1,8 +1,17 @@
 #!/usr/bin/env python3
-import os, sys
+import glob
+import os
+import shutil
 import subprocess as sub
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 
+import numpy as np
+
+from orcatools.compress import open_file
+from orcatools.molecule import Molecule
+
 
 ### Context manager for changing the current working directory ###
 @contextmanager
@@ -28,12 +37,14 @@ def get_coordinates_from_xyz(xyz):
     Reads molecule from file in XYZ format if file exists, or read from xyz string otherwise, and return the coordinates in a list of lists.
 
     :param xyz:
-        File with molecular structure in XYZ format or XYZ string.
+        File with molecular structure in XYZ format, XYZ string or Molecule.
     :return coordinates, xyzstr:
         The coordinates in a list of elements lists and the XYZ string.
     """
+    if isinstance(xyz, Molecule):
+        return xyz.to_list(), xyz.to_xyzstr()
     if xyz and os.path.isfile(xyz):
-        with open(xyz, "r") as fh:
+        with open_file(xyz, "r") as fh:
             xyzstr = "\n".join(fh.readlines()[2:])
     elif isinstance(xyz, str):
         xyzstr = xyz
@@ -105,9 +116,97 @@ def write_xyzfile_from_coordinates(coords, xyz_file, title=None):
         out.writelines(xyzstr)
 
 
+def write_xyzfile_from_array(elements, coordinates, xyz_file, titles=None):
+    """
+    Write a .xyz formatted file from an element list and a coordinates array. A 3D array is written as a multi-frame .xyz file.
+
+    :param elements:
+        A list with the element symbols.
+    :param coordinates:
+        An array of shape (natoms, 3), or (nframes, natoms, 3) for multiple frames.
+    :param xyz_file:
+        A string with the .xyz file name.
+    :param titles=None:
+        A title, or a list with one title per frame, where default is file basename.
+    """
+    coordinates = np.asarray(coordinates, dtype=float)
+    if coordinates.ndim == 2:
+        coordinates = coordinates[np.newaxis]
+    nframes, natoms = coordinates.shape[:2]
+    if not ".xyz" in xyz_file:
+        xyz_file = xyz_file + ".xyz"
+    if not titles:
+        titles = xyz_file.replace(".xyz", "")
+    if isinstance(titles, str):
+        titles = [titles] * nframes
+
+    # One format string for the whole frame, filled from an (natoms, 4) object array
+    frame_format = "%-4s %10.6f %11.6f %11.6f\n" * natoms
+    frame = np.empty((natoms, 4), dtype=object)
+    frame[:, 0] = elements
+    with open(xyz_file, "w") as out:
+        for title, frame_coordinates in zip(titles, coordinates):
+            frame[:, 1:] = frame_coordinates
+            out.write(f"{natoms}\n{title}\n")
+            out.write(frame_format % tuple(frame.ravel()))
+
+
+def get_coordinates_array(xyz):
+    """
+    Reads coordinates from a .xyz file, XYZ string, list of [symbol, x, y, z] lists, ORCAOUT coordinates list or Molecule, and return them as arrays.
+
+    :param xyz:
+        A string block, .xyz file, ORCAOUT list or Molecule with XYZ coordinates.
+    :return elements, coordinates:
+        A list with the element symbols and an array of shape (natoms, 3) with the coordinates.
+    """
+    molecule = Molecule.from_xyz(xyz)
+    return molecule.elements.tolist(), molecule.coordinates
+
+
+def interpolate_array(xyz_a, xyz_b, npoints, xyz_file=None, xyz_prefix=None):
+    """
+    Linearly interpolate the coordinates of two structures through npoints, computing all the images at once.
+
+    :param xyz_a:
+        A string block, .xyz file, or ORCAOUT list with XYZ coordinates.
+    :param xyz_b:
+        A second string block, .xyz file, or ORCAOUT list with XYZ coordinates.
+    :param npoints:
+        Number of interpolation points, including both ends.
+    :param xyz_file=None:
+        A string with the name of a multi-frame .xyz file where the images are written.
+    :param xyz_prefix=None:
+        A string with a prefix for writing each image to its own file, named prefix_01.xyz, prefix_02.xyz, etc.
+    :return elements, images:
+        A list with the element symbols and an array of shape (npoints, natoms, 3) with the images.
+    """
+    elements, coord_a = get_coordinates_array(xyz_a)
+    coord_b = get_coordinates_array(xyz_b)[1]
+    if coord_a.shape != coord_b.shape:
+        raise BaseException("Your .xyz files should have the same number of atoms.")
+
+    fractions = np.linspace(0.0, 1.0, npoints)
+    images = coord_a + fractions[:, np.newaxis, np.newaxis] * (coord_b - coord_a)
+    # Keep the ends exactly equal to the given structures
+    images[0] = coord_a
+    if npoints > 1:
+        images[-1] = coord_b
+
+    if xyz_file:
+        titles = [f"Image {idx + 1}" for idx in range(npoints)]
+        write_xyzfile_from_array(elements, images, xyz_file, titles=titles)
+    if xyz_prefix:
+        for idx, image in enumerate(images):
+            write_xyzfile_from_array(elements, image, f"{xyz_prefix}_{idx + 1:02d}.xyz")
+
+    return elements, images
+
+
 def interpolate(xyz_a, xyz_b, npoints):
     """
     Interpolate the coordinates from two .xyz files through npoints returning a list of the interpolated coordinates.
+    See interpolate_array for the array version, which avoids building the lists.
 
     :param xyz_a:
         A string block, .xyz file, or ORCAOUT list with XYZ coordinates.
@@ -116,98 +215,196 @@ def interpolate(xyz_a, xyz_b, npoints):
     :param npoints:
         Number of interpolation points
     """
-    # Get all the coordinates
-    if isinstance(xyz_a, list):
-        coord_a = xyz_a
-    else:
-        coord_a = get_coordinates_from_xyz(xyz_a)[0]
+    elements, images = interpolate_array(xyz_a, xyz_b, npoints)
+    return [
+        [[symbol, *xyz] for symbol, xyz in zip(elements, image)]
+        for image in images.tolist()
+    ]
 
-    if isinstance(xyz_b, list):
-        coord_b = xyz_b
-    else:
-        coord_b = get_coordinates_from_xyz(xyz_b)[0]
-
-    natoms = len(coord_a)
-    # print("a ",natoms)
-    # print("b ", len(coord_b))
-    if len(coord_b) != natoms:
-        print("Your .xyz files should have the same number of atoms.")
-        sys.exit()
-
-    # Constants of the distances to interpolate the points for each atom n
-    constx = []
-    consty = []
-    constz = []
-    n = 0
-    while n < natoms:
-        constx.append((coord_b[n][1] - coord_a[n][1]) / (npoints - 1))
-        consty.append((coord_b[n][2] - coord_a[n][2]) / (npoints - 1))
-        constz.append((coord_b[n][3] - coord_a[n][3]) / (npoints - 1))
-        n = n + 1
-
-    # Get the distance differences for coordinates interpolation
-    np = 0
-    all_coords = []
-    while np < npoints:
-        current_coords = []
-        if np == 0:
-            current_coords = coord_a
-        elif np == npoints - 1:
-            current_coords = coord_b
-        # Generate new coordinates for file n outside the two minimuns
-        # New coordinates
-        else:
-            n = 0
-            while n < natoms:
-                coordX = np * constx[n] + coord_a[n][1]
-                coordY = np * consty[n] + coord_a[n][2]
-                coordZ = np * constz[n] + coord_a[n][3]
-                current_coords.append([coord_a[n][0], coordX, coordY, coordZ])
-                n += 1
-
-        all_coords.append(current_coords)
-        np += 1
-
-    return all_coords
+
+def _distance_matrices(images):
+    """
+    Return the pairwise distance matrices of an (nimages, natoms, 3) array, computed from the Gram matrices.
+    """
+    squared = np.sum(images * images, axis=2)
+    distances = images @ images.transpose(0, 2, 1)
+    distances *= -2.0
+    distances += squared[:, :, np.newaxis]
+    distances += squared[:, np.newaxis, :]
+    np.maximum(distances, 0.0, out=distances)
+    return np.sqrt(distances, out=distances)
+
+
+# Smallest pair distance (Angstroem) used by the IDPP, so coincident atoms do not divide by zero
+_IDPP_MIN_DISTANCE = 1e-3
+
+
+def _idpp_objective(images, targets):
+    """
+    Return the image dependent pair potential of each image and its gradient with respect to the coordinates.
+    """
+    diagonal = np.arange(images.shape[1])
+    distances = _distance_matrices(images)
+    # Exclude the diagonal from the sums
+    distances[:, diagonal, diagonal] = 1.0
+    np.maximum(distances, _IDPP_MIN_DISTANCE, out=distances)
+    deviation = targets - distances
+    deviation[:, diagonal, diagonal] = 0.0
+    inverse = 1.0 / distances
+    weights = inverse**4
+    weighted = weights * deviation
+    energy = 0.5 * np.einsum("kij,kij->k", weighted, deviation)
+    # dS/dd for each pair, divided by d to project onto the atom displacements
+    derivative = (-4.0 * inverse * deviation - 2.0) * weighted * inverse
+    gradient = images * derivative.sum(axis=2)[:, :, np.newaxis] - derivative @ images
+    return energy, gradient
+
+
+def idpp_interpolate(
+    xyz_a,
+    xyz_b,
+    npoints,
+    fmax=1e-3,
+    max_step=0.1,
+    max_iter=1000,
+    xyz_file=None,
+    xyz_prefix=None,
+):
+    """
+    Build a path between two structures through npoints with the image dependent pair potential (IDPP) method, which avoids the atom clashes
+    of a linear interpolation. The interior images of a linear interpolation are relaxed towards the linearly interpolated interatomic distances.
+
+    Reference: S. Smidstrup, A. Pedersen, K. Stokbro, H. Jonsson, J. Chem. Phys. 140, 214106 (2014).
+
+    :param xyz_a:
+        A string block, .xyz file, or ORCAOUT list with XYZ coordinates.
+    :param xyz_b:
+        A second string block, .xyz file, or ORCAOUT list with XYZ coordinates.
+    :param npoints:
+        Number of path points, including both ends.
+    :param fmax=1e-3:
+        Convergence threshold for the largest atomic gradient of the IDPP objective.
+    :param max_step=0.1:
+        Maximum displacement of an atom in a single step, in Angstroem.
+    :param max_iter=1000:
+        Maximum number of optimization steps.
+    :param xyz_file=None:
+        A string with the name of a multi-frame .xyz file where the images are written.
+    :param xyz_prefix=None:
+        A string with a prefix for writing each image to its own file, named prefix_01.xyz, prefix_02.xyz, etc.
+    :return elements, images:
+        A list with the element symbols and an array of shape (npoints, natoms, 3) with the images.
+    """
+    elements, images = interpolate_array(xyz_a, xyz_b, npoints)
+    if npoints > 2:
+        ends = _distance_matrices(images[[0, -1]])
+        fractions = np.linspace(0.0, 1.0, npoints)[1:-1, np.newaxis, np.newaxis]
+        targets = ends[0] + fractions * (ends[1] - ends[0])
+
+        interior = images[1:-1].copy()
+        # Coincident atoms have no direction to be pushed apart along, so move them slightly off each other first
+        image, _, atom = np.nonzero(np.triu(_distance_matrices(interior) < _IDPP_MIN_DISTANCE, k=1))
+        if len(image):
+            rng = np.random.default_rng(0)
+            interior[image, atom] += rng.uniform(-1.0, 1.0, (len(image), 3)) * 10 * _IDPP_MIN_DISTANCE
+        steps = np.full(len(interior), max_step)
+        energy, gradient = _idpp_objective(interior, targets)
+        for _ in range(max_iter):
+            norms = np.linalg.norm(gradient, axis=2).max(axis=1)
+            if norms.max() < fmax:
+                break
+            # Normalized steepest descent with a step length adapted for each image
+            scale = (steps / np.maximum(norms, 1e-12))[:, np.newaxis, np.newaxis]
+            trial = interior - scale * gradient
+            trial_energy, trial_gradient = _idpp_objective(trial, targets)
+            accepted = trial_energy < energy
+            interior[accepted] = trial[accepted]
+            energy[accepted] = trial_energy[accepted]
+            gradient[accepted] = trial_gradient[accepted]
+            steps = np.where(accepted, np.minimum(steps * 1.2, max_step), steps * 0.5)
+            if steps.max() < 1e-8:
+                break
+        images[1:-1] = interior
+
+    if xyz_file:
+        titles = [f"Image {idx + 1}" for idx in range(npoints)]
+        write_xyzfile_from_array(elements, images, xyz_file, titles=titles)
+    if xyz_prefix:
+        for idx, image in enumerate(images):
+            write_xyzfile_from_array(elements, image, f"{xyz_prefix}_{idx + 1:02d}.xyz")
+
+    return elements, images
 
 
 def get_input_blocks_from_file(orcainp_name, verbose=False):
-    obl_block = ""
-    osi_block = ""
-    xyzstr = ""
-    charge = 0
-    mult = 1
-    inside_obl_block = False
-    with open(orcainp_name, "r") as data:
-        for line in data:
-            if "!" in line:
-                osi_block += line
-            elif "%" in line:
-                if not inside_obl_block:
-                    inside_obl_block = True
-                obl_block += line
-            elif inside_obl_block:
-                obl_block += line
-            elif inside_obl_block and any(char in line for char in "*%!"):
-                inside_obl_block = False
-            if "*" in line:
-                charge = line.split()[2]
-                mult = line.split()[3]
-                for line in data:
-                    if "*" not in line:
-                        xyzstr += line
-                    else:
-                        break
-        if verbose:
-            print("osi: ", osi_block)
-            print("obl: ", obl_block)
-            print("xyz ", xyzstr)
-            print(f"Charge: {charge}\nMult: {mult}")
+    """
+    Read the blocks of an ORCA input file. See orcatools.inp.read_input for the full input structure.
+
+    :param orcainp_name:
+        A string with the name of the ORCA input file.
+    :param verbose=False:
+        Print the blocks.
+    :return osi_block, obl_block, xyzstr, charge, mult:
+        The ! lines, the % blocks, the coordinate lines, and the charge and multiplicity as integers.
+    """
+    from orcatools.inp import read_input
+
+    parsed = read_input(orcainp_name)
+    osi_block = parsed.osi_block + "\n" if parsed.osi_block else ""
+    obl_block = "".join(f"{text}\n" for _, text in parsed.blocks)
+    xyzstr = parsed.coordinates_text or ""
+    charge = parsed.charge if parsed.charge is not None else 0
+    mult = parsed.mult if parsed.mult is not None else 1
+    if verbose:
+        print("osi: ", osi_block)
+        print("obl: ", obl_block)
+        print("xyz ", xyzstr)
+        print(f"Charge: {charge}\nMult: {mult}")
 
     return osi_block, obl_block, xyzstr, charge, mult
 
 
-def plot_orbitals(gbw_file, orb, grid_dens=40, orca_plot_path=None, verbose=False):
+def _plot_orbital(gbw_file, orbital, grid_dens, orca_plot_path, cube_file, log_file):
+    """
+    Run orca_plot for a single orbital in its own working directory, moving the cube file to cube_file.
+    """
+    workdir = tempfile.mkdtemp(
+        prefix=f"{os.path.basename(cube_file)}-",
+        dir=os.path.dirname(os.path.abspath(cube_file)),
+    )
+    try:
+        gbw_name = os.path.basename(gbw_file)
+        os.symlink(os.path.abspath(gbw_file), os.path.join(workdir, gbw_name))
+        input_data = f"2\n{orbital}\n4\n{grid_dens}\n5\n7\n10\n11\n"
+        with open(log_file, "w") as stdout:
+            result = sub.run(
+                [orca_plot_path, gbw_name, "-i"],
+                input=input_data,
+                text=True,
+                cwd=workdir,
+                stdout=stdout,
+                stderr=sub.STDOUT,
+            )
+        if result.returncode != 0:
+            raise RuntimeError(f"Command failed with return code {result.returncode}")
+        cubes = glob.glob(os.path.join(workdir, "*.cube"))
+        if not cubes:
+            raise RuntimeError(f"orca_plot did not write a .cube file, check {log_file}")
+        os.replace(cubes[0], cube_file)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return cube_file
+
+
+def plot_orbitals(
+    gbw_file,
+    orb,
+    grid_dens=40,
+    orca_plot_path=None,
+    verbose=False,
+    workers=1,
+    skip_existing=False,
+):
     """
     Plot the molecular orbitals from a .gbw file in the range of orbitals.
 
@@ -218,50 +415,71 @@ def plot_orbitals(gbw_file, orb, grid_dens=40, orca_plot_path=None, verbose=Fals
     :param grid_dens:
         A string with the grid density to plot the orbitals.
     :param orca_plot_path:
-        A string with the path to the orca_plot executable.
+        A string with the path to the orca_plot executable, or its name to look it up in the PATH.
+    :param workers=1:
+        Number of orca_plot processes run at once. Each orbital is plotted in its own working directory and logged to
+        <gbw basename>_plot.mo<N>.log.
+    :param skip_existing=False:
+        Skip the orbitals whose .cube file already exists.
+    :return:
+        A dictionary with the .cube file name of each orbital, named <gbw basename>.mo<N>a.cube.
     """
     if not os.path.isfile(gbw_file):
         raise BaseException("The .gbw file does not exist!")
     if not orca_plot_path:
         raise BaseException("The path to the orca_plot executable is not defined!")
-
-    log_file = gbw_file.replace(".gbw", f"_plot.log")
+    # orca_plot is run from a scratch directory, so resolve a relative path or a bare name beforehand
+    if os.sep in orca_plot_path:
+        orca_plot_path = os.path.abspath(orca_plot_path)
+    else:
+        orca_plot_path = shutil.which(orca_plot_path)
+        if not orca_plot_path:
+            raise BaseException("The orca_plot executable was not found in the PATH!")
 
     if isinstance(orb, tuple):
         orbital_range = range(orb[0], orb[1] + 1)
     else:
         orbital_range = [orb]
 
-    with open(log_file, "w") as stdout:
+    basename = os.path.splitext(gbw_file)[0]
+    cube_files = {orbital: f"{basename}.mo{orbital}a.cube" for orbital in orbital_range}
+    if skip_existing:
+        orbital_range = [
+            orbital for orbital in orbital_range if not os.path.isfile(cube_files[orbital])
+        ]
+
+    with ThreadPoolExecutor(max(1, workers)) as executor:
+        futures = {}
         for orbital in orbital_range:
             if verbose:
                 print(f"Plotting Orbital = {orbital}, Grid-Density = {grid_dens} ...")
-            
-            command = f"{orca_plot_path} {gbw_file} -i"
-            input_data = f"2\n{orbital}\n4\n{grid_dens}\n5\n7\n10\n11\n"  
-            stdout.write(
-                f"\n\n######################\n##### Orbital {orbital} #####\n######################\n\n"
+            futures[orbital] = executor.submit(
+                _plot_orbital,
+                gbw_file,
+                orbital,
+                grid_dens,
+                orca_plot_path,
+                cube_files[orbital],
+                f"{basename}_plot.mo{orbital}.log",
             )
-            stdout.flush()
+    failed = {
+        orbital: future.exception()
+        for orbital, future in futures.items()
+        if future.exception()
+    }
+    if failed:
+        raise RuntimeError(
+            "Plotting failed for orbitals "
+            + ", ".join(f"{orbital} ({error})" for orbital, error in failed.items())
+        )
+    return cube_files
 
-            result = sub.run(
-                command,
-                input=input_data,
-                text=True,
-                shell=True,
-                stdout=stdout,
-            )
-            if result.returncode != 0:
-                raise RuntimeError(
-                    f"Command failed with return code {result.returncode}"
-                )
-                
 def orbital_viewer(cube, isovalue=0.03, resolution=1.00):
     """
     View the molecular orbitals from a specified .cube file.
     
     :param cube:
-        A string with the .cube file name.
+        A string with the .cube file name, or a orcatools.cube.Cube object (i.e. downsampled before viewing).
     :param isovalue=0.03:
         A float with the isovalue to plot the orbitals.
         
@@ -271,14 +489,19 @@ def orbital_viewer(cube, isovalue=0.03, resolution=1.00):
         import py3Dmol as p3d
     except ImportError:"py3Dmol package is not installed. Please install it with 'pip install py3Dmol' or 'conda -c conda-forge install py3Dmol'."
     
-    if not os.path.isfile(cube):
-        raise BaseException("The .cube file does not exist!")
+    if isinstance(cube, str):
+        if not os.path.isfile(cube):
+            raise BaseException("The .cube file does not exist!")
+        with open(cube) as fh:
+            cube_str = fh.read()
+    else:
+        cube_str = cube.to_string()
     
     viewer = p3d.view()
-    viewer.addModel(open(cube).read(), "cube")
+    viewer.addModel(cube_str, "cube")
     viewer.setStyle({'stick': {}})
-    viewer.addVolumetricData(open(cube).read(), "cube", {'isoval': isovalue, 'color': 'blue', "opacity": 0.85, "resolution": resolution })
-    viewer.addVolumetricData(open(cube).read(), "cube", {'isoval': -isovalue, 'color': 'red', "opacity": 0.85, "resolution": resolution })
+    viewer.addVolumetricData(cube_str, "cube", {'isoval': isovalue, 'color': 'blue', "opacity": 0.85, "resolution": resolution })
+    viewer.addVolumetricData(cube_str, "cube", {'isoval': -isovalue, 'color': 'red', "opacity": 0.85, "resolution": resolution })
     viewer.zoomTo()
     # view.show()
     
@@ -295,7 +518,7 @@ def orca_run(
     orca_command=None,
 ):
     """
-    Run ORCA calculation from an ORCA input file, either by orca_run.sh script or by supplying a command to run ORCA directly.
+    Run ORCA calculation from an ORCA input file, either by the orcatools Python runner, by a orca_run.sh script or by supplying a command to run ORCA directly.
 
     :param nprocs:
         Number of cores to run.
@@ -306,20 +529,30 @@ def orca_run(
     :param [extrafile]:
         A list containing extra files to run ORCA, such as .gbw and .xyz.
     :param orcarun:
-        Full path to orca_run.sh script. Default: orcatools orca_run.sh script.
+        Full path to a orca_run.sh script. Default: the orcatools.orcarun Python runner.
     :param orca_command:
-        Full command in order to run ORCA, in case orca_run.sh is not to be used.
+        Full command in order to run ORCA, in case the runner is not to be used.
+    :return:
+        A orcatools.orcarun.RunResult object when the Python runner is used.
     """
     if not os.path.isfile(orcainp):
         raise BaseException("ORCA input file does not exists!")
 
+    if not orca_command and not orcarun:
+        from orcatools.orcarun import run
+
+        return run(
+            orcainp,
+            output=output,
+            nprocs=nprocs,
+            maxcore=maxcore,
+            extrafiles=extrafiles,
+        )
+
     if orca_command:
         command = orca_command
     else:
-        if orcarun:
-            command = orcarun
-        else:
-            command = f"{os.path.dirname(__file__)}/orca_run.sh"
+        command = orcarun
         command += f" -i {orcainp}"
         if nprocs:
             command += f" -p {nprocs}"
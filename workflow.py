@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+import os
+import threading
+
+from orcatools.orcarun import RunResult
+from orcatools.out import ORCAOUT, check_normal_termination
+from orcatools.scheduler import Scheduler
+
+
+class Stage:
+    """
+    Class which holds a stage of a Workflow.
+
+    :attribute name:
+        The name of the stage.
+    :attribute orcainp:
+        The ORCAINP object of the stage.
+    :attribute dependencies:
+        A list with the names of the stages which must finish before this one.
+    :attribute geometry_from:
+        Name of the stage whose final geometry is used as input geometry.
+    :attribute guess_from:
+        Name of the stage whose .gbw file is used as orbital guess.
+    :attribute extrafiles:
+        A list containing extra files to run ORCA.
+    :attribute output:
+        The full path of the output file.
+    """
+
+    def __init__(self, name, orcainp, dependencies, geometry_from, guess_from, extrafiles, output):
+        self.name = name
+        self.orcainp = orcainp
+        self.dependencies = dependencies
+        self.geometry_from = geometry_from
+        self.guess_from = guess_from
+        self.extrafiles = extrafiles
+        basename = os.path.splitext(os.path.abspath(orcainp.orcainp_name))[0]
+        self.output = os.path.abspath(output) if output else f"{basename}.out"
+        self.runfiles = f"{basename}-runfiles"
+        self.gbw_file = os.path.join(self.runfiles, f"{os.path.basename(basename)}.gbw")
+
+    def finished(self):
+        """
+        Boolean that tells if the output of the stage exists and terminated normally.
+        """
+        return os.path.isfile(self.output) and check_normal_termination(self.output)[0]
+
+
+class Workflow:
+    """
+    Workflow of chained ORCA calculations, such as opt -> freq -> single point, built as a graph of stages.
+
+    Each stage runs once all the stages it depends on have finished, so independent branches run in parallel.
+    Geometries and .gbw files are passed between stages, and stages whose output already terminated normally are skipped,
+    so rerunning a workflow after a crash only runs the missing work.
+
+    :param skip_finished=True:
+        Skip stages whose output file already exists with a normal termination.
+
+    Example:
+        wf = Workflow()
+        wf.add_stage("opt", opt_inp)
+        wf.add_stage("freq", freq_inp, geometry_from="opt", guess_from="opt")
+        wf.add_stage("sp", sp_inp, geometry_from="opt")
+        results = wf.run(cores=16)
+    """
+
+    def __init__(self, skip_finished=True):
+        self.skip_finished = skip_finished
+        self.stages = {}
+
+    def add_stage(
+        self,
+        name,
+        orcainp,
+        after=None,
+        geometry_from=None,
+        guess_from=None,
+        extrafiles=None,
+        output=None,
+    ):
+        """
+        Add a stage to the workflow. The stages it depends on must be added first.
+
+        :param name:
+            A string with the name of the stage.
+        :param orcainp:
+            The ORCAINP object of the stage.
+        :param after=None:
+            A list with the names of stages which must finish before this one.
+        :param geometry_from=None:
+            Name of a stage whose final geometry replaces the ORCAINP coordinates.
+        :param guess_from=None:
+            Name of a stage whose .gbw file is used as orbital guess (MORead).
+        :param extrafiles=None:
+            A list containing extra files to run ORCA, such as .xyz files.
+        :param output=None:
+            Output file name. Default: input basename with .out extension.
+        :return:
+            The Stage object.
+        """
+        if name in self.stages:
+            raise ValueError(f"Stage {name} already exists in the workflow.")
+        dependencies = list(after or [])
+        for dependency in (geometry_from, guess_from):
+            if dependency and dependency not in dependencies:
+                dependencies.append(dependency)
+        for dependency in dependencies:
+            if dependency not in self.stages:
+                raise ValueError(
+                    f"Stage {name} depends on {dependency}, which is not in the workflow."
+                )
+        stage = Stage(
+            name, orcainp, dependencies, geometry_from, guess_from, list(extrafiles or []), output
+        )
+        self.stages[name] = stage
+        return stage
+
+    def _prepare(self, stage):
+        """
+        Feed the geometry and orbital files of the previous stages to the stage input.
+        """
+        extrafiles = list(stage.extrafiles)
+        if stage.geometry_from:
+            previous = ORCAOUT(self.stages[stage.geometry_from].output)
+            stage.orcainp.update_xyz(previous.molecule)
+        if stage.guess_from:
+            gbw_file = self.stages[stage.guess_from].gbw_file
+            if not os.path.isfile(gbw_file):
+                raise BaseException(f"The .gbw file {gbw_file} does not exist!")
+            extrafiles.append(gbw_file)
+            stage.orcainp.update_guess(os.path.basename(gbw_file))
+        return extrafiles
+
+    def run(self, scheduler=None, **scheduler_kwargs):
+        """
+        Run the workflow, waiting for all the stages to finish.
+
+        :param scheduler=None:
+            An orcatools.scheduler.Scheduler used to run the stages. Default: a new Scheduler built with scheduler_kwargs.
+        :param scheduler_kwargs:
+            Keyword arguments for the new Scheduler, such as cores, memory and orca.
+        :return:
+            A dictionary with the RunResult of each stage, or the exception which stopped it.
+        """
+        own_scheduler = scheduler is None
+        if own_scheduler:
+            scheduler = Scheduler(**scheduler_kwargs)
+
+        results = {}
+        started = set()
+        condition = threading.Condition()
+
+        def finish(name, result):
+            with condition:
+                results[name] = result
+                launch()
+                condition.notify_all()
+
+        def on_done(name, future):
+            stage = self.stages[name]
+            error = future.exception()
+            if error is None and not stage.finished():
+                error = BaseException(
+                    f"Stage {name} did not terminate normally! Check {stage.output}."
+                )
+            finish(name, error or future.result())
+
+        def launch():
+            # Called holding the condition lock
+            for name, stage in self.stages.items():
+                if name in started:
+                    continue
+                if not all(dep in results for dep in stage.dependencies):
+                    continue
+                started.add(name)
+                failed = [
+                    dep for dep in stage.dependencies if isinstance(results[dep], BaseException)
+                ]
+                if failed:
+                    results[name] = BaseException(
+                        f"Stage {name} was not run since {', '.join(failed)} failed."
+                    )
+                    continue
+                if self.skip_finished and stage.finished():
+                    results[name] = RunResult(
+                        stage.orcainp.orcainp_name, stage.output, None, None, stage.runfiles
+                    )
+                    continue
+                try:
+                    extrafiles = self._prepare(stage)
+                    scheduler.submit(
+                        stage.orcainp,
+                        output=stage.output,
+                        extrafiles=extrafiles,
+                        callback=lambda future, name=name: on_done(name, future),
+                    )
+                except (KeyboardInterrupt, SystemExit):
+                    raise
+                except BaseException as error:
+                    results[name] = error
+            # Skipped and failed stages may unlock further ones
+            if any(
+                name not in started and all(dep in results for dep in stage.dependencies)
+                for name, stage in self.stages.items()
+            ):
+                launch()
+
+        with condition:
+            launch()
+            condition.wait_for(lambda: len(results) == len(self.stages))
+        if own_scheduler:
+            scheduler.shutdown(wait=True)
+
+        return results